@@ -15,8 +15,9 @@ sys.path.append(str(Path(__file__).parent / "src"))
 
 try:
     from spotify_analysis.core.data_loader import load_spotify_data, SpotifyDataLoader
-    from spotify_analysis.core.data_transformer import transform_data, SpotifyDataTransformer
-    from spotify_analysis.core.pattern_analyzer import analyze_patterns, SpotifyPatternAnalyzer
+    from spotify_analysis.core.data_cache import DEFAULT_CACHE_DIR
+    from spotify_analysis.core.data_transformer import transform_data, SpotifyDataTransformer, TransformMemo
+    from spotify_analysis.core.pattern_analyzer import analyze_patterns, SpotifyPatternAnalyzer, DATA_QUALITY
 except ImportError:
     # Fallback to old modules if new structure not available
     from modules.load import load_data
@@ -83,8 +84,12 @@ def main():
         st.session_state.spotify_data = None
     if 'transformed_data' not in st.session_state:
         st.session_state.transformed_data = None
+    if 'session_table' not in st.session_state:
+        st.session_state.session_table = None
     if 'analysis_results' not in st.session_state:
         st.session_state.analysis_results = None
+    if 'transform_memo' not in st.session_state:
+        st.session_state.transform_memo = TransformMemo()
     
     # Page routing
     if page == "🏠 Overview":
@@ -169,7 +174,8 @@ def show_data_loading():
     
     1. **Request Data**: Go to [Spotify Privacy Settings](https://www.spotify.com/account/privacy/)
     2. **Download**: Request "Extended streaming history"
-    3. **Extract**: Place JSON files in the `Spotify Extended Streaming History/` folder
+    3. **Extract**: Place JSON files in the `Spotify Extended Streaming History/` folder,
+       or enter the path of the downloaded ZIP under "Manual Path"
     4. **Load**: Use the interface below to load your data
     """)
     
@@ -182,8 +188,9 @@ def show_data_loading():
     if load_option == "Use Default Directory":
         if st.button("🔄 Load from Default Directory"):
             try:
-                data = load_spotify_data()
+                data = load_spotify_data(cache_dir=DEFAULT_CACHE_DIR)
                 st.session_state.spotify_data = data
+                st.session_state.transform_memo.clear()
                 st.success(f"✅ Successfully loaded {len(data)} records!")
                 st.dataframe(data.head())
             except Exception as e:
@@ -204,11 +211,12 @@ def show_data_loading():
                 st.error(f"❌ Error loading files: {str(e)}")
                 
     elif load_option == "Manual Path":
-        data_path = st.text_input("Enter data directory path:")
+        data_path = st.text_input("Enter data directory or export ZIP path:")
         if data_path and st.button("🔄 Load from Path"):
             try:
-                data = load_spotify_data(data_path)
+                data = load_spotify_data(data_path, cache_dir=DEFAULT_CACHE_DIR)
                 st.session_state.spotify_data = data
+                st.session_state.transform_memo.clear()
                 st.success(f"✅ Successfully loaded {len(data)} records!")
                 st.dataframe(data.head())
             except Exception as e:
@@ -226,7 +234,7 @@ def show_data_loading():
             st.metric("Columns", len(df.columns))
         with col3:
             if 'ts' in df.columns:
-                st.metric("Date Range", f"{df['ts'].min()[:10]} to {df['ts'].max()[:10]}")
+                st.metric("Date Range", f"{str(df['ts'].min())[:10]} to {str(df['ts'].max())[:10]}")
         
         st.subheader("📋 Data Preview")
         st.dataframe(df.head(10))
@@ -245,27 +253,32 @@ def show_data_transformation():
     # Transformation options
     st.subheader("⚙️ Transformation Options")
     
+    step_names = {
+        "Process Timestamps": "process_timestamps",
+        "Process Duration": "process_duration",
+        "Clean Duplicates": "clean_duplicates",
+        "Add Session Features": "add_session_features",
+        "Add Artist Features": "add_artist_features",
+        "Add Track Features": "add_track_features"
+    }
+    
     transform_steps = st.multiselect(
         "Select transformations to apply:",
-        [
-            "Process Timestamps",
-            "Process Duration", 
-            "Clean Duplicates",
-            "Add Session Features",
-            "Add Artist Features",
-            "Add Track Features"
-        ],
+        list(step_names),
         default=["Process Timestamps", "Process Duration", "Clean Duplicates"]
     )
     
     if st.button("🚀 Apply Transformations"):
         with st.spinner("Transforming data..."):
             try:
-                transformed_data = transform_data(
-                    st.session_state.spotify_data, 
-                    steps=transform_steps
+                transformer = SpotifyDataTransformer(
+                    st.session_state.spotify_data,
+                    copy=False,
+                    memo=st.session_state.transform_memo
                 )
+                transformed_data = transformer.transform([step_names[step] for step in transform_steps])
                 st.session_state.transformed_data = transformed_data
+                st.session_state.session_table = transformer.sessions
                 st.success("✅ Data transformation completed!")
                 
                 # Show transformation summary
@@ -306,22 +319,30 @@ def show_pattern_analysis():
     # Analysis options
     st.subheader("🔍 Analysis Options")
     
+    analysis_keys = {
+        "Temporal Patterns": "temporal",
+        "Artist Patterns": "artist",
+        "Track Patterns": "track",
+        "Session Patterns": "session",
+        "Sleep Patterns": "sleep",
+        "Data Quality": DATA_QUALITY
+    }
     analysis_types = st.multiselect(
         "Select analysis types:",
-        [
-            "Temporal Patterns",
-            "Artist Patterns", 
-            "Track Patterns",
-            "Session Patterns",
-            "Sleep Patterns"
-        ],
+        list(analysis_keys),
         default=["Temporal Patterns", "Artist Patterns", "Track Patterns"]
     )
     
     if st.button("🔬 Run Analysis"):
         with st.spinner("Analyzing patterns..."):
             try:
-                results = analyze_patterns(st.session_state.transformed_data)
+                results = analyze_patterns(
+                    st.session_state.transformed_data,
+                    copy=False,
+                    analyses=[analysis_keys[name] for name in analysis_types],
+                    workers=len(analysis_types),
+                    sessions=st.session_state.session_table
+                )
                 st.session_state.analysis_results = results
                 st.success("✅ Pattern analysis completed!")
                 
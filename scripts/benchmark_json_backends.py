@@ -0,0 +1,146 @@
+"""
+Benchmark the JSON decoder backends of the data loader.
+
+Generates synthetic endsong files and times decoding and a full file load
+with every installed backend, checking that all of them produce the same
+records.
+
+Usage:
+    python scripts/benchmark_json_backends.py
+    python scripts/benchmark_json_backends.py --rows 100000 1000000 10000000
+"""
+
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from spotify_analysis.core.data_loader import LoadOptions, _read_file_frame
+from spotify_analysis.core.json_backends import available_backends, get_json_backend
+from spotify_analysis.core.schema import ENDSONG_SCHEMA
+
+# Records serialized per write while generating a file
+_WRITE_CHUNK_ROWS = 10_000
+
+
+def synthetic_record(rng: random.Random, ts: datetime) -> dict:
+    """Build one endsong record with realistic field shapes."""
+    podcast = rng.random() < 0.05
+    artist = rng.randrange(500)
+    track = rng.randrange(20_000)
+    return {
+        "ts": ts.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "username": "user",
+        "platform": rng.choice(["iOS 16.1 (iPhone14,5)", "Android OS 13 API 33 (Google, Pixel 7)", "web_player"]),
+        "ms_played": rng.randrange(0, 400_000),
+        "conn_country": rng.choice(["BR", "US", "PT"]),
+        "ip_addr_decrypted": f"10.0.{rng.randrange(256)}.{rng.randrange(256)}",
+        "user_agent_decrypted": "unknown",
+        "master_metadata_track_name": None if podcast else f"Track {track}",
+        "master_metadata_album_artist_name": None if podcast else f"Artist {artist}",
+        "master_metadata_album_album_name": None if podcast else f"Album {artist}-{track % 20}",
+        "spotify_track_uri": None if podcast else f"spotify:track:{track:022d}",
+        "episode_name": f"Episode {track}" if podcast else None,
+        "episode_show_name": f"Show {artist}" if podcast else None,
+        "spotify_episode_uri": f"spotify:episode:{track:022d}" if podcast else None,
+        "reason_start": rng.choice(["trackdone", "clickrow", "fwdbtn"]),
+        "reason_end": rng.choice(["trackdone", "endplay", "fwdbtn"]),
+        "shuffle": rng.random() < 0.5,
+        "skipped": None if rng.random() < 0.3 else rng.random() < 0.2,
+        "offline": False,
+        "offline_timestamp": int(ts.timestamp() * 1000),
+        "incognito_mode": False
+    }
+
+
+def write_endsong_file(path: Path, rows: int, seed: int = 0) -> None:
+    """Write a synthetic endsong file without holding all records in memory."""
+    rng = random.Random(seed)
+    ts = datetime(2015, 1, 1, tzinfo=timezone.utc)
+    
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("[")
+        for start in range(0, rows, _WRITE_CHUNK_ROWS):
+            chunk = []
+            for _ in range(min(_WRITE_CHUNK_ROWS, rows - start)):
+                ts += timedelta(seconds=rng.randrange(30, 600))
+                chunk.append(json.dumps(synthetic_record(rng, ts)))
+            if start:
+                f.write(",\n")
+            f.write(",\n".join(chunk))
+        f.write("]")
+
+
+def best_of(repeat: int, func) -> float:
+    """Return the fastest of ``repeat`` timed calls."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def benchmark(rows: int, repeat: int, work_dir: Path) -> None:
+    """Time every installed backend on a file of ``rows`` records."""
+    path = work_dir / f"endsong_{rows}.json"
+    print(f"\nGenerating {rows:,} records...")
+    write_endsong_file(path, rows)
+    print(f"File size: {path.stat().st_size / 1e6:.1f} MB")
+    
+    reference = None
+    print(f"{'backend':<18}{'decode (s)':>12}{'load (s)':>12}{'rows/s':>14}")
+    for name in available_backends():
+        backend = get_json_backend(name)
+        raw = path.read_bytes()
+        decode_time = best_of(repeat, lambda: backend.loads(raw))
+        del raw
+        
+        options = LoadOptions(schema=ENDSONG_SCHEMA, json_backend=name)
+        load_time = best_of(repeat, lambda: _read_file_frame(path, False, rows, options))
+        print(f"{name:<18}{decode_time:>12.3f}{load_time:>12.3f}{rows / load_time:>14,.0f}")
+        
+        # Compare the typed frames rather than the decoded records, which
+        # would not fit in memory twice for the larger files
+        frame = _read_file_frame(path, False, rows, options)
+        if reference is None:
+            reference = frame
+        else:
+            pd.testing.assert_frame_equal(frame, reference)
+        del frame
+    
+    options = LoadOptions(schema=ENDSONG_SCHEMA)
+    stream_time = best_of(repeat, lambda: _read_file_frame(path, True, 50_000, options))
+    print(f"{'stdlib-streaming':<18}{'-':>12}{stream_time:>12.3f}{rows / stream_time:>14,.0f}")
+    
+    path.unlink()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark JSON decoder backends")
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000],
+                        help="Record counts of the synthetic files (up to 10M is supported)")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per measurement")
+    parser.add_argument("--work-dir", type=str, help="Directory for the generated files")
+    args = parser.parse_args()
+    
+    print(f"Installed backends: {', '.join(available_backends())}")
+    if args.work_dir:
+        for rows in args.rows:
+            benchmark(rows, args.repeat, Path(args.work_dir))
+    else:
+        with tempfile.TemporaryDirectory() as work_dir:
+            for rows in args.rows:
+                benchmark(rows, args.repeat, Path(work_dir))
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
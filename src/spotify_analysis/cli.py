@@ -12,8 +12,8 @@ sys.path.append(str(Path(__file__).parent.parent))
 
 try:
     from spotify_analysis.core.data_loader import load_spotify_data
-    from spotify_analysis.core.data_transformer import transform_data
-    from spotify_analysis.core.pattern_analyzer import analyze_patterns
+    from spotify_analysis.core.data_transformer import TRANSFORM_STEPS, SpotifyDataTransformer, transform_data
+    from spotify_analysis.core.pattern_analyzer import DATA_QUALITY, PATTERN_ANALYSES, analyze_patterns
 except ImportError:
     print("Error: Could not import spotify_analysis modules.")
     print("Make sure you have installed the package correctly.")
@@ -57,7 +57,47 @@ Examples:
         '--path',
         type=str,
         default='Spotify Extended Streaming History',
-        help='Path to directory containing Spotify JSON files'
+        help='Path to directory containing Spotify JSON files, or the export ZIP'
+    )
+    load_parser.add_argument(
+        '--workers',
+        type=int,
+        default=None,
+        help='Number of processes parsing JSON files concurrently'
+    )
+    load_parser.add_argument(
+        '--cache-dir',
+        type=str,
+        default=None,
+        help='Directory for the columnar cache of loaded data (no cache unless given)'
+    )
+    load_parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Always parse the JSON files, bypassing --cache-dir'
+    )
+    load_parser.add_argument(
+        '--store',
+        type=str,
+        default=None,
+        help='Incremental store directory; only new or changed files are ingested'
+    )
+    load_parser.add_argument(
+        '--since',
+        type=str,
+        default=None,
+        help='Only load plays at or after this date/time (UTC)'
+    )
+    load_parser.add_argument(
+        '--until',
+        type=str,
+        default=None,
+        help='Only load plays before this date/time (UTC)'
+    )
+    load_parser.add_argument(
+        '--exclude-podcasts',
+        action='store_true',
+        help='Skip podcast episode plays'
     )
     load_parser.add_argument(
         '--output',
@@ -82,7 +122,8 @@ Examples:
         '--steps',
         nargs='+',
         default=['process_timestamps', 'process_duration', 'clean_duplicates'],
-        help='Transformation steps to apply'
+        choices=list(TRANSFORM_STEPS),
+        help='Transformation steps to apply (required steps are added automatically)'
     )
     
     # Analyze command
@@ -98,6 +139,24 @@ Examples:
         type=str,
         help='Output directory for analysis results'
     )
+    analyze_parser.add_argument(
+        '--analyses',
+        nargs='+',
+        default=None,
+        choices=list(PATTERN_ANALYSES) + [DATA_QUALITY],
+        help='Analyses to run (all of them by default)'
+    )
+    analyze_parser.add_argument(
+        '--workers',
+        type=int,
+        default=None,
+        help='Number of threads running analyses concurrently'
+    )
+    analyze_parser.add_argument(
+        '--approximate',
+        action='store_true',
+        help='Estimate artist and track counts and quantiles with mergeable sketches'
+    )
     
     # Full pipeline command
     full_parser = subparsers.add_parser('full', help='Run full analysis pipeline')
@@ -105,7 +164,52 @@ Examples:
         '--path',
         type=str,
         default='Spotify Extended Streaming History',
-        help='Path to directory containing Spotify JSON files'
+        help='Path to directory containing Spotify JSON files, or the export ZIP'
+    )
+    full_parser.add_argument(
+        '--workers',
+        type=int,
+        default=None,
+        help='Number of workers parsing JSON files, transforming partitions and running analyses concurrently'
+    )
+    full_parser.add_argument(
+        '--cache-dir',
+        type=str,
+        default=None,
+        help='Directory for the columnar cache of loaded data (no cache unless given)'
+    )
+    full_parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Always parse the JSON files, bypassing --cache-dir'
+    )
+    full_parser.add_argument(
+        '--store',
+        type=str,
+        default=None,
+        help='Incremental store directory; only new or changed files are ingested'
+    )
+    full_parser.add_argument(
+        '--since',
+        type=str,
+        default=None,
+        help='Only load plays at or after this date/time (UTC)'
+    )
+    full_parser.add_argument(
+        '--until',
+        type=str,
+        default=None,
+        help='Only load plays before this date/time (UTC)'
+    )
+    full_parser.add_argument(
+        '--exclude-podcasts',
+        action='store_true',
+        help='Skip podcast episode plays'
+    )
+    full_parser.add_argument(
+        '--approximate',
+        action='store_true',
+        help='Estimate artist and track counts and quantiles with sketches, merged from the store\'s parts with --store'
     )
     full_parser.add_argument(
         '--output',
@@ -146,7 +250,15 @@ def run_load(args, logger):
     logger.info(f"Loading data from: {args.path}")
     
     try:
-        data = load_spotify_data(args.path)
+        data = load_spotify_data(
+            args.path,
+            workers=args.workers,
+            cache_dir=None if args.no_cache else args.cache_dir,
+            store_dir=args.store,
+            since=args.since,
+            until=args.until,
+            exclude_podcasts=args.exclude_podcasts
+        )
         logger.info(f"Successfully loaded {len(data)} records")
         
         if args.output:
@@ -192,7 +304,7 @@ def run_analyze(args, logger):
         import pandas as pd
         data = pd.read_csv(args.input)
         
-        results = analyze_patterns(data)
+        results = analyze_patterns(data, analyses=args.analyses, workers=args.workers, approximate=args.approximate)
         logger.info("Analysis completed successfully")
         
         if args.output:
@@ -219,17 +331,40 @@ def run_full_pipeline(args, logger):
     try:
         # Load data
         logger.info("Step 1: Loading data")
-        data = load_spotify_data(args.path)
+        data = load_spotify_data(
+            args.path,
+            workers=args.workers,
+            cache_dir=None if args.no_cache else args.cache_dir,
+            store_dir=args.store,
+            since=args.since,
+            until=args.until,
+            exclude_podcasts=args.exclude_podcasts,
+            with_sketches=args.approximate
+        )
+        sketches = None
+        if args.approximate:
+            data, sketches = data
         logger.info(f"Loaded {len(data)} records")
         
         # Transform data
         logger.info("Step 2: Transforming data")
-        transformed_data = transform_data(data)
+        # The pipeline owns the loaded frame, so steps share it instead of copying
+        record_count = len(data)
+        transformer = SpotifyDataTransformer(data, copy=False)
+        transformed_data = transformer.transform(workers=args.workers)
+        del data
         logger.info(f"Transformed {len(transformed_data)} records")
         
         # Analyze patterns
         logger.info("Step 3: Analyzing patterns")
-        results = analyze_patterns(transformed_data)
+        results = analyze_patterns(
+            transformed_data,
+            copy=False,
+            workers=args.workers,
+            sessions=transformer.sessions,
+            approximate=args.approximate,
+            sketches=sketches
+        )
         logger.info("Analysis completed")
         
         # Save results
@@ -247,7 +382,7 @@ def run_full_pipeline(args, logger):
         # Save summary
         import pandas as pd
         summary = {
-            "total_records": len(data),
+            "total_records": record_count,
             "transformed_records": len(transformed_data),
             "analysis_timestamp": str(pd.Timestamp.now()),
             "output_directory": str(output_path.absolute())
@@ -0,0 +1,234 @@
+"""
+Aggregation cube of Spotify play counts.
+
+This module reduces transformed plays in one vectorized pass to a sparse
+table of cells, one per observed combination of time, sleep, completion,
+artist and track values, holding play counts and additive measures. The
+pattern analyses are answered from the cells instead of rescanning the
+plays for every distribution.
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, Optional, Sequence, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Cube dimensions and the columns they are read from
+CUBE_DIMENSIONS = {
+    'hour': 'hour',
+    'day_of_week': 'day_of_week',
+    'month': 'month',
+    'year': 'year',
+    'is_sleep_time': 'is_sleep_time',
+    'time_period': 'time_period',
+    'completion_bucket': 'completion_percentage',
+    'artist': 'master_metadata_album_artist_name',
+    'track': 'master_metadata_track_name'
+}
+
+# Dimensions with many values keep their labels in order of appearance
+_LARGE_DIMENSIONS = ('artist', 'track')
+
+# Completion buckets as [lower, upper) completion percentage ranges
+COMPLETION_BUCKETS = {
+    "skipped": (-np.inf, 30.0),
+    "partial": (30.0, 90.0),
+    "complete": (90.0, np.inf)
+}
+
+# Measures and the columns they sum; each is kept as a sum and a non-null count
+CUBE_MEASURES = {
+    'minutes': 'minutes_played',
+    'completion': 'completion_percentage'
+}
+
+# Combined cell keys are compacted before they could overflow int64
+_MAX_KEY_SPAN = 1 << 62
+
+
+class AggregationCube:
+    """Sparse cube of play counts and additive measures."""
+    
+    def __init__(self, cells: pd.DataFrame, labels: Dict[str, pd.Index], total_records: int):
+        """
+        Initialize the cube.
+        
+        Args:
+            cells: One row per observed cell, with an integer code column per
+                dimension (-1 for missing values) and the measure columns
+            labels: Values of each dimension, indexed by code
+            total_records: Number of plays the cube was built from
+        """
+        self.cells = cells
+        self.labels = labels
+        self.total_records = total_records
+    
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, dimensions: Optional[Sequence[str]] = None) -> 'AggregationCube':
+        """
+        Build the cube from transformed plays in one pass.
+        
+        Every dimension column is factorized once, the codes are combined
+        into one cell key per play, and the measures are summed per cell
+        with ``np.bincount``. Dimensions whose column is missing are left
+        out of the cube.
+        
+        Args:
+            df: Transformed plays
+            dimensions: Dimensions of CUBE_DIMENSIONS to build (all if None)
+        
+        Returns:
+            The aggregation cube
+        """
+        row_count = len(df)
+        codes: Dict[str, np.ndarray] = {}
+        labels: Dict[str, pd.Index] = {}
+        for dim, column in CUBE_DIMENSIONS.items():
+            if column not in df.columns or (dimensions is not None and dim not in dimensions):
+                continue
+            if dim == 'completion_bucket':
+                codes[dim], labels[dim] = _completion_bucket_codes(df[column])
+                continue
+            dim_codes, uniques = pd.factorize(df[column], sort=dim not in _LARGE_DIMENSIONS)
+            codes[dim] = dim_codes
+            labels[dim] = pd.Index(np.asarray(uniques))
+        
+        # One key per play over all dimensions (missing values map to 0)
+        key = np.zeros(row_count, dtype=np.int64)
+        span = 1
+        for dim, dim_codes in codes.items():
+            radix = len(labels[dim]) + 1
+            if span * radix >= _MAX_KEY_SPAN:
+                key, uniques = pd.factorize(key)
+                span = max(len(uniques), 1)
+            key = key * radix + (dim_codes + 1)
+            span *= radix
+        cell_ids, cell_keys = pd.factorize(key)
+        del key
+        cell_count = len(cell_keys)
+        
+        # Dimension codes of each cell, from its first play
+        first = np.empty(cell_count, dtype=np.int64)
+        first[cell_ids[::-1]] = np.arange(row_count - 1, -1, -1)
+        cells = {dim: dim_codes[first].astype(np.int32) for dim, dim_codes in codes.items()}
+        
+        cells['plays'] = np.bincount(cell_ids, minlength=cell_count).astype(np.int64)
+        for measure, column in CUBE_MEASURES.items():
+            if column not in df.columns:
+                continue
+            values = df[column].to_numpy(dtype=np.float64, na_value=np.nan)
+            present = ~np.isnan(values)
+            cells[f'{measure}_sum'] = np.bincount(cell_ids[present], weights=values[present], minlength=cell_count)
+            cells[f'{measure}_count'] = np.bincount(cell_ids[present], minlength=cell_count).astype(np.int64)
+        
+        logger.info(f"Built aggregation cube with {cell_count} cells from {row_count} plays")
+        return cls(pd.DataFrame(cells), labels, row_count)
+    
+    def has(self, *dims: str) -> bool:
+        """Whether the cube holds all the given dimensions."""
+        return all(dim in self.labels for dim in dims)
+    
+    def totals(self, dims: Sequence[str], measure: str = 'plays',
+               where: Optional[Dict[str, Any]] = None) -> pd.Series:
+        """
+        Sum a measure over the cells, grouped by dimension values.
+        
+        Cells with a missing value in any of ``dims`` are left out, like
+        missing values in ``value_counts``.
+        
+        Args:
+            dims: Dimensions to group by
+            measure: Measure column to sum
+            where: Dimension to value filters the cells must match
+        
+        Returns:
+            Totals indexed by dimension value (a MultiIndex for several
+            dimensions); a single dimension lists every value, including
+            values with no matching cells
+        """
+        cells = self.cells
+        mask = self._where_mask(where)
+        for dim in dims:
+            mask &= cells[dim].to_numpy() >= 0
+        
+        values = cells[measure].to_numpy()[mask]
+        if len(dims) == 1:
+            dim = dims[0]
+            sums = np.bincount(cells[dim].to_numpy()[mask], weights=values, minlength=len(self.labels[dim]))
+            if values.dtype.kind == 'i':
+                sums = sums.astype(np.int64)
+            return pd.Series(sums, index=self.labels[dim], name=measure)
+        
+        grouped = pd.Series(values).groupby([cells[dim].to_numpy()[mask] for dim in dims]).sum()
+        grouped.index = pd.MultiIndex.from_arrays([
+            self.labels[dim].take(grouped.index.get_level_values(level))
+            for level, dim in enumerate(dims)
+        ], names=list(dims))
+        return grouped.rename(measure)
+    
+    def top_values(self, dim: str, by: str) -> pd.Series:
+        """
+        Find the value of one dimension with the most plays for each value of another.
+        
+        Plays are counted into a dense ``dim`` x ``by`` matrix and reduced
+        with a row-wise argmax, like ``idxmax`` over a pivot table: only
+        values of ``by`` that occur at all are candidates, and ties go to
+        the first one in label order.
+        
+        Args:
+            dim: Dimension to find the top value for, e.g. 'artist'
+            by: Dimension whose values are ranked, e.g. 'time_period'
+        
+        Returns:
+            Top value of ``by`` indexed by the values of ``dim`` that have a
+            play with a value of ``by``
+        """
+        dim_codes = self.cells[dim].to_numpy()
+        by_codes = self.cells[by].to_numpy()
+        present = (dim_codes >= 0) & (by_codes >= 0)
+        width = len(self.labels[by])
+        matrix = np.bincount(
+            dim_codes[present].astype(np.int64) * width + by_codes[present],
+            weights=self.cells['plays'].to_numpy()[present],
+            minlength=len(self.labels[dim]) * width
+        ).reshape(-1, width)
+        
+        observed = np.flatnonzero(matrix.sum(axis=0) > 0)
+        rows = np.flatnonzero(matrix.sum(axis=1) > 0)
+        top = observed[matrix[np.ix_(rows, observed)].argmax(axis=1)] if len(observed) else observed
+        return pd.Series(self.labels[by].take(top), index=self.labels[dim].take(rows), name=by)
+    
+    def mean(self, measure: str, where: Optional[Dict[str, Any]] = None) -> float:
+        """
+        Mean of a measured column over the matching plays, skipping missing values.
+        
+        Args:
+            measure: Measure name from CUBE_MEASURES
+            where: Dimension to value filters
+        
+        Returns:
+            The mean, NaN if no matching play has a value
+        """
+        mask = self._where_mask(where)
+        count = self.cells[f'{measure}_count'].to_numpy()[mask].sum()
+        total = self.cells[f'{measure}_sum'].to_numpy()[mask].sum()
+        return total / count if count else np.nan
+    
+    def _where_mask(self, where: Optional[Dict[str, Any]]) -> np.ndarray:
+        """Select the cells matching dimension value filters."""
+        mask = np.ones(len(self.cells), dtype=bool)
+        for dim, value in (where or {}).items():
+            matches = np.flatnonzero(self.labels[dim] == value)
+            mask &= self.cells[dim].to_numpy() == (matches[0] if len(matches) else -2)
+        return mask
+
+
+def _completion_bucket_codes(completion: pd.Series) -> Tuple[np.ndarray, pd.Index]:
+    """Bucket codes of completion percentages (-1 for missing values)."""
+    values = completion.to_numpy(dtype=np.float64, na_value=np.nan)
+    bounds = np.array([upper for _, upper in COMPLETION_BUCKETS.values()][:-1])
+    codes = np.searchsorted(bounds, values, side='right').astype(np.int64)
+    codes[np.isnan(values)] = -1
+    return codes, pd.Index(list(COMPLETION_BUCKETS))
\ No newline at end of file
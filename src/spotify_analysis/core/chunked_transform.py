@@ -0,0 +1,382 @@
+"""
+Out-of-core transformation of Spotify streaming history.
+
+This module transforms time-ordered chunks of plays one at a time and
+writes them to a dataset of Feather part files. Session state is carried
+across chunk edges, and per-session and per-artist/track aggregates are
+finalized in a second pass over the written parts, so memory stays
+bounded by the chunk size rather than the size of the history.
+"""
+
+import os
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Union
+import logging
+
+from .data_transformer import (
+    SESSION_BREAK_SECONDS, TRANSFORM_STEPS, PlayCounter, SpotifyDataTransformer, plan_steps
+)
+from .schema import NATURAL_KEY, concat_frames, hash_rows, key_columns
+
+try:
+    import pyarrow.feather as feather
+except ImportError:  # pragma: no cover - optional dependency
+    feather = None
+
+logger = logging.getLogger(__name__)
+
+# Per-session columns, reduced over whole sessions in the second pass
+SESSION_AGGREGATES = ('session_start', 'session_end', 'plays_in_session', 'total_duration_ms', 'unique_tracks')
+
+# Derived text columns the in-memory transform leaves NaN for plays without
+# a timestamp; Feather reads their missing values back as None
+_NAN_TEXT_COLUMNS = ('day_of_week',)
+
+
+class ChunkedTransformer:
+    """Transforms time-ordered chunks of plays into a columnar sink."""
+    
+    def __init__(self, sink_dir: Union[str, Path], steps: Optional[List[str]] = None, **options: Any):
+        """
+        Initialize the chunked transformer.
+        
+        Args:
+            sink_dir: Directory the transformed part files are written to
+            steps: Transformation steps to apply, scheduled with ``plan_steps``
+                (all if None)
+            **options: Time period, sleep hour and completion threshold
+                options of ``SpotifyDataTransformer``
+        
+        Raises:
+            ImportError: If pyarrow is not installed
+            ValueError: If a step is unknown
+        """
+        if feather is None:
+            raise ImportError("pyarrow is required for the chunked transform")
+        
+        self.sink_dir = Path(sink_dir)
+        self.steps = plan_steps(steps)
+        self.options = options
+        self.parts: List[Path] = []
+        self.stats = {"input_records": 0, "records": 0, "sessions": 0}
+        self._reset()
+    
+    def _reset(self) -> None:
+        """Clear the state carried between chunks."""
+        self._columns: Optional[List[str]] = None
+        self._ts_dtype = None
+        self._last_ts = None
+        # Hashes of the rows at the latest timestamp and of rows without one;
+        # only these can be repeated by a later chunk
+        self._edge_hashes = np.empty(0, dtype=np.uint64)
+        self._missing_hashes = np.empty(0, dtype=np.uint64)
+        self._held_back: List[pd.DataFrame] = []
+        self._sessions: List[pd.DataFrame] = []
+        self._session_dtypes: Dict[str, Any] = {}
+        self._open_session: Optional[Dict[str, Any]] = None
+        self._open_tracks: Set[Any] = set()
+        self._counters: Dict[str, PlayCounter] = {}
+        self._track_key: Optional[str] = None
+    
+    def transform(self, chunks: Iterable[pd.DataFrame]) -> List[Path]:
+        """
+        Transform chunks of plays and write them to the sink.
+        
+        The first pass runs the per-row steps, deduplication and session
+        assignment chunk by chunk and writes each chunk as a part file,
+        keeping only per-session partial aggregates and play counts in
+        memory. The second pass reads the parts back one at a time and
+        fills in the per-session and artist/track aggregate columns. The
+        dataset equals ``transform_data`` over all chunks concatenated.
+        
+        Chunks must be in non-decreasing ``ts`` order when sessions or
+        deduplication are applied, as yielded by
+        ``SpotifyDataLoader.iter_chunks``. Plays without a timestamp may
+        appear in any chunk; with sessions they are written last, where
+        the in-memory transform sorts them.
+        
+        Args:
+            chunks: DataFrames of plays with the same columns
+        
+        Returns:
+            Paths of the written part files, in row order
+        
+        Raises:
+            ValueError: If the sink already holds part files, ts is missing
+                from the chunks or the natural key, or chunks are out of time
+                order
+        """
+        if any(self.sink_dir.glob("part-*.feather")):
+            raise ValueError(f"Sink directory {self.sink_dir} already holds part files")
+        self.sink_dir.mkdir(parents=True, exist_ok=True)
+        
+        self._reset()
+        self.parts = []
+        self.stats = {"input_records": 0, "records": 0, "sessions": 0}
+        
+        for chunk in chunks:
+            self._transform_chunk(chunk)
+        if self._held_back:
+            final = concat_frames(self._held_back)
+            if self._ts_dtype is not None:
+                # Missing timestamps alone would parse as naive; match the parsed parts
+                final['ts'] = pd.Series(pd.NaT, index=final.index, dtype=self._ts_dtype)
+            self._transform_chunk(final, final=True)
+            self._held_back = []
+        
+        self._finalize()
+        logger.info(
+            f"Transformed {self.stats['input_records']} plays into {len(self.parts)} parts "
+            f"({self.stats['records']} after deduplication)"
+        )
+        return list(self.parts)
+    
+    def iter_parts(self, columns: Optional[List[str]] = None) -> Iterable[pd.DataFrame]:
+        """
+        Read the transformed parts one at a time.
+        
+        Args:
+            columns: Columns to read (all if None)
+        
+        Yields:
+            Transformed DataFrames in row order
+        """
+        for path in self.parts:
+            df = feather.read_feather(path, columns=columns)
+            for col in _NAN_TEXT_COLUMNS:
+                if col in df.columns and df[col].dtype == object:
+                    df[col] = df[col].where(df[col].notna(), np.nan)
+            yield df
+    
+    def read(self, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Read the whole transformed dataset.
+        
+        Args:
+            columns: Columns to read (all if None)
+        
+        Returns:
+            DataFrame with every transformed play
+        """
+        parts = list(self.iter_parts(columns))
+        if not parts:
+            return pd.DataFrame(columns=columns)
+        if len(parts) == 1:
+            return parts[0]
+        return concat_frames(parts)
+    
+    def _transform_chunk(self, chunk: pd.DataFrame, final: bool = False) -> None:
+        """Run the first pass over one chunk and write it as a part."""
+        self.stats["input_records"] += len(chunk)
+        sessions = 'add_session_features' in self.steps
+        ordered = sessions or 'clean_duplicates' in self.steps
+        if ordered and 'ts' not in chunk.columns:
+            raise ValueError("Chunked sessions and deduplication need the ts column")
+        
+        transformer = SpotifyDataTransformer(chunk, copy=False, **self.options)
+        for step in self.steps:
+            if TRANSFORM_STEPS[step].row_local:
+                transformer.df = getattr(transformer, step)()
+        df = transformer.df
+        
+        if ordered:
+            missing = df['ts'].isna().to_numpy()
+            if sessions and not final and missing.any():
+                # Transformed again with the final chunk
+                self._held_back.append(chunk[missing].reset_index(drop=True))
+                self.stats["input_records"] -= int(missing.sum())
+                df = df[~missing].reset_index(drop=True)
+                missing = np.zeros(len(df), dtype=bool)
+            
+            present = df['ts'][~missing]
+            if len(present) and self._last_ts is not None and present.min() < self._last_ts:
+                raise ValueError("Chunks must be in non-decreasing ts order")
+            if sessions and not present.is_monotonic_increasing:
+                df = df.sort_values('ts', kind='stable', ignore_index=True)
+        
+        if 'clean_duplicates' in self.steps:
+            df = self._drop_duplicates(df)
+        
+        if sessions:
+            df = self._assign_sessions(df)
+        
+        if self._columns is None:
+            self._columns = list(df.columns)
+        if self._ts_dtype is None and 'ts' in df.columns and df['ts'].notna().any():
+            self._ts_dtype = df['ts'].dtype
+        self._count(df)
+        self.stats["records"] += len(df)
+        
+        if len(df):
+            df = df.drop(columns=[col for col in SESSION_AGGREGATES if col in df.columns] if sessions else [])
+            self._write_part(self.sink_dir / f"part-{len(self.parts):05d}.feather", df)
+            self.parts.append(self.sink_dir / f"part-{len(self.parts):05d}.feather")
+    
+    def _drop_duplicates(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Drop rows whose natural key repeats within the chunk or at the edge of earlier chunks."""
+        columns = key_columns(df, self.options.get('dedup_key') or NATURAL_KEY)
+        if 'ts' not in columns:
+            raise ValueError("Chunked deduplication needs ts in the natural key")
+        hashes = hash_rows(df, columns)
+        missing = df['ts'].isna().to_numpy()
+        keep = ~pd.Series(hashes).duplicated().to_numpy()
+        keep &= ~np.isin(hashes, self._missing_hashes)
+        
+        present = ~missing
+        if present.any():
+            first_ts = df['ts'][present].min()
+            keep &= ~(present & (df['ts'] == first_ts).to_numpy() & np.isin(hashes, self._edge_hashes))
+            
+            # Rows at the latest timestamp may be repeated by the next chunk
+            last_ts = df['ts'][present].max()
+            at_edge = keep & present & (df['ts'] == last_ts).to_numpy()
+            if last_ts == self._last_ts:
+                self._edge_hashes = np.concatenate([self._edge_hashes, hashes[at_edge]])
+            else:
+                self._edge_hashes = hashes[at_edge]
+            self._last_ts = last_ts
+        self._missing_hashes = np.concatenate([self._missing_hashes, hashes[keep & missing]])
+        
+        removed_count = len(df) - int(keep.sum())
+        if removed_count:
+            logger.info(f"Removed {removed_count} duplicate records")
+        return df[keep].reset_index(drop=True)
+    
+    def _assign_sessions(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Assign session columns, continuing the session open at the chunk edge."""
+        open_session = self._open_session
+        if open_session is None:
+            first_gap, first_id = np.nan, 0
+        else:
+            first_gap = (df['ts'].iloc[0] - open_session['session_end']).total_seconds() if len(df) else np.nan
+            first_id = open_session['session_id'] + int(first_gap > SESSION_BREAK_SECONDS)
+        SpotifyDataTransformer._assign_session_features(df, first_gap, first_id)
+        if not len(df):
+            return df
+        
+        ts = df['ts'].dropna()
+        if len(ts):
+            self._last_ts = max(ts.iloc[-1], self._last_ts) if self._last_ts is not None else ts.iloc[-1]
+        
+        # Partial aggregates of the sessions in this chunk, one row per run
+        session_ids = df['session_id'].to_numpy()
+        starts = np.flatnonzero(np.diff(session_ids, prepend=session_ids[0] - 1))
+        columns = ['session_id'] + [col for col in SESSION_AGGREGATES if col in df.columns]
+        runs = df[columns].iloc[starts].reset_index(drop=True)
+        if not self._session_dtypes:
+            self._session_dtypes = runs.dtypes.to_dict()
+        bounds = np.append(starts, len(df))
+        
+        def run_tracks(run: int) -> Set[Any]:
+            if 'unique_tracks' not in df.columns:
+                return set()
+            return set(df['master_metadata_track_name'].iloc[bounds[run]:bounds[run + 1]].dropna().tolist())
+        
+        first_tracks = run_tracks(0)
+        if open_session is not None and runs['session_id'].iloc[0] == open_session['session_id']:
+            # The first run continues the open session
+            merged = dict(runs.iloc[0])
+            merged['session_start'] = open_session['session_start']
+            if pd.isna(merged['session_end']):
+                merged['session_end'] = open_session['session_end']
+            merged['plays_in_session'] += open_session['plays_in_session']
+            if 'total_duration_ms' in merged:
+                merged['total_duration_ms'] += open_session['total_duration_ms']
+            if 'unique_tracks' in merged:
+                first_tracks |= self._open_tracks
+                merged['unique_tracks'] = len(first_tracks)
+            runs = concat_frames([pd.DataFrame([merged]).astype(self._session_dtypes), runs.iloc[1:]])
+        elif open_session is not None:
+            self._sessions.append(pd.DataFrame([open_session]).astype(self._session_dtypes))
+        
+        # Every run but the last is complete
+        if len(runs) > 1:
+            self._sessions.append(runs.iloc[:-1])
+        self._open_session = dict(runs.iloc[-1])
+        self._open_tracks = first_tracks if len(runs) == 1 else run_tracks(len(runs) - 1)
+        return df
+    
+    def _count(self, df: pd.DataFrame) -> None:
+        """Add the plays of a chunk to the artist and track counters."""
+        keys = []
+        if 'add_artist_features' in self.steps and 'master_metadata_album_artist_name' in df.columns:
+            keys.append('master_metadata_album_artist_name')
+        if 'add_track_features' in self.steps and 'master_metadata_track_name' in df.columns:
+            if self._track_key is None:
+                self._track_key = 'spotify_track_uri' if 'spotify_track_uri' in df.columns else 'master_metadata_track_name'
+            keys.append(self._track_key)
+        
+        for key in keys:
+            if key in self._counters:
+                self._counters[key].extend(df[key])
+            else:
+                self._counters[key] = PlayCounter(df[key], keep_codes=False)
+    
+    def _finalize(self) -> None:
+        """Second pass: fill per-session and artist/track aggregates into every part."""
+        sessions = None
+        if self._open_session is not None:
+            self._sessions.append(pd.DataFrame([self._open_session]).astype(self._session_dtypes))
+            self._open_session = None
+        if self._sessions:
+            sessions = concat_frames(self._sessions)
+            self._sessions = []
+            self.stats["sessions"] = len(sessions)
+        
+        columns = list(self._columns or [])
+        artist_counter = self._counters.get('master_metadata_album_artist_name')
+        track_counter = self._counters.get(self._track_key) if self._track_key else None
+        if artist_counter is not None:
+            columns += ['artist_play_count', 'artist_loyalty']
+            top_artist_plays = artist_counter.counts.max() if len(artist_counter.counts) > 0 else 0
+            loyalty = top_artist_plays / self.stats["records"] if self.stats["records"] else np.nan
+        if track_counter is not None:
+            columns += ['track_play_count', 'track_popularity']
+            max_plays = track_counter.counts.max() if len(track_counter.counts) > 0 else 1
+        
+        for path in self.parts:
+            df = feather.read_feather(path)
+            if sessions is not None:
+                # Session ids number the sessions in order, so they index the table
+                session_ids = df['session_id'].to_numpy()
+                for col in sessions.columns.drop('session_id'):
+                    df[col] = sessions[col].array.take(session_ids)
+            if artist_counter is not None:
+                df['artist_play_count'] = artist_counter.gather(df['master_metadata_album_artist_name'])
+                df['artist_loyalty'] = loyalty
+            if track_counter is not None:
+                row_counts = track_counter.gather(df[self._track_key])
+                df['track_play_count'] = row_counts
+                df['track_popularity'] = row_counts / max_plays
+            self._write_part(path, df[columns])
+        
+        self._counters = {}
+    
+    @staticmethod
+    def _write_part(path: Path, df: pd.DataFrame) -> None:
+        """Write a part file atomically."""
+        tmp_path = path.with_name(f"{path.name}.tmp")
+        feather.write_feather(df, tmp_path)
+        os.replace(tmp_path, path)
+
+
+def transform_chunks(chunks: Iterable[pd.DataFrame], sink_dir: Union[str, Path],
+                     steps: Optional[List[str]] = None, **options: Any) -> ChunkedTransformer:
+    """
+    Convenience function to transform chunks of Spotify data out of core.
+    
+    Args:
+        chunks: Time-ordered DataFrames of plays
+        sink_dir: Directory the transformed part files are written to
+        steps: List of transformation steps to apply
+        **options: Options of ``SpotifyDataTransformer``
+    
+    Returns:
+        The chunked transformer, whose ``read`` and ``iter_parts`` return
+        the transformed data
+    """
+    transformer = ChunkedTransformer(sink_dir, steps=steps, **options)
+    transformer.transform(chunks)
+    return transformer
\ No newline at end of file
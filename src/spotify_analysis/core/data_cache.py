@@ -0,0 +1,218 @@
+"""
+Persistent columnar cache for loaded Spotify data.
+
+This module fingerprints source files and keeps loaded DataFrames on disk
+as Arrow IPC (Feather) files, so unchanged exports are not parsed twice.
+"""
+
+import hashlib
+import json
+import os
+import pandas as pd
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Union
+import logging
+
+try:
+    import pyarrow.feather as feather
+except ImportError:  # pragma: no cover - optional dependency
+    feather = None
+
+logger = logging.getLogger(__name__)
+
+# Default location of the cache, relative to the working directory
+DEFAULT_CACHE_DIR = Path(".spotify_cache")
+
+# Bumped whenever the layout of cached frames changes
+CACHE_FORMAT_VERSION = 1
+
+_HASH_CHUNK_BYTES = 1 << 20
+_INDEX_FILE = "file_hashes.json"
+
+
+def hash_file(file_path: Union[str, Path]) -> str:
+    """
+    Hash the contents of a file.
+    
+    Args:
+        file_path: Path to the file
+    
+    Returns:
+        Hex digest of the file contents
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK_BYTES), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DataCache:
+    """Stores loaded DataFrames keyed by a fingerprint of their source files."""
+    
+    def __init__(self, cache_dir: Union[str, Path] = DEFAULT_CACHE_DIR):
+        """
+        Initialize the cache.
+        
+        Args:
+            cache_dir: Directory holding cached frames and the file hash index
+        """
+        self.cache_dir = Path(cache_dir)
+        self._hash_index: Optional[Dict[str, Dict[str, Any]]] = None
+    
+    @property
+    def available(self) -> bool:
+        """Whether the columnar backend (pyarrow) is installed."""
+        return feather is not None
+    
+    def fingerprint(self, file_paths: Iterable[Union[str, Path]]) -> List[Dict[str, Any]]:
+        """
+        Fingerprint source files by path, size, mtime and content hash.
+        
+        Content hashes are remembered per (path, size, mtime), so files that
+        have not been touched since the last load are not read again.
+        
+        Args:
+            file_paths: Source files, in load order
+        
+        Returns:
+            One fingerprint dictionary per file
+        """
+        index = self._load_hash_index()
+        fingerprints = []
+        changed = False
+        
+        for file_path in file_paths:
+            path = Path(file_path).resolve()
+            stat = path.stat()
+            known = index.get(str(path))
+            if known and known["size"] == stat.st_size and known["mtime_ns"] == stat.st_mtime_ns:
+                content_hash = known["hash"]
+            else:
+                content_hash = hash_file(path)
+                index[str(path)] = {
+                    "size": stat.st_size,
+                    "mtime_ns": stat.st_mtime_ns,
+                    "hash": content_hash
+                }
+                changed = True
+            fingerprints.append({
+                "path": str(path),
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "hash": content_hash
+            })
+        
+        if changed:
+            self._save_hash_index()
+        return fingerprints
+    
+    def key(self, fingerprints: List[Dict[str, Any]], options: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Build the cache key for a set of source files.
+        
+        The key depends on file contents and load options only, so touching
+        or re-extracting a file without changing it keeps the cache warm.
+        The source paths form a prefix that groups entries of one dataset,
+        followed by the file contents, so entries of the same files loaded
+        with different options sit side by side.
+        
+        Args:
+            fingerprints: Output of ``fingerprint``
+            options: Load options that change the resulting frame
+        
+        Returns:
+            Cache key of the form ``<source>-<contents>-<options>``
+        """
+        source = hashlib.blake2b(
+            json.dumps([fp["path"] for fp in fingerprints]).encode(), digest_size=8
+        ).hexdigest()
+        contents = hashlib.blake2b(
+            json.dumps({
+                "version": CACHE_FORMAT_VERSION,
+                "files": [fp["hash"] for fp in fingerprints]
+            }, sort_keys=True).encode(),
+            digest_size=16
+        ).hexdigest()
+        options = hashlib.blake2b(
+            json.dumps(options or {}, sort_keys=True, default=str).encode(), digest_size=8
+        ).hexdigest()
+        return f"{source}-{contents}-{options}"
+    
+    def read(self, key: str) -> Optional[pd.DataFrame]:
+        """
+        Read a cached frame.
+        
+        The Feather file is memory-mapped, so numeric columns are read
+        without an intermediate copy.
+        
+        Args:
+            key: Cache key
+        
+        Returns:
+            Cached DataFrame, or None on a miss
+        """
+        path = self._entry_path(key)
+        if not self.available or not path.exists():
+            return None
+        
+        try:
+            table = feather.read_table(path, memory_map=True)
+            return table.to_pandas()
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable cache entry {path.name}: {e}")
+            return None
+    
+    def write(self, key: str, df: pd.DataFrame) -> bool:
+        """
+        Store a frame, replacing entries of the same source files whose
+        contents have since changed; entries of other load options of the
+        current contents are kept.
+        
+        Args:
+            key: Cache key
+            df: DataFrame to store
+        
+        Returns:
+            True if the frame was written
+        """
+        if not self.available:
+            return False
+        
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self._entry_path(key)
+        tmp_path = path.with_suffix(".tmp")
+        try:
+            feather.write_feather(df, tmp_path)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"Could not cache loaded data: {e}")
+            tmp_path.unlink(missing_ok=True)
+            return False
+        
+        source, contents = key.split("-")[:2]
+        for stale in self.cache_dir.glob(f"{source}-*.feather"):
+            if not stale.name.startswith(f"{source}-{contents}-"):
+                stale.unlink(missing_ok=True)
+        return True
+    
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.feather"
+    
+    def _load_hash_index(self) -> Dict[str, Dict[str, Any]]:
+        if self._hash_index is None:
+            index_path = self.cache_dir / _INDEX_FILE
+            try:
+                with open(index_path, 'r', encoding='utf-8') as f:
+                    self._hash_index = json.load(f)
+            except (OSError, ValueError):
+                self._hash_index = {}
+        return self._hash_index
+    
+    def _save_hash_index(self) -> None:
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        index_path = self.cache_dir / _INDEX_FILE
+        tmp_path = index_path.with_suffix(".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._hash_index, f)
+        os.replace(tmp_path, index_path)
\ No newline at end of file
@@ -4,34 +4,554 @@ Data loading functionality for Spotify streaming history.
 This module handles loading and validation of Spotify data files.
 """
 
+import io
 import json
+import re
+import tempfile
+import zipfile
+import numpy as np
 import pandas as pd
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import asdict, dataclass, replace
+from functools import partial
 from pathlib import Path
-from typing import List, Dict, Optional, Union
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, TextIO, Tuple, Union
 import logging
 
+from .data_cache import DataCache
+from .data_store import IncrementalDataStore
+from .json_backends import get_json_backend
+from .schema import ENDSONG_SCHEMA, apply_schema, concat_column, null_column
+from .sketches import SKETCHED_COLUMNS, HyperLogLog, PlaySketches, TDigest
+from .sorted_runs import merge_sorted_runs, spill_sorted_runs
+
 logger = logging.getLogger(__name__)
 
+# Rows accumulated per column buffer before it is converted to typed arrays
+DEFAULT_BATCH_ROWS = 50_000
+
+# Characters read from disk per refill of the incremental decoder
+_READ_CHUNK_CHARS = 1 << 20
+
+# Streaming history members of a Spotify export archive (other account data is skipped)
+_HISTORY_MEMBER_PATTERN = re.compile(r'(streaming_?history|endsong)[^/]*\.json$', re.IGNORECASE)
+
+# Pool types accepted by the ``executor`` option of the multi-file loaders
+_EXECUTORS = {
+    "process": ProcessPoolExecutor,
+    "thread": ThreadPoolExecutor,
+}
+
+
+@dataclass(frozen=True)
+class LoadOptions:
+    """
+    Per-record options applied while files are parsed.
+    
+    Attributes:
+        schema: Column dtypes applied to each batch (None keeps inferred dtypes)
+        columns: Columns to keep (all if None)
+        since: Keep plays at or after this UTC timestamp
+        until: Keep plays strictly before this UTC timestamp
+        exclude_podcasts: Drop podcast episode plays
+        json_backend: Decoder for whole files (None picks the fastest installed)
+    """
+    schema: Optional[Dict[str, str]] = None
+    columns: Optional[tuple] = None
+    since: Optional[pd.Timestamp] = None
+    until: Optional[pd.Timestamp] = None
+    exclude_podcasts: bool = False
+    json_backend: Optional[str] = None
+    
+    @property
+    def has_time_window(self) -> bool:
+        return self.since is not None or self.until is not None
+    
+    def cache_token(self) -> Dict[str, Any]:
+        """Return the options in a form suitable for a cache key."""
+        # Every backend decodes to the same records, so it does not change the frame
+        token = asdict(self)
+        del token['json_backend']
+        return {key: value for key, value in token.items() if value is not None}
+    
+    def unfiltered(self) -> 'LoadOptions':
+        """Return these options without the projection and row filters."""
+        return replace(self, columns=None, since=None, until=None, exclude_podcasts=False)
+
+
+def _to_utc_timestamp(value: Optional[Union[str, pd.Timestamp]]) -> Optional[pd.Timestamp]:
+    """Normalize a time bound to a UTC timestamp."""
+    if value is None:
+        return None
+    timestamp = pd.Timestamp(value)
+    if timestamp.tzinfo is None:
+        return timestamp.tz_localize('UTC')
+    return timestamp.tz_convert('UTC')
+
+
+def iter_json_records(stream: TextIO, chunk_chars: int = _READ_CHUNK_CHARS) -> Iterator[Dict[str, Any]]:
+    """
+    Incrementally decode the records of a JSON array from a text stream.
+    
+    Only one read chunk and the record being decoded are held in memory, so
+    the first records are available before the whole file has been read. A
+    document holding a single object yields that object.
+    
+    Args:
+        stream: Open text stream positioned at the start of the document
+        chunk_chars: Number of characters to read per refill
+    
+    Yields:
+        Decoded records in file order
+    
+    Raises:
+        json.JSONDecodeError: If the document is malformed or truncated
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    pos = 0
+    eof = False
+    
+    def refill() -> bool:
+        nonlocal buffer, pos, eof
+        chunk = stream.read(chunk_chars)
+        if not chunk:
+            eof = True
+            return False
+        buffer = buffer[pos:] + chunk
+        pos = 0
+        return True
+    
+    def skip_whitespace() -> bool:
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n":
+                pos += 1
+            if pos < len(buffer):
+                return True
+            if not refill():
+                return False
+    
+    if not skip_whitespace():
+        return
+    
+    if buffer[pos] != "[":
+        # Not an array: the document is a single record
+        while refill():
+            pass
+        yield decoder.decode(buffer[pos:])
+        return
+    pos += 1
+    
+    while True:
+        if not skip_whitespace():
+            raise json.JSONDecodeError("Unterminated array", buffer, pos)
+        char = buffer[pos]
+        if char == "]":
+            return
+        if char == ",":
+            pos += 1
+            continue
+        try:
+            record, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            # The record straddles the end of the buffer
+            if eof or not refill():
+                raise
+            continue
+        if end == len(buffer) and not eof and refill():
+            # A scalar may continue past the buffer; decode again with more input
+            continue
+        pos = end
+        yield record
+
+
+class _ColumnBuffer:
+    """Accumulates records column-wise and emits them as typed column batches."""
+    
+    def __init__(self):
+        self._columns: Dict[str, List[Any]] = {}
+        self._rows = 0
+    
+    def __len__(self) -> int:
+        return self._rows
+    
+    def append(self, record: Dict[str, Any]) -> None:
+        """Append one record, padding columns it does not have with None."""
+        for key, value in record.items():
+            column = self._columns.get(key)
+            if column is None:
+                column = self._columns[key] = [None] * self._rows
+            column.append(value)
+        self._rows += 1
+        
+        if len(record) != len(self._columns):
+            for column in self._columns.values():
+                if len(column) < self._rows:
+                    column.append(None)
+    
+    def flush(self) -> pd.DataFrame:
+        """
+        Convert the buffered rows to a DataFrame and reset the buffer.
+        
+        Returns:
+            DataFrame with one unconsolidated block per column
+        """
+        data = {}
+        for name in list(self._columns):
+            # Release each list as soon as its typed array exists
+            data[name] = pd.Series(self._columns.pop(name))
+        rows = self._rows
+        self._rows = 0
+        return pd.DataFrame(data, index=pd.RangeIndex(rows), copy=False)
+
+
+def _project_records(records: Iterable[Dict[str, Any]], options: LoadOptions) -> Iterator[Dict[str, Any]]:
+    """Drop podcast records and unrequested fields before they are buffered."""
+    keep = None
+    if options.columns is not None:
+        # ts is needed to apply the time window even if it is not requested
+        keep = set(options.columns) | ({'ts'} if options.has_time_window else set())
+    
+    for record in records:
+        if options.exclude_podcasts and record.get('spotify_episode_uri') is not None:
+            continue
+        if keep is not None:
+            record = {key: value for key, value in record.items() if key in keep}
+        yield record
+
+
+def _finish_batch(frame: pd.DataFrame, options: LoadOptions) -> pd.DataFrame:
+    """Apply the time window, schema and column order to a fresh batch."""
+    if options.has_time_window and 'ts' in frame.columns:
+        ts = pd.to_datetime(frame['ts'], utc=True, format='ISO8601')
+        mask = pd.Series(True, index=frame.index)
+        if options.since is not None:
+            mask &= ts >= options.since
+        if options.until is not None:
+            mask &= ts < options.until
+        if not mask.all():
+            frame = frame[mask].reset_index(drop=True)
+            ts = ts[mask].reset_index(drop=True)
+        if options.schema and options.schema.get('ts', '').startswith('datetime64'):
+            # Reuse the parsed timestamps instead of parsing again
+            frame['ts'] = ts
+    
+    if options.schema:
+        apply_schema(frame, options.schema)
+    
+    if options.columns is not None:
+        wanted = [col for col in options.columns if col in frame.columns]
+        if list(frame.columns) != wanted:
+            frame = frame[wanted]
+    return frame
+
+
+def _filter_frame(frame: pd.DataFrame, options: LoadOptions) -> pd.DataFrame:
+    """Apply podcast exclusion, the time window and projection to parsed plays."""
+    if options.exclude_podcasts and 'spotify_episode_uri' in frame.columns:
+        frame = frame[frame['spotify_episode_uri'].isna()].reset_index(drop=True)
+    # The schema was applied when the plays were parsed
+    return _finish_batch(frame, replace(options, schema=None))
+
+
+def _iter_record_batches(records: Iterable[Dict[str, Any]], batch_rows: int,
+                         options: Optional[LoadOptions] = None) -> Iterator[pd.DataFrame]:
+    """Group records into typed DataFrames of at most ``batch_rows`` rows."""
+    options = options or LoadOptions()
+    buffer = _ColumnBuffer()
+    for record in _project_records(records, options):
+        buffer.append(record)
+        if len(buffer) >= batch_rows:
+            yield _finish_batch(buffer.flush(), options)
+    if len(buffer):
+        yield _finish_batch(buffer.flush(), options)
+
+
+def _concat_frames(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Concatenate batch frames column by column.
+    
+    Each column is released from its source batches once it has been
+    concatenated, so peak memory stays close to the size of the result
+    instead of twice that. The list and its frames are consumed.
+    
+    Args:
+        frames: Unconsolidated batch frames, as built by ``_ColumnBuffer``
+    
+    Returns:
+        Single DataFrame with a fresh RangeIndex
+    """
+    frames = [frame for frame in frames if len(frame)]
+    if not frames:
+        return pd.DataFrame()
+    if len(frames) == 1:
+        return frames.pop()
+    
+    columns = list(dict.fromkeys(col for frame in frames for col in frame.columns))
+    data = {}
+    for col in columns:
+        dtype = next(frame[col].dtype for frame in frames if col in frame.columns)
+        pieces = [
+            frame.pop(col) if col in frame.columns else null_column(dtype, len(frame))
+            for frame in frames
+        ]
+        data[col] = concat_column(pieces)
+        del pieces
+    frames.clear()
+    return pd.DataFrame(data, copy=False)
+
+
+def _read_json_file(file_path: Union[str, Path], json_backend: Optional[str] = None) -> List[Dict]:
+    """Read a whole JSON file as a list of records."""
+    file_path = Path(file_path)
+    
+    if not file_path.exists():
+        raise FileNotFoundError(f"File not found: {file_path}")
+    
+    with open(file_path, 'rb') as f:
+        data = get_json_backend(json_backend).loads(f.read())
+    
+    if isinstance(data, list):
+        return data
+    else:
+        return [data]
+
+
+def _stream_json_file(file_path: Union[str, Path], batch_rows: int,
+                      options: Optional[LoadOptions] = None) -> Iterator[pd.DataFrame]:
+    """Decode a JSON file incrementally into DataFrame batches."""
+    file_path = Path(file_path)
+    
+    if not file_path.exists():
+        raise FileNotFoundError(f"File not found: {file_path}")
+    
+    with open(file_path, 'r', encoding='utf-8') as f:
+        yield from _iter_record_batches(iter_json_records(f), batch_rows, options)
+
+
+def _read_stream_frame(stream: BinaryIO, streaming: bool, batch_rows: int,
+                       options: Optional[LoadOptions] = None) -> pd.DataFrame:
+    """
+    Load one JSON document from an open binary stream into a DataFrame.
+    
+    Whole documents go through the configured JSON backend; streaming mode
+    always uses the incremental stdlib decoder, since the fast decoders
+    need the complete document in memory.
+    """
+    if streaming:
+        records = iter_json_records(io.TextIOWrapper(stream, encoding='utf-8'))
+        batches = list(_iter_record_batches(records, batch_rows, options))
+    else:
+        backend = get_json_backend(options.json_backend if options else None)
+        data = backend.loads(stream.read())
+        records = data if isinstance(data, list) else [data]
+        batches = list(_iter_record_batches(records, max(len(records), 1), options))
+    return _concat_frames(batches)
+
+
+def _read_file_frame(file_path: Union[str, Path], streaming: bool, batch_rows: int,
+                     options: Optional[LoadOptions] = None) -> pd.DataFrame:
+    """
+    Load a single JSON file into a DataFrame.
+    
+    Kept at module level so it can be shipped to worker processes.
+    """
+    file_path = Path(file_path)
+    
+    if not file_path.exists():
+        raise FileNotFoundError(f"File not found: {file_path}")
+    
+    with open(file_path, 'rb') as f:
+        return _read_stream_frame(f, streaming, batch_rows, options)
+
+
+def _read_zip_member_frame(zip_path: Union[str, Path], member: str, streaming: bool, batch_rows: int,
+                           options: Optional[LoadOptions] = None) -> pd.DataFrame:
+    """
+    Load a JSON member of a ZIP archive without extracting it to disk.
+    
+    Each call opens its own handle on the archive, so members can be
+    decompressed concurrently by different workers.
+    """
+    with zipfile.ZipFile(zip_path) as archive, archive.open(member) as raw:
+        return _read_stream_frame(raw, streaming, batch_rows, options)
+
+
+def _stream_zip_member(zip_path: Union[str, Path], member: str, batch_rows: int,
+                       options: Optional[LoadOptions] = None) -> Iterator[pd.DataFrame]:
+    """Decode a JSON member of a ZIP archive incrementally into DataFrame batches."""
+    with zipfile.ZipFile(zip_path) as archive, archive.open(member) as raw:
+        stream = io.TextIOWrapper(raw, encoding='utf-8')
+        yield from _iter_record_batches(iter_json_records(stream), batch_rows, options)
+
+
+def is_history_member(name: str) -> bool:
+    """Return True if an archive member holds streaming history records."""
+    return bool(_HISTORY_MEMBER_PATTERN.search(name))
+
+
+def _parse_timestamps(series: pd.Series) -> tuple:
+    """Return parsed timestamps and the number of values that failed to parse."""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series, 0
+    try:
+        parsed = pd.to_datetime(series, utc=True, errors='coerce', format='ISO8601')
+    except (TypeError, ValueError):
+        return pd.Series(pd.NaT, index=series.index, dtype='datetime64[ns, UTC]'), int(series.notna().sum())
+    return parsed, int((parsed.isna() & series.notna()).sum())
+
+
+def _profile_column(series: pd.Series, scale: float) -> Dict[str, Any]:
+    """Compute null count, distinct count and range of one column."""
+    stats = {
+        "dtype": str(series.dtype),
+        "nulls": int(round(series.isna().sum() * scale)),
+        "unique": None,
+        "min": None,
+        "max": None
+    }
+    try:
+        stats["unique"] = int(series.nunique())
+    except TypeError:
+        # Unhashable values such as nested lists
+        pass
+    
+    ordered = (
+        pd.api.types.is_datetime64_any_dtype(series)
+        or (pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series))
+    )
+    if ordered and series.notna().any():
+        stats["min"] = series.min()
+        stats["max"] = series.max()
+    return stats
+
+
+def profile_data(df: pd.DataFrame, columns: Optional[Sequence[str]] = None,
+                 sample_rows: Optional[int] = None, random_state: int = 0) -> Dict[str, Any]:
+    """
+    Profile a frame in one pass without copying it.
+    
+    Each column is summarized with vectorized reductions. A ``ts`` column
+    that is already datetime is used as is; otherwise it is parsed once and
+    the number of unparseable values is reported.
+    
+    With ``sample_rows``, frames larger than that are profiled on a random
+    sample of rows: null counts are scaled to the full frame, distinct
+    counts are those seen in the sample (a lower bound) and ranges are
+    those of the sample.
+    
+    Args:
+        df: DataFrame to profile
+        columns: Columns to profile (all if None)
+        sample_rows: Profile at most this many rows (exact if None)
+        random_state: Seed of the row sample
+    
+    Returns:
+        Dictionary with the record counts, per-column statistics and the
+        timestamp summary (None without a ``ts`` column)
+    """
+    total = len(df)
+    if columns is None:
+        columns = list(df.columns)
+    else:
+        columns = [col for col in columns if col in df.columns]
+    
+    sampled = sample_rows is not None and total > sample_rows
+    if sampled:
+        rng = np.random.default_rng(random_state)
+        positions = np.sort(rng.choice(total, size=sample_rows, replace=False))
+        scale = total / sample_rows
+    else:
+        positions = None
+        scale = 1.0
+    
+    profile = {
+        "total_records": total,
+        "profiled_records": sample_rows if sampled else total,
+        "sampled": sampled,
+        "columns": {},
+        "timestamps": None
+    }
+    
+    for col in columns:
+        series = df[col] if positions is None else df[col].take(positions)
+        if col == 'ts':
+            series, invalid_count = _parse_timestamps(series)
+            profile["timestamps"] = {
+                "valid": invalid_count == 0,
+                "invalid": int(round(invalid_count * scale)),
+                "start": series.min() if series.notna().any() else None,
+                "end": series.max() if series.notna().any() else None
+            }
+        profile["columns"][col] = _profile_column(series, scale)
+    
+    return profile
+
 
 class SpotifyDataLoader:
     """Handles loading and validation of Spotify streaming history data."""
     
-    def __init__(self, data_path: Optional[Union[str, Path]] = None):
+    def __init__(self, data_path: Optional[Union[str, Path]] = None,
+                 cache_dir: Optional[Union[str, Path]] = None,
+                 schema: Optional[Dict[str, str]] = ENDSONG_SCHEMA,
+                 columns: Optional[Sequence[str]] = None,
+                 since: Optional[Union[str, pd.Timestamp]] = None,
+                 until: Optional[Union[str, pd.Timestamp]] = None,
+                 exclude_podcasts: bool = False,
+                 json_backend: Optional[str] = None):
         """
         Initialize the data loader.
         
+        Projection and filters are applied while records are parsed, so
+        unwanted fields and plays never reach the loaded DataFrame.
+        
         Args:
             data_path: Path to the directory containing Spotify data files
+            cache_dir: Directory for the columnar cache of loaded data
+                (caching is disabled if None)
+            schema: Column dtypes applied to each batch while loading
+                (None keeps the dtypes pandas infers)
+            columns: Columns to load (all if None)
+            since: Only load plays at or after this time (naive times are UTC)
+            until: Only load plays before this time (naive times are UTC)
+            exclude_podcasts: Skip podcast episode plays
+            json_backend: JSON decoder ('orjson', 'simdjson' or 'stdlib');
+                None picks the fastest one installed
+        
+        Raises:
+            ValueError: If the JSON backend is unknown
+            ImportError: If the requested JSON backend is not installed
         """
         self.data_path = Path(data_path) if data_path else Path("Spotify Extended Streaming History")
         self.data = None
+        self.sketches: Optional[PlaySketches] = None
+        self.cache = DataCache(cache_dir) if cache_dir else None
+        self.options = LoadOptions(
+            schema=schema,
+            columns=tuple(columns) if columns is not None else None,
+            since=_to_utc_timestamp(since),
+            until=_to_utc_timestamp(until),
+            exclude_podcasts=exclude_podcasts,
+            json_backend=get_json_backend(json_backend).name
+        )
         
-    def load_from_directory(self, directory_path: Optional[Union[str, Path]] = None) -> pd.DataFrame:
+    def load_from_directory(self, directory_path: Optional[Union[str, Path]] = None,
+                            streaming: bool = False,
+                            batch_rows: int = DEFAULT_BATCH_ROWS,
+                            workers: Optional[int] = None,
+                            executor: str = "process") -> pd.DataFrame:
         """
         Load all JSON files from a directory.
         
         Args:
             directory_path: Path to directory containing JSON files
+            streaming: Decode records incrementally into column buffers instead
+                of materializing each file as a list of dicts
+            batch_rows: Rows per column batch in streaming mode
+            workers: Number of files parsed concurrently (None or 1 parses
+                sequentially)
+            executor: Pool used when workers > 1, "process" or "thread"
             
         Returns:
             DataFrame containing all loaded data
@@ -46,6 +566,9 @@ class SpotifyDataLoader:
         if not self.data_path.exists():
             raise FileNotFoundError(f"Data directory not found: {self.data_path}")
             
+        if self.data_path.is_file() and zipfile.is_zipfile(self.data_path):
+            return self.load_from_zip(self.data_path, streaming, batch_rows, workers, executor)
+        
         json_files = list(self.data_path.glob("*.json"))
         
         if not json_files:
@@ -53,53 +576,332 @@ class SpotifyDataLoader:
             
         logger.info(f"Found {len(json_files)} JSON files to load")
         
-        all_data = []
-        for file_path in json_files:
-            try:
-                data = self._load_json_file(file_path)
-                all_data.extend(data)
-                logger.info(f"Loaded {len(data)} records from {file_path.name}")
-            except Exception as e:
-                logger.error(f"Error loading {file_path}: {e}")
-                continue
-                
-        if not all_data:
-            raise ValueError("No data was successfully loaded")
-            
-        self.data = pd.DataFrame(all_data)
-        logger.info(f"Successfully loaded {len(self.data)} total records")
-        
-        return self.data
+        # Sorted so that concatenation order does not depend on the filesystem
+        return self._load_paths(sorted(json_files), streaming, batch_rows, workers, executor)
     
-    def load_from_files(self, file_paths: List[Union[str, Path]]) -> pd.DataFrame:
+    def load_from_files(self, file_paths: List[Union[str, Path]],
+                        streaming: bool = False,
+                        batch_rows: int = DEFAULT_BATCH_ROWS,
+                        workers: Optional[int] = None,
+                        executor: str = "process") -> pd.DataFrame:
         """
         Load data from specific file paths.
         
         Args:
             file_paths: List of paths to JSON files
+            streaming: Decode records incrementally into column buffers instead
+                of materializing each file as a list of dicts
+            batch_rows: Rows per column batch in streaming mode
+            workers: Number of files parsed concurrently (None or 1 parses
+                sequentially)
+            executor: Pool used when workers > 1, "process" or "thread"
             
         Returns:
             DataFrame containing all loaded data
         """
-        all_data = []
+        return self._load_paths(file_paths, streaming, batch_rows, workers, executor)
+    
+    def load_from_zip(self, zip_path: Optional[Union[str, Path]] = None,
+                      streaming: bool = False,
+                      batch_rows: int = DEFAULT_BATCH_ROWS,
+                      workers: Optional[int] = None,
+                      executor: str = "process") -> pd.DataFrame:
+        """
+        Load streaming history straight from a Spotify export archive.
+        
+        Members are read and decompressed in memory, never extracted to
+        disk. With more than one worker, members are decompressed and
+        parsed concurrently.
+        
+        Args:
+            zip_path: Path to the export archive (uses data_path if None)
+            streaming: Decode records incrementally into column buffers
+            batch_rows: Rows per column batch in streaming mode
+            workers: Number of members parsed concurrently
+            executor: Pool used when workers > 1, "process" or "thread"
+        
+        Returns:
+            DataFrame containing all loaded data
+        
+        Raises:
+            FileNotFoundError: If the archive doesn't exist
+            ValueError: If the archive holds no streaming history files
+        """
+        zip_path = Path(zip_path) if zip_path else self.data_path
+        
+        if not zip_path.exists():
+            raise FileNotFoundError(f"Archive not found: {zip_path}")
+        
+        with zipfile.ZipFile(zip_path) as archive:
+            members = sorted(name for name in archive.namelist() if is_history_member(name))
+        
+        if not members:
+            raise ValueError(f"No streaming history JSON files found in {zip_path}")
+        
+        logger.info(f"Found {len(members)} streaming history files in {zip_path.name}")
+        
+        return self._load_paths(members, streaming, batch_rows, workers, executor, archive=zip_path)
+    
+    def load_incremental(self, store_dir: Union[str, Path],
+                         directory_path: Optional[Union[str, Path]] = None,
+                         streaming: bool = False,
+                         batch_rows: int = DEFAULT_BATCH_ROWS,
+                         workers: Optional[int] = None,
+                         executor: str = "process") -> pd.DataFrame:
+        """
+        Ingest only new or changed files of a directory into a persistent store.
+        
+        Files already listed in the store's manifest are skipped, the rest are
+        parsed and their plays appended after deduplication on the natural key
+        (``ts``, ``spotify_track_uri``, ``ms_played``). Refresh cost therefore
+        follows the size of the new export rather than the full history.
+        
+        The store always holds every column and play of the ingested files;
+        the loader's projection, time window and podcast exclusion are
+        applied to the plays read back, so later loads with other options
+        see the full history.
+        
+        Args:
+            store_dir: Directory of the incremental store
+            directory_path: Path to directory containing JSON files
+            streaming: Decode records incrementally into column buffers
+            batch_rows: Rows per column batch in streaming mode
+            workers: Number of files parsed concurrently
+            executor: Pool used when workers > 1, "process" or "thread"
+        
+        Returns:
+            DataFrame containing every stored play that passes the load options
+        
+        Raises:
+            FileNotFoundError: If directory doesn't exist
+        """
+        if directory_path:
+            self.data_path = Path(directory_path)
+        
+        if not self.data_path.exists():
+            raise FileNotFoundError(f"Data directory not found: {self.data_path}")
+        
+        if not self.data_path.is_dir():
+            raise ValueError(f"Incremental loading needs an extracted export directory: {self.data_path}")
+        
+        store = IncrementalDataStore(store_dir)
+        pending = store.pending_files(sorted(self.data_path.glob("*.json")))
+        logger.info(f"Found {len(pending)} new or changed JSON files to ingest")
+        
+        if pending:
+            try:
+                new_data = self._load_paths(pending, streaming, batch_rows, workers, executor,
+                                            options=self.options.unfiltered())
+            except ValueError as e:
+                # Nothing parseable in the delta; the stored data is still valid
+                logger.warning(f"No new data ingested: {e}")
+            else:
+                store.append(new_data, pending)
+        
+        self.data = _filter_frame(store.read(), self.options)
+        logger.info(f"Store holds {len(self.data)} total records")
+        
+        return self.data
+    
+    def load_store_sketches(self, store_dir: Union[str, Path]) -> Optional[PlaySketches]:
+        """
+        Merge the per-part sketches of an incremental store.
+        
+        The sketches cover every stored play, so they only describe the
+        loaded plays when no time window or podcast exclusion is set;
+        column projection does not change which plays are loaded.
+        
+        Args:
+            store_dir: Directory of the incremental store
+        
+        Returns:
+            Sketches of the stored plays, also kept in ``sketches``, or None
+            if the load options filter plays
+        """
+        if self.options.has_time_window or self.options.exclude_podcasts:
+            logger.info("Load options filter plays, so the store's sketches do not apply")
+            self.sketches = None
+        else:
+            self.sketches = IncrementalDataStore(store_dir).sketches()
+        return self.sketches
+    
+    def iter_record_batches(self, file_path: Union[str, Path],
+                            batch_rows: int = DEFAULT_BATCH_ROWS) -> Iterator[pd.DataFrame]:
+        """
+        Stream a single JSON file as DataFrame batches.
+        
+        Records are decoded incrementally, so the first batch is yielded
+        before the rest of the file has been read.
+        
+        Args:
+            file_path: Path to JSON file
+            batch_rows: Maximum number of rows per batch
+        
+        Yields:
+            DataFrames of at most ``batch_rows`` rows, in file order
+        """
+        return _stream_json_file(file_path, batch_rows, self.options)
+    
+    def iter_chunks(self, chunk_rows: int = DEFAULT_BATCH_ROWS,
+                    directory_path: Optional[Union[str, Path]] = None,
+                    spill_dir: Optional[Union[str, Path]] = None) -> Iterator[pd.DataFrame]:
+        """
+        Iterate over the whole history in time-ordered chunks.
+        
+        Files are decoded incrementally and sorted by ``ts`` with an external
+        merge sort: sorted runs are spilled to a temporary directory and
+        merged back one block per run at a time. Memory therefore stays
+        bounded by the chunk size and the number of runs, not by the size of
+        the history. An export that is already in time order forms a single
+        run.
+        
+        Args:
+            chunk_rows: Rows per yielded chunk (the last one may be smaller)
+            directory_path: Directory or export ZIP to read (uses data_path if None)
+            spill_dir: Parent directory for the temporary run files
+        
+        Yields:
+            DataFrames of at most ``chunk_rows`` rows in non-decreasing ``ts`` order
+        
+        Raises:
+            FileNotFoundError: If the data path doesn't exist
+            ValueError: If the column projection excludes ``ts``
+        """
+        if self.options.columns is not None and 'ts' not in self.options.columns:
+            raise ValueError("Chunked iteration needs the ts column")
+        
+        if directory_path:
+            self.data_path = Path(directory_path)
+        
+        if not self.data_path.exists():
+            raise FileNotFoundError(f"Data directory not found: {self.data_path}")
+        
+        with tempfile.TemporaryDirectory(prefix="spotify-chunks-", dir=spill_dir) as tmp_dir:
+            runs = spill_sorted_runs(
+                self._iter_source_batches(chunk_rows),
+                Path(tmp_dir),
+                block_rows=max(1, chunk_rows // 8)
+            )
+            yield from merge_sorted_runs(runs, chunk_rows)
+    
+    def _iter_source_batches(self, batch_rows: int) -> Iterator[pd.DataFrame]:
+        """Stream the batches of every source file, logging and skipping failures."""
+        if self.data_path.is_file() and zipfile.is_zipfile(self.data_path):
+            with zipfile.ZipFile(self.data_path) as archive:
+                members = sorted(name for name in archive.namelist() if is_history_member(name))
+            sources = [
+                (member, partial(_stream_zip_member, self.data_path, member))
+                for member in members
+            ]
+        else:
+            sources = [
+                (file_path, partial(_stream_json_file, file_path))
+                for file_path in sorted(self.data_path.glob("*.json"))
+            ]
+        
+        for source, stream in sources:
+            try:
+                yield from stream(batch_rows, self.options)
+            except Exception as e:
+                logger.error(f"Error loading {source}: {e}")
+                continue
+    
+    def _load_paths(self, file_paths: Iterable[Union[str, Path]], streaming: bool,
+                    batch_rows: int, workers: Optional[int] = None,
+                    executor: str = "process",
+                    archive: Optional[Path] = None,
+                    options: Optional[LoadOptions] = None) -> pd.DataFrame:
+        """
+        Load files and concatenate them in the order given.
+        
+        Files that fail to load are logged and skipped. With more than one
+        worker the files are parsed concurrently, but results are still
+        collected in input order so the output is deterministic. If an
+        archive is given, the paths name members of that archive. Files are
+        parsed with ``options`` (the loader's options if None).
+        """
+        file_paths = list(file_paths)
+        options = options or self.options
+        
+        cache_key = self._cache_key(file_paths, archive, options)
+        if cache_key:
+            cached = self.cache.read(cache_key)
+            if cached is not None:
+                self.data = cached
+                logger.info(f"Loaded {len(self.data)} records from cache")
+                return self.data
         
-        for file_path in file_paths:
+        reader = partial(_read_zip_member_frame, archive) if archive else _read_file_frame
+        results = self._submit_files(reader, file_paths, streaming, batch_rows, workers, executor, options)
+        
+        frames = []
+        for file_path, load in zip(file_paths, results):
             try:
-                data = self._load_json_file(file_path)
-                all_data.extend(data)
-                logger.info(f"Loaded {len(data)} records from {Path(file_path).name}")
+                frame = load()
+                frames.append(frame)
+                logger.info(f"Loaded {len(frame)} records from {Path(file_path).name}")
             except Exception as e:
                 logger.error(f"Error loading {file_path}: {e}")
                 continue
                 
-        if not all_data:
+        if not any(len(frame) for frame in frames):
             raise ValueError("No data was successfully loaded")
             
-        self.data = pd.DataFrame(all_data)
+        self.data = _concat_frames(frames)
         logger.info(f"Successfully loaded {len(self.data)} total records")
         
+        if cache_key:
+            self.cache.write(cache_key, self.data)
+        
         return self.data
     
+    def _cache_key(self, file_paths: List[Union[str, Path]],
+                   archive: Optional[Path] = None,
+                   options: Optional[LoadOptions] = None) -> Optional[str]:
+        """Return the cache key for the given files, or None if caching is off."""
+        if self.cache is None:
+            return None
+        
+        if not self.cache.available:
+            logger.warning("pyarrow is not installed; loading without the data cache")
+            return None
+        
+        options = (options or self.options).cache_token()
+        if archive:
+            options["members"] = file_paths
+            file_paths = [archive]
+        
+        try:
+            return self.cache.key(self.cache.fingerprint(file_paths), options)
+        except OSError as e:
+            logger.warning(f"Could not fingerprint source files, skipping cache: {e}")
+            return None
+    
+    def _submit_files(self, reader: Callable[..., pd.DataFrame], file_paths: List[Union[str, Path]],
+                      streaming: bool, batch_rows: int, workers: Optional[int],
+                      executor: str, options: LoadOptions) -> Iterator[Callable[[], pd.DataFrame]]:
+        """
+        Yield one deferred result per file, parsing on a pool when requested.
+        
+        Each yielded callable returns the file's frame or raises its error,
+        so the caller handles failures per file either way.
+        """
+        if executor not in _EXECUTORS:
+            raise ValueError(f"Unknown executor: {executor} (expected one of {sorted(_EXECUTORS)})")
+        
+        if not workers or workers <= 1 or len(file_paths) <= 1:
+            for file_path in file_paths:
+                yield partial(reader, file_path, streaming, batch_rows, options)
+            return
+        
+        with _EXECUTORS[executor](max_workers=min(workers, len(file_paths))) as pool:
+            futures = [
+                pool.submit(reader, file_path, streaming, batch_rows, options)
+                for file_path in file_paths
+            ]
+            for future in futures:
+                yield future.result
+    
     def _load_json_file(self, file_path: Union[str, Path]) -> List[Dict]:
         """
         Load a single JSON file.
@@ -110,25 +912,35 @@ class SpotifyDataLoader:
         Returns:
             List of dictionaries from JSON file
         """
-        file_path = Path(file_path)
+        return _read_json_file(file_path, self.options.json_backend)
+    
+    def profile_data(self, df: Optional[pd.DataFrame] = None,
+                     sample_rows: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """
+        Profile loaded data in one pass.
         
-        if not file_path.exists():
-            raise FileNotFoundError(f"File not found: {file_path}")
-            
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            
-        if isinstance(data, list):
-            return data
-        else:
-            return [data]
+        Args:
+            df: DataFrame to profile (uses self.data if None)
+            sample_rows: Profile a random sample of at most this many rows
+        
+        Returns:
+            Output of ``profile_data``, or None if no data is loaded
+        """
+        if df is None:
+            df = self.data
+        if df is None:
+            return None
+        return profile_data(df, sample_rows=sample_rows)
     
-    def validate_data(self, df: Optional[pd.DataFrame] = None) -> Dict[str, Union[bool, str]]:
+    def validate_data(self, df: Optional[pd.DataFrame] = None,
+                      sample_rows: Optional[int] = None) -> Dict[str, Union[bool, str]]:
         """
         Validate loaded data for required columns and data types.
         
         Args:
             df: DataFrame to validate (uses self.data if None)
+            sample_rows: Check timestamps on a random sample of at most
+                this many rows
             
         Returns:
             Dictionary with validation results
@@ -149,11 +961,11 @@ class SpotifyDataLoader:
                 validation_results["valid"] = False
                 
         # Check data types
-        if 'ts' in df.columns:
-            try:
-                pd.to_datetime(df['ts'])
+        profile = profile_data(df, columns=['ts'], sample_rows=sample_rows)
+        if profile["timestamps"] is not None:
+            if profile["timestamps"]["valid"]:
                 validation_results["data_types"]["timestamp"] = "valid"
-            except:
+            else:
                 validation_results["data_types"]["timestamp"] = "invalid"
                 validation_results["valid"] = False
                 
@@ -166,62 +978,126 @@ class SpotifyDataLoader:
                 
         return validation_results
     
-    def get_data_info(self, df: Optional[pd.DataFrame] = None) -> Dict:
+    def get_data_info(self, df: Optional[pd.DataFrame] = None,
+                      sample_rows: Optional[int] = None,
+                      approximate: bool = False,
+                      sketches: Optional[PlaySketches] = None) -> Dict:
         """
         Get information about the loaded data.
         
         Args:
             df: DataFrame to analyze (uses self.data if None)
+            sample_rows: Estimate from a random sample of at most this many
+                rows; distinct counts are then lower bounds
+            approximate: Estimate distinct counts over all rows with
+                HyperLogLog sketches instead of exact counts, and add play
+                duration quantiles from a t-digest; error bounds are
+                reported under "approximation"
+            sketches: Sketches of the plays for approximate mode (uses
+                ``sketches`` for the loaded data if None); estimates are
+                sketched from the plays if there are none
             
         Returns:
             Dictionary with data information
         """
         if df is None:
             df = self.data
+            sketches = sketches or self.sketches
             
         if df is None:
             return {"error": "No data loaded"}
-            
+        
+        profile = profile_data(
+            df,
+            columns=['ts'] if approximate else ['ts', 'master_metadata_track_name', 'master_metadata_album_artist_name'],
+            sample_rows=sample_rows
+        )
         info = {
             "total_records": len(df),
             "columns": list(df.columns),
             "date_range": None,
             "unique_tracks": None,
-            "unique_artists": None
+            "unique_artists": None,
+            "sampled": profile["sampled"]
         }
         
-        if 'ts' in df.columns:
-            try:
-                df_copy = df.copy()
-                df_copy['ts'] = pd.to_datetime(df_copy['ts'])
-                info["date_range"] = {
-                    "start": df_copy['ts'].min().date().isoformat(),
-                    "end": df_copy['ts'].max().date().isoformat()
-                }
-            except:
-                pass
+        timestamps = profile["timestamps"]
+        if timestamps is not None and timestamps["start"] is not None:
+            info["date_range"] = {
+                "start": timestamps["start"].date().isoformat(),
+                "end": timestamps["end"].date().isoformat()
+            }
                 
-        if 'master_metadata_track_name' in df.columns:
-            info["unique_tracks"] = df['master_metadata_track_name'].nunique()
+        if 'master_metadata_track_name' in profile["columns"]:
+            info["unique_tracks"] = profile["columns"]['master_metadata_track_name']["unique"]
             
-        if 'master_metadata_album_artist_name' in df.columns:
-            info["unique_artists"] = df['master_metadata_album_artist_name'].nunique()
+        if 'master_metadata_album_artist_name' in profile["columns"]:
+            info["unique_artists"] = profile["columns"]['master_metadata_album_artist_name']["unique"]
+        
+        if approximate:
+            info["approximation"] = {}
+            for name, column in SKETCHED_COLUMNS.items():
+                if column in df.columns:
+                    distinct = sketches.distinct[name] if sketches else HyperLogLog().update(df[column])
+                    summary = distinct.summary()
+                    info[f"unique_{name}"] = summary["estimate"]
+                    info["approximation"][f"unique_{name}"] = summary
+            if 'ms_played' in df.columns:
+                digest = sketches.quantiles['ms_played'] if sketches else TDigest().update(df['ms_played'])
+                info["ms_played_quantiles"] = digest.summary()
             
         return info
 
 
-def load_spotify_data(data_path: Optional[Union[str, Path]] = None) -> pd.DataFrame:
+def load_spotify_data(data_path: Optional[Union[str, Path]] = None,
+                      streaming: bool = False,
+                      workers: Optional[int] = None,
+                      cache_dir: Optional[Union[str, Path]] = None,
+                      store_dir: Optional[Union[str, Path]] = None,
+                      columns: Optional[Sequence[str]] = None,
+                      since: Optional[Union[str, pd.Timestamp]] = None,
+                      until: Optional[Union[str, pd.Timestamp]] = None,
+                      exclude_podcasts: bool = False,
+                      with_sketches: bool = False) -> Union[pd.DataFrame, Tuple[pd.DataFrame, Optional[PlaySketches]]]:
     """
     Convenience function to load Spotify data.
     
     Args:
-        data_path: Path to directory containing Spotify data files
+        data_path: Path to directory containing Spotify data files, or to
+            the export ZIP archive
+        streaming: Decode files incrementally to keep peak memory low
+        workers: Number of processes parsing files concurrently
+        cache_dir: Directory for the columnar cache; unchanged source files
+            are then read back from it instead of being parsed again
+        store_dir: Directory of an incremental store; when given, only new
+            or changed files are parsed and appended to it
+        columns: Columns to load (all if None)
+        since: Only load plays at or after this time
+        until: Only load plays before this time
+        exclude_podcasts: Skip podcast episode plays
+        with_sketches: Also return the merged sketches of the store's parts
+            for approximate analytics (None without a store, or if the
+            time window or podcast exclusion filters plays)
         
     Returns:
-        DataFrame containing loaded Spotify data
+        DataFrame containing loaded Spotify data, or a (data, sketches)
+        tuple with ``with_sketches``
     """
-    loader = SpotifyDataLoader(data_path)
-    return loader.load_from_directory()
+    loader = SpotifyDataLoader(
+        data_path,
+        cache_dir=cache_dir,
+        columns=columns,
+        since=since,
+        until=until,
+        exclude_podcasts=exclude_podcasts
+    )
+    if store_dir:
+        data = loader.load_incremental(store_dir, streaming=streaming, workers=workers)
+        if with_sketches:
+            return data, loader.load_store_sketches(store_dir)
+        return data
+    data = loader.load_from_directory(streaming=streaming, workers=workers)
+    return (data, None) if with_sketches else data
 
 
 # Backward compatibility
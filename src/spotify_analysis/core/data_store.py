@@ -0,0 +1,245 @@
+"""
+Incremental on-disk store for Spotify streaming history.
+
+This module keeps a manifest of ingested export files and appends only
+new, deduplicated plays to a dataset of Feather part files. A sorted set
+of natural key hashes is kept next to the parts, so duplicates are
+rejected without reading the stored plays back, and each part can keep
+sketches of its plays that merge into sketches of the whole store.
+"""
+
+import json
+import os
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Union
+import logging
+
+from .data_cache import hash_file
+from .schema import HASH_FORMAT_VERSION, concat_frames, hash_rows, key_columns
+from .sketches import PLAY_COLUMNS, PlaySketches
+
+try:
+    import pyarrow.feather as feather
+except ImportError:  # pragma: no cover - optional dependency
+    feather = None
+
+logger = logging.getLogger(__name__)
+
+_MANIFEST_FILE = "manifest.json"
+
+# Sorted uint64 hashes of the natural key of every stored play
+_HASHES_FILE = "key_hashes.npy"
+
+# Suffix of the sketch file saved next to each part
+_SKETCH_SUFFIX = ".sketches.npz"
+
+
+def sorted_contains(sorted_values: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """
+    Test membership of values in a sorted array.
+    
+    Args:
+        sorted_values: Array sorted in ascending order
+        values: Values to look up
+    
+    Returns:
+        Boolean array, True where the value is in ``sorted_values``
+    """
+    if not len(sorted_values):
+        return np.zeros(len(values), dtype=bool)
+    positions = np.searchsorted(sorted_values, values).clip(max=len(sorted_values) - 1)
+    return sorted_values[positions] == values
+
+
+class IncrementalDataStore:
+    """Append-only store of deduplicated plays with a manifest of ingested files."""
+    
+    def __init__(self, store_dir: Union[str, Path]):
+        """
+        Initialize the store.
+        
+        Args:
+            store_dir: Directory holding the manifest and part files
+        
+        Raises:
+            ImportError: If pyarrow is not installed
+        """
+        if feather is None:
+            raise ImportError("pyarrow is required for the incremental data store")
+        
+        self.store_dir = Path(store_dir)
+        self.manifest = self._load_manifest()
+    
+    def pending_files(self, file_paths: Iterable[Union[str, Path]]) -> List[Path]:
+        """
+        Select the files that are new or changed since they were ingested.
+        
+        Files whose size and mtime match the manifest are skipped without
+        being read; otherwise the content hash decides.
+        
+        Args:
+            file_paths: Candidate source files
+        
+        Returns:
+            Files that still need to be parsed, in the order given
+        """
+        pending = []
+        for file_path in file_paths:
+            path = Path(file_path).resolve()
+            known = self.manifest["files"].get(str(path))
+            if known is not None:
+                stat = path.stat()
+                if known["size"] == stat.st_size and known["mtime_ns"] == stat.st_mtime_ns:
+                    continue
+                if known["hash"] == hash_file(path):
+                    continue
+            pending.append(Path(file_path))
+        return pending
+    
+    def append(self, df: pd.DataFrame, file_paths: Iterable[Union[str, Path]] = ()) -> int:
+        """
+        Append plays that are not already stored and record their sources.
+        
+        Rows are deduplicated on the natural key, both within ``df`` and
+        against every part already in the store, by their 64-bit key hash.
+        The stored hashes are read from the persisted hash set, which is
+        rebuilt from the parts if it is missing, out of date or written
+        with another HASH_FORMAT_VERSION.
+        
+        Args:
+            df: Newly parsed plays
+            file_paths: Source files of ``df`` to record in the manifest
+        
+        Returns:
+            Number of rows appended
+        """
+        if len(df):
+            columns = key_columns(df)
+            hashes = hash_rows(df, columns)
+            stored_hashes = self._stored_hashes(columns)
+            keep = ~pd.Series(hashes).duplicated().to_numpy()
+            keep &= ~sorted_contains(stored_hashes, hashes)
+            new_rows = df[keep].reset_index(drop=True)
+        else:
+            new_rows = df
+        
+        removed_count = len(df) - len(new_rows)
+        if removed_count:
+            logger.info(f"Skipped {removed_count} plays already in the store")
+        
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        if len(new_rows):
+            part_name = f"part-{len(self.manifest['parts']):05d}.feather"
+            tmp_path = self.store_dir / f"{part_name}.tmp"
+            feather.write_feather(new_rows, tmp_path)
+            os.replace(tmp_path, self.store_dir / part_name)
+            self.manifest["parts"].append(part_name)
+            
+            new_hashes = np.sort(hashes[keep])
+            self._save_hashes(np.insert(stored_hashes, np.searchsorted(stored_hashes, new_hashes), new_hashes))
+            # The manifest is saved last, so it only ever vouches for a
+            # hash set that matches its parts
+            self.manifest["key"] = {
+                "columns": columns,
+                "hashes": len(stored_hashes) + len(new_hashes),
+                "version": HASH_FORMAT_VERSION
+            }
+        
+        for file_path in file_paths:
+            path = Path(file_path).resolve()
+            stat = path.stat()
+            self.manifest["files"][str(path)] = {
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "hash": hash_file(path)
+            }
+        self._save_manifest()
+        
+        logger.info(f"Appended {len(new_rows)} plays to {self.store_dir}")
+        return len(new_rows)
+    
+    def read(self, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Read the stored dataset.
+        
+        Args:
+            columns: Columns to read (all if None)
+        
+        Returns:
+            DataFrame with every stored play, in append order
+        """
+        parts = [
+            feather.read_feather(self.store_dir / part, columns=columns)
+            for part in self.manifest["parts"]
+        ]
+        if not parts:
+            return pd.DataFrame(columns=columns)
+        if len(parts) == 1:
+            return parts[0]
+        return concat_frames(parts)
+    
+    def sketches(self) -> PlaySketches:
+        """
+        Merge the sketches of every part.
+        
+        A part's sketches are built from its plays with
+        ``PlaySketches.from_plays`` the first time they are needed and saved
+        next to it. Parts are never rewritten, so later calls only read the
+        small sketch files, and an append adds the sketching of its own
+        plays only.
+        
+        Returns:
+            Sketches of every stored play
+        """
+        merged = PlaySketches()
+        for part in self.manifest["parts"]:
+            sketch_path = self.store_dir / f"{Path(part).stem}{_SKETCH_SUFFIX}"
+            try:
+                sketches = PlaySketches.load(sketch_path)
+            except (OSError, KeyError, ValueError):
+                table = feather.read_table(self.store_dir / part, memory_map=True)
+                plays = table.select([col for col in PLAY_COLUMNS if col in table.column_names]).to_pandas()
+                sketches = PlaySketches.from_plays(plays)
+                sketches.save(sketch_path)
+            merged.merge(sketches)
+        return merged
+    
+    def _stored_hashes(self, columns: List[str]) -> np.ndarray:
+        """Sorted key hashes of every stored play, from the hash set if it is current."""
+        if not self.manifest["parts"]:
+            return np.empty(0, dtype=np.uint64)
+        
+        key = self.manifest.get("key")
+        if key is not None and key["columns"] == columns and key.get("version") == HASH_FORMAT_VERSION:
+            try:
+                hashes = np.load(self.store_dir / _HASHES_FILE)
+            except (OSError, ValueError):
+                hashes = None
+            if hashes is not None and len(hashes) == key["hashes"]:
+                return hashes
+        
+        logger.info(f"Rebuilding the key hash set of {self.store_dir}")
+        stored = self.read(columns=columns)
+        return np.unique(hash_rows(stored, columns))
+    
+    def _save_hashes(self, hashes: np.ndarray) -> None:
+        tmp_path = self.store_dir / f"{_HASHES_FILE}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.save(f, hashes)
+        os.replace(tmp_path, self.store_dir / _HASHES_FILE)
+    
+    def _load_manifest(self) -> Dict[str, Any]:
+        try:
+            with open(self.store_dir / _MANIFEST_FILE, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"files": {}, "parts": []}
+    
+    def _save_manifest(self) -> None:
+        manifest_path = self.store_dir / _MANIFEST_FILE
+        tmp_path = manifest_path.with_suffix(".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(tmp_path, manifest_path)
\ No newline at end of file
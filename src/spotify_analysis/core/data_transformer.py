@@ -4,27 +4,445 @@ Data transformation and enrichment functionality.
 This module handles cleaning, transforming, and enriching Spotify data.
 """
 
+import hashlib
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Optional, Union
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple, Union
 import logging
 from datetime import datetime, timedelta
 
+from .schema import NATURAL_KEY, concat_frames, hash_rows, key_columns
+
 logger = logging.getLogger(__name__)
 
+# Time periods as half-open [start, end) hour ranges; a range may wrap past midnight
+DEFAULT_TIME_PERIODS = {
+    "Morning": (6, 12),
+    "Afternoon": (12, 17),
+    "Evening": (17, 21),
+    "Night": (21, 6)
+}
+
+# Typical sleep time as a half-open [start, end) hour range
+DEFAULT_SLEEP_HOURS = (22, 7)
+
+# Inactivity that starts a new listening session
+SESSION_BREAK_SECONDS = 30 * 60
+
+# Per-session columns repeated onto every play of the session
+SESSION_ROW_COLUMNS = ('session_start', 'session_end', 'plays_in_session', 'total_duration_ms', 'unique_tracks')
+
+# Partitions per worker in a parallel transform, for load balancing
+_PARTITIONS_PER_WORKER = 4
+
+# Smallest partition worth sending to a worker process
+_MIN_PARTITION_ROWS = 50_000
+
+# Completion categories by minimum completion percentage
+DEFAULT_COMPLETION_THRESHOLDS = {
+    "Skip": 0.0,
+    "Partial": 30.0,
+    "Complete": 90.0
+}
+
+
+def _hours_in_range(start: int, end: int) -> np.ndarray:
+    """Return the hours of a half-open range, wrapping past midnight if end <= start."""
+    if not (0 <= start < 24 and 0 <= end <= 24):
+        raise ValueError(f"Invalid hour range: ({start}, {end})")
+    if start < end:
+        return np.arange(start, end)
+    return np.concatenate([np.arange(start, 24), np.arange(0, end)])
+
+
+def _lookup_hours(table: np.ndarray, hours: np.ndarray, missing) -> np.ndarray:
+    """Gather per-hour values from a 24-entry table, using ``missing`` for NaN hours."""
+    if hours.dtype.kind != 'f':
+        return table[hours]
+    valid = ~np.isnan(hours)
+    result = np.full(len(hours), missing, dtype=table.dtype)
+    result[valid] = table[hours[valid].astype(np.intp)]
+    return result
+
+
+class PlayCounter:
+    """Play counts per distinct value, with the value code of every row."""
+    
+    def __init__(self, values: pd.Series, keep_codes: bool = True):
+        """
+        Count plays per distinct value.
+        
+        Args:
+            values: Column identifying what was played
+            keep_codes: Keep the value code of every row; without them
+                counts are read back with ``gather``
+        """
+        codes, uniques = pd.factorize(values)
+        self.keep_codes = keep_codes
+        self.codes = codes if keep_codes else codes[:0]
+        self.uniques = pd.Index(np.asarray(uniques, dtype=object))
+        self.counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+        self.has_missing = bool((codes < 0).any())
+    
+    def extend(self, values: pd.Series) -> None:
+        """
+        Count appended rows, coding them against the values seen so far.
+        
+        Args:
+            values: Column values of the appended rows
+        """
+        values = np.asarray(values, dtype=object)
+        codes = self.uniques.get_indexer(values)
+        unseen = (codes == -1) & pd.notna(values)
+        if unseen.any():
+            self.uniques = self.uniques.append(pd.Index(pd.unique(values[unseen])))
+            codes[unseen] = self.uniques.get_indexer(values[unseen])
+        
+        counts = np.bincount(codes[codes >= 0], minlength=len(self.uniques))
+        counts[:len(self.counts)] += self.counts
+        self.counts = counts
+        self.has_missing |= bool((codes < 0).any())
+        if self.keep_codes:
+            self.codes = np.concatenate([self.codes, codes])
+    
+    def row_counts(self) -> np.ndarray:
+        """
+        Gather the count of each row's value.
+        
+        Returns:
+            Per-row counts, float with NaN for missing values if there are
+            any, int64 otherwise
+        """
+        return self._gather_codes(self.codes)
+    
+    def gather(self, values: pd.Series) -> np.ndarray:
+        """
+        Look up the counts of arbitrary rows.
+        
+        Args:
+            values: Column values of the rows
+        
+        Returns:
+            Per-row counts, float with NaN for missing values if any counted
+            row was missing, int64 otherwise
+        """
+        return self._gather_codes(self.uniques.get_indexer(np.asarray(values, dtype=object)))
+    
+    def _gather_codes(self, codes: np.ndarray) -> np.ndarray:
+        present = codes >= 0
+        if not self.has_missing and present.all():
+            return self.counts[codes].astype(np.int64)
+        row_counts = np.full(len(codes), np.nan)
+        row_counts[present] = self.counts[codes[present]]
+        return row_counts
+
+
+@dataclass(frozen=True)
+class TransformStep:
+    """
+    Declaration of a transformation step.
+    
+    Attributes:
+        name: Name of the transformer method implementing the step
+        inputs: Columns the step reads
+        outputs: Columns the step adds or replaces
+        requires: Steps that must have run first (scheduled automatically)
+        after: Steps that run first when they are scheduled too
+        row_local: Whether each row's outputs depend on that row alone
+    """
+    name: str
+    inputs: Tuple[str, ...] = ()
+    outputs: Tuple[str, ...] = ()
+    requires: Tuple[str, ...] = ()
+    after: Tuple[str, ...] = ()
+    row_local: bool = False
+
+
+# Transformation steps in their default order
+TRANSFORM_STEPS = {step.name: step for step in (
+    TransformStep(
+        'clean_duplicates',
+        inputs=NATURAL_KEY
+    ),
+    TransformStep(
+        'process_timestamps',
+        inputs=('ts',),
+        outputs=('ts', 'date', 'hour', 'day_of_week', 'month', 'year', 'is_weekend',
+                 'time_period', 'is_sleep_time'),
+        after=('clean_duplicates',),
+        row_local=True
+    ),
+    TransformStep(
+        'process_duration',
+        inputs=('ms_played', 'master_metadata_track_duration_ms'),
+        outputs=('seconds_played', 'minutes_played', 'completion_percentage', 'completion_category'),
+        after=('clean_duplicates',),
+        row_local=True
+    ),
+    TransformStep(
+        'add_session_features',
+        inputs=('ts', 'ms_played', 'master_metadata_track_name'),
+        outputs=('time_since_last_play', 'new_session', 'session_id', 'session_start', 'session_end',
+                 'plays_in_session', 'total_duration_ms', 'unique_tracks'),
+        requires=('process_timestamps',),
+        after=('clean_duplicates',)
+    ),
+    TransformStep(
+        'add_artist_features',
+        inputs=('master_metadata_album_artist_name',),
+        outputs=('artist_play_count', 'artist_loyalty'),
+        after=('clean_duplicates',)
+    ),
+    TransformStep(
+        'add_track_features',
+        inputs=('master_metadata_track_name', 'spotify_track_uri'),
+        outputs=('track_play_count', 'track_popularity'),
+        after=('clean_duplicates',)
+    ),
+)}
+
+
+def plan_steps(steps: Optional[Sequence[str]] = None,
+               columns: Optional[Sequence[str]] = None) -> List[str]:
+    """
+    Resolve requested steps and output columns into an execution order.
+    
+    Steps producing the requested columns and every required step are
+    added, then the steps are ordered so each one runs after its
+    dependencies, keeping the default order otherwise.
+    
+    Args:
+        steps: Steps to run (all if both steps and columns are None)
+        columns: Output columns to produce
+    
+    Returns:
+        Step names in execution order
+    
+    Raises:
+        ValueError: If a step is unknown or no step produces a column
+    """
+    if steps is None and columns is None:
+        return list(TRANSFORM_STEPS)
+    
+    selected = list(steps or [])
+    unknown = [step for step in selected if step not in TRANSFORM_STEPS]
+    if unknown:
+        raise ValueError(f"Unknown transformation steps: {unknown} (expected some of {list(TRANSFORM_STEPS)})")
+    
+    for col in columns or []:
+        producer = next((step.name for step in TRANSFORM_STEPS.values() if col in step.outputs), None)
+        if producer is None:
+            raise ValueError(f"No transformation step produces column: {col}")
+        selected.append(producer)
+    
+    # Close over required steps
+    needed = set()
+    pending = list(selected)
+    while pending:
+        name = pending.pop()
+        if name not in needed:
+            needed.add(name)
+            pending.extend(TRANSFORM_STEPS[name].requires)
+    
+    order = []
+    remaining = [name for name in TRANSFORM_STEPS if name in needed]
+    while remaining:
+        for name in remaining:
+            step = TRANSFORM_STEPS[name]
+            if all(dep in order for dep in step.requires + step.after if dep in needed):
+                break
+        else:
+            raise ValueError(f"Cyclic dependencies between transformation steps: {remaining}")
+        order.append(name)
+        remaining.remove(name)
+    return order
+
+
+def _transform_partition(df: pd.DataFrame, steps: List[str], options: Dict) -> pd.DataFrame:
+    """Apply steps to one partition of the plays (runs in a worker process)."""
+    transformer = SpotifyDataTransformer(df, copy=False, **options)
+    for step in steps:
+        transformer.df = getattr(transformer, step)()
+    return transformer.df
+
+
+def build_session_table(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Reduce plays with session ids to one row per session.
+    
+    Sessions are reduced as contiguous runs of rows, in one vectorized
+    pass; rows are only reordered (stably, by ``session_id``) when the ids
+    are not already ascending. Session start and end are the first and
+    last timestamps of each run, so plays are expected in time order
+    within a session, as ``add_session_features`` leaves them.
+    
+    Args:
+        df: Plays with a session_id column
+    
+    Returns:
+        Session table with session_id, SESSION_ROW_COLUMNS (those whose
+        source columns exist) and hour_min, hour_max and hour_mean when an
+        hour column exists
+    """
+    session_ids = df['session_id'].to_numpy()
+    if len(session_ids) > 1 and (np.diff(session_ids) < 0).any():
+        df = df.take(np.argsort(session_ids, kind='stable'))
+        session_ids = df['session_id'].to_numpy()
+    starts = np.flatnonzero(np.diff(session_ids, prepend=session_ids[:1] - 1)) if len(df) else np.empty(0, dtype=np.intp)
+    return SpotifyDataTransformer._session_table(df, starts)
+
+
+def frame_fingerprint(df: pd.DataFrame) -> str:
+    """
+    Fingerprint the contents of a frame.
+    
+    Args:
+        df: DataFrame to fingerprint
+    
+    Returns:
+        Hex digest of the column names, dtypes, index and values
+    
+    Raises:
+        TypeError: If the frame holds unhashable values
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr([(col, str(dtype)) for col, dtype in df.dtypes.items()]).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+class TransformMemo:
+    """
+    Least-recently-used store of transformation results.
+    
+    Entries are keyed by the input fingerprint, the transformer settings and
+    the chain of steps applied, so a run that extends an earlier chain only
+    computes the new steps. Stored frames share their columns with the
+    frames handed out, so callers should not write into them in place.
+    """
+    
+    def __init__(self, max_entries: int = 16):
+        """
+        Initialize the memo.
+        
+        Args:
+            max_entries: Number of intermediate frames kept
+        """
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, pd.DataFrame]" = OrderedDict()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def get(self, key: Hashable) -> Optional[pd.DataFrame]:
+        """Return the stored frame for a key, or None."""
+        df = self._entries.get(key)
+        if df is not None:
+            self._entries.move_to_end(key)
+        return df
+    
+    def put(self, key: Hashable, df: pd.DataFrame) -> None:
+        """Store a frame, evicting the least recently used entries."""
+        self._entries[key] = df
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    def clear(self) -> None:
+        """Drop every stored frame."""
+        self._entries.clear()
+
 
 class SpotifyDataTransformer:
     """Handles transformation and enrichment of Spotify streaming data."""
     
-    def __init__(self, df: pd.DataFrame):
+    def __init__(self, df: pd.DataFrame,
+                 time_periods: Optional[Dict[str, Tuple[int, int]]] = None,
+                 sleep_hours: Optional[Tuple[int, int]] = None,
+                 completion_thresholds: Optional[Dict[str, float]] = None,
+                 dedup_key: Optional[Sequence[str]] = None,
+                 broadcast_sessions: bool = True,
+                 copy: bool = True,
+                 memo: Optional[TransformMemo] = None):
         """
         Initialize the transformer with data.
         
         Args:
             df: DataFrame containing Spotify streaming data
+            time_periods: Period name to half-open (start, end) hour range,
+                in category order (defaults to DEFAULT_TIME_PERIODS); hours
+                outside every range get no period
+            sleep_hours: Half-open (start, end) hour range of sleep time
+                (defaults to DEFAULT_SLEEP_HOURS)
+            completion_thresholds: Completion category to minimum completion
+                percentage (defaults to DEFAULT_COMPLETION_THRESHOLDS)
+            dedup_key: Columns identifying a play for ``clean_duplicates``
+                (defaults to NATURAL_KEY)
+            broadcast_sessions: Repeat the per-session SESSION_ROW_COLUMNS
+                onto every play. With False the plays only get their gap,
+                new_session flag and session_id, and the per-session values
+                are kept once in ``sessions``
+            copy: Work on a deep copy of ``df``. With False the input's
+                columns are shared rather than copied; steps only ever
+                replace whole columns, so ``df`` itself is never modified
+                (copy-on-write), and ``transformed_df`` is the working frame
+            memo: Store of step results reused by ``transform`` across
+                transformers built on the same data
+        
+        Raises:
+            ValueError: If an hour range is invalid or two periods overlap
         """
-        self.df = df.copy()
+        self.df = df.copy(deep=copy)
         self.transformed_df = None
+        self._copy = copy
+        
+        # Statistics of the input, kept for the transformation summary
+        self.original_stats = {
+            "records": len(df),
+            "columns": list(df.columns)
+        }
+        
+        self.time_periods = dict(time_periods or DEFAULT_TIME_PERIODS)
+        self.sleep_hours = tuple(sleep_hours or DEFAULT_SLEEP_HOURS)
+        
+        # Per-hour lookup tables for the time features
+        self._period_codes = np.full(24, -1, dtype=np.int8)
+        for code, (period, (start, end)) in enumerate(self.time_periods.items()):
+            hours = _hours_in_range(start, end)
+            if (self._period_codes[hours] != -1).any():
+                raise ValueError(f"Time period {period} overlaps another period")
+            self._period_codes[hours] = code
+        self._sleep_mask = np.zeros(24, dtype=bool)
+        self._sleep_mask[_hours_in_range(*self.sleep_hours)] = True
+        
+        # Completion categories in ascending threshold order
+        thresholds = sorted((completion_thresholds or DEFAULT_COMPLETION_THRESHOLDS).items(), key=lambda item: item[1])
+        self.completion_thresholds = dict(thresholds)
+        self.completion_categories = [category for category, _ in thresholds]
+        self._completion_bounds = np.array([bound for _, bound in thresholds], dtype=np.float64)
+        self.dedup_key = tuple(dedup_key or NATURAL_KEY)
+        self.broadcast_sessions = broadcast_sessions
+        
+        # State carried between transform and update
+        self._applied_steps: Optional[List[str]] = None
+        self._sessions: Optional[pd.DataFrame] = None
+        self._counters: Dict[str, PlayCounter] = {}
+        self._row_hashes: Optional[Tuple[List[str], np.ndarray]] = None
+        
+        self.memo = memo
+        self._memo_key = None
+        if memo is not None:
+            try:
+                self._memo_key = (
+                    frame_fingerprint(self.df),
+                    repr((self.time_periods, self.sleep_hours, self.completion_categories,
+                          self._completion_bounds.tolist(), self.dedup_key, self.broadcast_sessions))
+                )
+            except TypeError as e:
+                logger.warning(f"Not memoizing transformations, data cannot be fingerprinted: {e}")
         
     def process_timestamps(self) -> pd.DataFrame:
         """
@@ -38,7 +456,8 @@ class SpotifyDataTransformer:
             return self.df
             
         # Convert to datetime
-        self.df['ts'] = pd.to_datetime(self.df['ts'])
+        if not pd.api.types.is_datetime64_any_dtype(self.df['ts']):
+            self.df['ts'] = pd.to_datetime(self.df['ts'])
         
         # Extract temporal features
         self.df['date'] = self.df['ts'].dt.date
@@ -49,27 +468,16 @@ class SpotifyDataTransformer:
         self.df['is_weekend'] = self.df['ts'].dt.weekday >= 5
         
         # Time periods
-        self.df['time_period'] = self.df['hour'].apply(self._categorize_time_period)
-        self.df['is_sleep_time'] = self.df['hour'].apply(self._is_sleep_time)
+        hours = self.df['hour'].to_numpy()
+        self.df['time_period'] = pd.Categorical.from_codes(
+            _lookup_hours(self._period_codes, hours, -1),
+            categories=list(self.time_periods)
+        )
+        self.df['is_sleep_time'] = _lookup_hours(self._sleep_mask, hours, False)
         
         logger.info("Timestamp processing completed")
         return self.df
     
-    def _categorize_time_period(self, hour: int) -> str:
-        """Categorize hour into time periods."""
-        if 6 <= hour < 12:
-            return "Morning"
-        elif 12 <= hour < 17:
-            return "Afternoon"
-        elif 17 <= hour < 21:
-            return "Evening"
-        else:
-            return "Night"
-    
-    def _is_sleep_time(self, hour: int) -> bool:
-        """Determine if hour is during typical sleep time."""
-        return 22 <= hour or hour <= 6
-    
     def process_duration(self) -> pd.DataFrame:
         """
         Process and analyze duration data.
@@ -81,20 +489,27 @@ class SpotifyDataTransformer:
             logger.warning("No duration column found")
             return self.df
             
-        # Convert to seconds and minutes
-        self.df['seconds_played'] = self.df['ms_played'] / 1000
-        self.df['minutes_played'] = self.df['seconds_played'] / 60
+        # Convert to seconds and minutes (float32 is ample for play lengths)
+        ms_played = self.df['ms_played'].to_numpy(dtype=np.float32, na_value=np.nan)
+        seconds_played = ms_played / np.float32(1000)
+        self.df['seconds_played'] = seconds_played
+        self.df['minutes_played'] = seconds_played / np.float32(60)
         
         # Calculate completion percentage (if track duration available)
         if 'master_metadata_track_duration_ms' in self.df.columns:
-            self.df['completion_percentage'] = (
-                self.df['ms_played'] / self.df['master_metadata_track_duration_ms'] * 100
-            )
-            self.df['completion_percentage'] = self.df['completion_percentage'].clip(0, 100)
+            # Categories are assigned from the exact ratio so values on a
+            # threshold are not pushed below it by float32 rounding
+            played_ms = self.df['ms_played'].to_numpy(dtype=np.float64, na_value=np.nan)
+            duration_ms = self.df['master_metadata_track_duration_ms'].to_numpy(dtype=np.float64, na_value=np.nan)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                completion = np.clip(played_ms / duration_ms * 100, 0, 100)
+            self.df['completion_percentage'] = completion.astype(np.float32)
             
-            # Categorize completion
-            self.df['completion_category'] = self.df['completion_percentage'].apply(
-                lambda x: 'Complete' if x >= 90 else 'Partial' if x >= 30 else 'Skip'
+            # Categorize completion; unknown completion gets no category
+            codes = np.searchsorted(self._completion_bounds, completion, side='right') - 1
+            codes[np.isnan(completion)] = -1
+            self.df['completion_category'] = pd.Categorical.from_codes(
+                codes, categories=self.completion_categories
             )
         
         logger.info("Duration processing completed")
@@ -104,11 +519,17 @@ class SpotifyDataTransformer:
         """
         Remove duplicate records.
         
+        Plays are identified by a 64-bit hash of their natural key columns
+        (``dedup_key``; all columns if none of them exist), and the first
+        play of every key is kept. Runs before the derived columns are
+        added, so only the key is ever hashed.
+        
         Returns:
             DataFrame with duplicates removed
         """
         initial_count = len(self.df)
-        self.df = self.df.drop_duplicates()
+        hashes = hash_rows(self.df, key_columns(self.df, self.dedup_key))
+        self.df = self.df[~pd.Series(hashes).duplicated().to_numpy()]
         final_count = len(self.df)
         
         removed_count = initial_count - final_count
@@ -120,6 +541,10 @@ class SpotifyDataTransformer:
         """
         Add session-based features.
         
+        Sessions are contiguous runs of rows once the frame is sorted by
+        time, so per-session values are reduced over the runs and repeated
+        back onto the rows without a merge.
+        
         Returns:
             DataFrame with session features
         """
@@ -127,38 +552,125 @@ class SpotifyDataTransformer:
             logger.warning("No timestamp column found for session analysis")
             return self.df
             
-        # Sort by timestamp
-        self.df = self.df.sort_values('ts')
+        # Sort by timestamp (missing timestamps go last)
+        self.df = self.df.sort_values('ts', kind='stable', ignore_index=True)
+        
+        self._sessions = self._assign_session_features(self.df, broadcast=self.broadcast_sessions)
         
+        logger.info("Session features added")
+        return self.df
+    
+    @property
+    def sessions(self) -> Optional[pd.DataFrame]:
+        """
+        Session table of the transformed plays, one row per session.
+        
+        The table is produced by ``add_session_features`` and kept up to
+        date by ``update``; after a memoized or partitioned transform it is
+        reduced from the plays on first use (see ``build_session_table``).
+        None if the plays have no sessions.
+        """
+        if self._sessions is None and 'session_id' in self.df.columns:
+            self._sessions = build_session_table(self.df)
+        return self._sessions
+    
+    @classmethod
+    def _assign_session_features(cls, df: pd.DataFrame, first_gap: float = np.nan, first_id: int = 0,
+                                 broadcast: bool = True) -> pd.DataFrame:
+        """
+        Compute the session columns of plays sorted by time, in place.
+        
+        Args:
+            df: Plays sorted by ``ts``, with missing timestamps last
+            first_gap: Seconds between the first play and the play before it
+                (NaN if there is none)
+            first_id: Session id of the first play
+            broadcast: Also set SESSION_ROW_COLUMNS on every play
+        
+        Returns:
+            Session table of the plays
+        """
         # Calculate time between plays
-        self.df['time_since_last_play'] = self.df['ts'].diff().dt.total_seconds()
+        df['time_since_last_play'] = df['ts'].diff().dt.total_seconds()
+        if len(df):
+            df.iloc[0, df.columns.get_loc('time_since_last_play')] = first_gap
         
         # Define session breaks (30 minutes of inactivity)
-        session_break_threshold = 30 * 60  # 30 minutes in seconds
-        self.df['new_session'] = (
-            self.df['time_since_last_play'] > session_break_threshold
+        df['new_session'] = (
+            df['time_since_last_play'] > SESSION_BREAK_SECONDS
         )
         
         # Create session IDs
-        self.df['session_id'] = self.df['new_session'].cumsum()
+        new_session = df['new_session'].to_numpy()
+        df['session_id'] = np.cumsum(new_session, dtype=np.int64) + (first_id - int(new_session[:1].sum()))
+        
+        # Session runs
+        row_count = len(df)
+        if row_count == 0:
+            starts = np.empty(0, dtype=np.intp)
+        else:
+            starts = np.flatnonzero(new_session)
+            if not len(starts) or starts[0] != 0:
+                starts = np.concatenate([[0], starts])
+        sessions = cls._session_table(df, starts)
         
-        # Session features
-        session_features = self.df.groupby('session_id').agg({
-            'ts': ['min', 'max', 'count'],
-            'ms_played': 'sum',
-            'master_metadata_track_name': 'nunique'
-        }).reset_index()
+        if broadcast:
+            runs = np.repeat(np.arange(len(starts)), np.diff(np.append(starts, row_count)))
+            for col in SESSION_ROW_COLUMNS:
+                if col in sessions.columns:
+                    df[col] = sessions[col].array.take(runs)
+        return sessions
+    
+    @classmethod
+    def _session_table(cls, df: pd.DataFrame, starts: np.ndarray) -> pd.DataFrame:
+        """Reduce the session runs of plays starting at row positions ``starts`` to a session table."""
+        row_count = len(df)
+        lengths = np.diff(np.append(starts, row_count))
         
-        session_features.columns = [
-            'session_id', 'session_start', 'session_end', 'plays_in_session',
-            'total_duration_ms', 'unique_tracks'
-        ]
+        # Timestamps are ascending within a run, so the session ends at the
+        # last non-missing timestamp of the run
+        ts = df['ts'].array
+        present = np.add.reduceat(df['ts'].notna().to_numpy(), starts) if row_count else lengths
+        last = starts + np.maximum(present, 1) - 1
+        table = {
+            'session_id': df['session_id'].to_numpy()[starts],
+            'session_start': ts.take(starts),
+            'session_end': ts.take(last),
+            'plays_in_session': present.astype(np.int64)
+        }
         
-        # Merge back to main dataframe
-        self.df = self.df.merge(session_features, on='session_id', how='left')
+        if 'ms_played' in df.columns:
+            ms_played = df['ms_played']
+            sum_dtype = np.float64 if pd.api.types.is_float_dtype(ms_played) else np.int64
+            values = ms_played.to_numpy(dtype=sum_dtype, na_value=0)
+            table['total_duration_ms'] = np.add.reduceat(values, starts) if row_count else values
         
-        logger.info("Session features added")
-        return self.df
+        if 'master_metadata_track_name' in df.columns:
+            table['unique_tracks'] = cls._count_distinct_per_run(df['master_metadata_track_name'], lengths)
+        
+        # Hour statistics skip plays without an hour
+        if 'hour' in df.columns:
+            hours = df['hour'].to_numpy(dtype=np.float64, na_value=np.nan)
+            if row_count:
+                counts = np.add.reduceat(~np.isnan(hours), starts)
+                totals = np.add.reduceat(np.nan_to_num(hours), starts)
+                table['hour_min'] = np.fmin.reduceat(hours, starts)
+                table['hour_max'] = np.fmax.reduceat(hours, starts)
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    table['hour_mean'] = np.where(counts > 0, totals / counts, np.nan)
+            else:
+                table['hour_min'] = table['hour_max'] = table['hour_mean'] = hours
+        
+        return pd.DataFrame(table)
+    
+    @staticmethod
+    def _count_distinct_per_run(values: pd.Series, lengths: np.ndarray) -> np.ndarray:
+        """Count distinct non-missing values in each contiguous run of rows."""
+        codes, uniques = pd.factorize(values)
+        run_ids = np.repeat(np.arange(len(lengths), dtype=np.int64), lengths)
+        present = codes >= 0
+        pairs = pd.unique(run_ids[present] * max(len(uniques), 1) + codes[present])
+        return np.bincount(pairs // max(len(uniques), 1), minlength=len(lengths)).astype(np.int64)
     
     def add_artist_features(self) -> pd.DataFrame:
         """
@@ -172,21 +684,9 @@ class SpotifyDataTransformer:
             return self.df
             
         # Artist play counts
-        artist_counts = self.df['master_metadata_album_artist_name'].value_counts()
-        self.df = self.df.merge(
-            artist_counts.reset_index().rename(columns={
-                'master_metadata_album_artist_name': 'artist',
-                'count': 'artist_play_count'
-            }),
-            left_on='master_metadata_album_artist_name',
-            right_on='artist',
-            how='left'
-        ).drop('artist', axis=1)
-        
-        # Artist loyalty (percentage of plays by top artist)
-        total_plays = len(self.df)
-        top_artist_plays = artist_counts.iloc[0] if len(artist_counts) > 0 else 0
-        self.df['artist_loyalty'] = top_artist_plays / total_plays
+        counter = PlayCounter(self.df['master_metadata_album_artist_name'])
+        self._counters['master_metadata_album_artist_name'] = counter
+        self._assign_artist_counts(counter)
         
         logger.info("Artist features added")
         return self.df
@@ -195,6 +695,9 @@ class SpotifyDataTransformer:
         """
         Add track-based features.
         
+        Plays are counted per ``spotify_track_uri`` when the column exists,
+        so different tracks sharing a name are counted separately.
+        
         Returns:
             DataFrame with track features
         """
@@ -203,55 +706,342 @@ class SpotifyDataTransformer:
             return self.df
             
         # Track play counts
-        track_counts = self.df['master_metadata_track_name'].value_counts()
-        self.df = self.df.merge(
-            track_counts.reset_index().rename(columns={
-                'master_metadata_track_name': 'track',
-                'count': 'track_play_count'
-            }),
-            left_on='master_metadata_track_name',
-            right_on='track',
-            how='left'
-        ).drop('track', axis=1)
+        track_key = self._track_key()
+        counter = PlayCounter(self.df[track_key])
+        self._counters[track_key] = counter
+        self._assign_track_counts(counter)
+        
+        logger.info("Track features added")
+        return self.df
+    
+    def _track_key(self) -> str:
+        """Column identifying tracks for play counts."""
+        return 'spotify_track_uri' if 'spotify_track_uri' in self.df.columns else 'master_metadata_track_name'
+    
+    def _assign_artist_counts(self, counter: PlayCounter) -> None:
+        """Set the artist count columns from the artist play counter."""
+        self.df['artist_play_count'] = counter.row_counts()
+        
+        # Artist loyalty (percentage of plays by top artist)
+        total_plays = len(self.df)
+        top_artist_plays = counter.counts.max() if len(counter.counts) > 0 else 0
+        self.df['artist_loyalty'] = top_artist_plays / total_plays if total_plays else np.nan
+    
+    def _assign_track_counts(self, counter: PlayCounter) -> None:
+        """Set the track count columns from the track play counter."""
+        row_counts = counter.row_counts()
+        self.df['track_play_count'] = row_counts
         
         # Track popularity (relative to most played track)
-        max_plays = track_counts.max() if len(track_counts) > 0 else 1
-        self.df['track_popularity'] = self.df['track_play_count'] / max_plays
+        max_plays = counter.counts.max() if len(counter.counts) > 0 else 1
+        self.df['track_popularity'] = row_counts / max_plays
+    
+    def update(self, new_df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Transform appended plays and add them to the transformed data.
         
-        logger.info("Track features added")
+        Only the new rows go through the per-row steps and deduplication.
+        Session state is carried across the boundary, so the last known
+        session can extend into the new plays, and artist and track counts
+        are incremented from the stored value codes. The result equals
+        running ``transform`` with the same steps over all plays. When the
+        new plays start before the latest known play or timestamps are
+        missing, sessions cannot be extended and all steps are recomputed.
+        
+        Args:
+            new_df: Newly loaded plays, with the columns and dtypes of the
+                data the transformer was built on
+        
+        Returns:
+            Transformed DataFrame including the new plays
+        
+        Raises:
+            ValueError: If ``transform`` has not been run yet
+        """
+        if self._applied_steps is None:
+            raise ValueError("transform must run before update")
+        
+        order = self._applied_steps
+        # The memo is keyed by the original data, which no longer matches
+        self._memo_key = None
+        self.original_stats["records"] += len(new_df)
+        
+        new_rows = SpotifyDataTransformer(
+            new_df,
+            time_periods=self.time_periods,
+            sleep_hours=self.sleep_hours,
+            completion_thresholds=self.completion_thresholds,
+            dedup_key=self.dedup_key,
+            broadcast_sessions=self.broadcast_sessions,
+            copy=False
+        )
+        for step in order:
+            if TRANSFORM_STEPS[step].row_local:
+                new_rows.df = getattr(new_rows, step)()
+        added = new_rows.df
+        
+        if 'clean_duplicates' in order:
+            added = self._drop_known_duplicates(added)
+        
+        previous = self.df
+        if 'add_session_features' in order and 'ts' in previous.columns:
+            added = added.sort_values('ts', kind='stable', ignore_index=True)
+            if not self._extends_history(added):
+                logger.info("New plays start before the latest known play, recomputing all steps")
+                self.df = concat_frames([previous[self.original_stats["columns"]], new_rows.df[list(new_df.columns)]])
+                self._counters = {}
+                self._row_hashes = None
+                return self.transform(order)
+            self.df = self._append_sessions(added)
+        else:
+            self.df = concat_frames([previous, added])
+        
+        if 'add_artist_features' in order and 'master_metadata_album_artist_name' in previous.columns:
+            counter = self._extend_counter('master_metadata_album_artist_name', previous, added)
+            self._assign_artist_counts(counter)
+        
+        if 'add_track_features' in order and 'master_metadata_track_name' in previous.columns:
+            counter = self._extend_counter(self._track_key(), previous, added)
+            self._assign_track_counts(counter)
+        
+        self.transformed_df = self.df.copy() if self._copy else self.df
+        logger.info(f"Added {len(added)} new plays")
         return self.df
     
-    def transform(self, steps: Optional[List[str]] = None) -> pd.DataFrame:
+    def _drop_known_duplicates(self, added: pd.DataFrame) -> pd.DataFrame:
+        """Drop appended rows that repeat each other or a known play."""
+        columns = [col for col in key_columns(self.df, self.dedup_key) if col in added.columns]
+        if self._row_hashes is None or self._row_hashes[0] != columns or len(self._row_hashes[1]) != len(self.df):
+            self._row_hashes = (columns, hash_rows(self.df, columns))
+        
+        hashes = hash_rows(added, columns)
+        keep = ~pd.Series(hashes).duplicated().to_numpy() & ~np.isin(hashes, self._row_hashes[1])
+        self._row_hashes = (columns, np.concatenate([self._row_hashes[1], hashes[keep]]))
+        
+        removed_count = len(added) - int(keep.sum())
+        logger.info(f"Removed {removed_count} duplicate records")
+        return added[keep].reset_index(drop=True)
+    
+    def _extends_history(self, added: pd.DataFrame) -> bool:
+        """Whether time-sorted new plays all come at or after the known plays."""
+        if not len(added) or not len(self.df):
+            return not added['ts'].isna().any()
+        last_ts = self.df['ts'].iloc[-1]
+        return not pd.isna(last_ts) and not pd.isna(added['ts'].iloc[-1]) and added['ts'].iloc[0] >= last_ts
+    
+    def _append_sessions(self, added: pd.DataFrame) -> pd.DataFrame:
+        """Append time-sorted plays, extending the last session if they continue it."""
+        if len(self.df):
+            session_ids = self.df['session_id'].to_numpy()
+            tail_start = int(np.searchsorted(session_ids, session_ids[-1]))
+            first_gap = self.df['time_since_last_play'].iloc[tail_start]
+            first_id = int(session_ids[-1])
+        else:
+            tail_start, first_gap, first_id = 0, np.nan, 0
+        
+        # Recompute the last known session together with the new plays
+        tail = concat_frames([self.df.iloc[tail_start:], added])
+        tail_sessions = self._assign_session_features(tail, first_gap, first_id, self.broadcast_sessions)
+        if self._sessions is not None:
+            known = self._sessions[self._sessions['session_id'].to_numpy() < first_id]
+            self._sessions = concat_frames([known, tail_sessions])
+        return concat_frames([self.df.iloc[:tail_start], tail])
+    
+    def _extend_counter(self, column: str, previous: pd.DataFrame, added: pd.DataFrame) -> PlayCounter:
+        """Extend the play counter of a column with appended rows."""
+        counter = self._counters.get(column)
+        if counter is None or len(counter.codes) != len(previous):
+            counter = PlayCounter(previous[column])
+        counter.extend(added[column] if column in added.columns else pd.Series([None] * len(added)))
+        self._counters[column] = counter
+        return counter
+    
+    def transform(self, steps: Optional[List[str]] = None,
+                  columns: Optional[List[str]] = None,
+                  workers: Optional[int] = None) -> pd.DataFrame:
         """
         Apply all transformations.
         
+        Steps are scheduled with ``plan_steps``, so required steps are added
+        and everything runs in dependency order. With a memo, the longest
+        chain of steps already computed for this data is reused and only
+        the remaining steps run.
+        
         Args:
             steps: List of transformation steps to apply. If None, applies all.
+            columns: Output columns to produce; the steps producing them are
+                added to ``steps``
+            workers: Number of processes for the leading per-partition steps
+                (see ``_transform_partitioned``); None or 1 runs in-process
             
         Returns:
             Transformed DataFrame
+        
+        Raises:
+            ValueError: If a step is unknown or no step produces a column
         """
-        if steps is None:
-            steps = [
-                'process_timestamps',
-                'process_duration', 
-                'clean_duplicates',
-                'add_session_features',
-                'add_artist_features',
-                'add_track_features'
-            ]
-        
-        for step in steps:
-            if hasattr(self, step):
-                method = getattr(self, step)
-                self.df = method()
-                logger.info(f"Applied transformation: {step}")
-            else:
-                logger.warning(f"Unknown transformation step: {step}")
+        order = plan_steps(steps, columns)
+        self._applied_steps = order
+        self._row_hashes = None
+        self._sessions = None
+        
+        done = 0
+        if self._memo_key is not None:
+            for count in range(len(order), 0, -1):
+                cached = self.memo.get((self._memo_key, tuple(order[:count])))
+                if cached is not None:
+                    self.df = cached.copy(deep=False)
+                    done = count
+                    logger.info(f"Reused memoized transformations: {order[:count]}")
+                    break
+        
+        if workers and workers > 1 and done == 0:
+            done = self._transform_partitioned(order, workers)
+            if done and self._memo_key is not None:
+                self.memo.put((self._memo_key, tuple(order[:done])), self.df.copy(deep=False))
         
-        self.transformed_df = self.df.copy()
+        for index in range(done, len(order)):
+            step = order[index]
+            self.df = getattr(self, step)()
+            logger.info(f"Applied transformation: {step}")
+            if self._memo_key is not None:
+                self.memo.put((self._memo_key, tuple(order[:index + 1])), self.df.copy(deep=False))
+        
+        self.transformed_df = self.df.copy() if self._copy else self.df
         return self.df
     
+    def _transform_partitioned(self, order: List[str], workers: int) -> int:
+        """
+        Run the leading steps of ``order`` on partitions in a process pool.
+        
+        Deduplication only hashes the key columns, so it runs first in this
+        process and the workers receive fewer rows. With a parsed ts column
+        the plays are then split into time-disjoint partitions of whole
+        (UTC) days. Sessions only cross partition edges, so besides the
+        per-row steps each worker also assigns sessions; they are then
+        renumbered and the ones spanning an edge are recomputed. Otherwise
+        only the per-row steps run, on contiguous blocks of rows. Artist and
+        track counts are reduced afterwards over the whole frame.
+        
+        Args:
+            order: Planned steps
+            workers: Number of worker processes
+        
+        Returns:
+            Number of leading steps of ``order`` that were applied
+        """
+        done = 0
+        if order[:1] == ['clean_duplicates']:
+            self.df = self.clean_duplicates()
+            done = 1
+        
+        by_time = 'ts' in self.df.columns and pd.api.types.is_datetime64_any_dtype(self.df['ts'])
+        partitionable = ('add_session_features',) if by_time else ()
+        steps = []
+        for step in order[done:]:
+            if not (TRANSFORM_STEPS[step].row_local or step in partitionable):
+                break
+            steps.append(step)
+        count = min(workers * _PARTITIONS_PER_WORKER, len(self.df) // _MIN_PARTITION_ROWS)
+        if not steps or count < 2:
+            return done
+        
+        partitions = self._partition_positions(count, by_time)
+        if len(partitions) < 2:
+            return done
+        
+        options = {
+            "time_periods": self.time_periods,
+            "sleep_hours": self.sleep_hours,
+            "completion_thresholds": self.completion_thresholds,
+            "broadcast_sessions": self.broadcast_sessions
+        }
+        # Partitions are indexed by row position to restore the input order
+        frames = []
+        for positions in partitions:
+            frame = self.df.take(positions)
+            frame.index = positions
+            frames.append(frame)
+        with ProcessPoolExecutor(max_workers=min(workers, len(frames))) as pool:
+            parts = list(pool.map(_transform_partition, frames, [steps] * len(frames), [options] * len(frames)))
+        del frames
+        
+        if 'add_session_features' in steps:
+            self.df = self._stitch_sessions(parts)
+        else:
+            positions = np.concatenate([part.index.to_numpy() for part in parts])
+            df = concat_frames(parts)
+            in_order = np.argsort(positions, kind='stable')
+            df = df.take(in_order)
+            df.index = self.df.index[positions[in_order]]
+            self.df = df
+        
+        logger.info(f"Applied transformations on {len(parts)} partitions with {workers} workers: {steps}")
+        return done + len(steps)
+    
+    def _partition_positions(self, count: int, by_time: bool) -> List[np.ndarray]:
+        """Split row positions into about ``count`` partitions, time-disjoint if ``by_time``."""
+        if not by_time:
+            return [block for block in np.array_split(np.arange(len(self.df)), count) if len(block)]
+        
+        ts = self.df['ts'].to_numpy(dtype='datetime64[ns]').astype('datetime64[D]')
+        days = ts.astype(np.int64).astype(np.float64)
+        # Missing timestamps sort last, like in add_session_features
+        days[np.isnat(ts)] = np.inf
+        positions = np.argsort(days, kind='stable')
+        days = days[positions]
+        
+        # Cut at the first day starting after each equal-size target, and
+        # before the plays without a timestamp
+        day_starts = np.flatnonzero(np.concatenate([[True], days[1:] != days[:-1]]))
+        targets = np.arange(1, count) * (len(days) / count)
+        nearest = np.searchsorted(day_starts, targets)
+        cuts = day_starts[nearest[nearest < len(day_starts)]]
+        if np.isinf(days[-1]):
+            cuts = np.append(cuts, np.searchsorted(days, np.inf))
+        cuts = np.unique(cuts[(cuts > 0) & (cuts < len(days))])
+        return np.split(positions, cuts)
+    
+    def _stitch_sessions(self, parts: List[pd.DataFrame]) -> pd.DataFrame:
+        """Join time-ordered partitions with their own session ids into one session numbering."""
+        spanning = []
+        offset = 0
+        previous_ts = None
+        for part in parts:
+            ts = part['ts']
+            if previous_ts is not None:
+                # Only the first partition starts without a previous play
+                gap = (ts.iloc[0] - previous_ts).total_seconds() if pd.notna(ts.iloc[0]) else np.nan
+                part.iloc[0, part.columns.get_loc('time_since_last_play')] = gap
+                if gap > SESSION_BREAK_SECONDS:
+                    part.iloc[0, part.columns.get_loc('new_session')] = True
+                else:
+                    offset -= 1
+                    spanning.append(offset)
+            part['session_id'] = part['session_id'].to_numpy() + offset
+            offset = int(part['session_id'].iloc[-1]) + 1
+            present = ts.dropna()
+            if len(present):
+                previous_ts = present.iloc[-1]
+        df = concat_frames(parts)
+        if not spanning:
+            return df
+        
+        # Recompute the sessions that continue across a partition edge
+        session_ids = df['session_id'].to_numpy()
+        pieces = []
+        end = 0
+        for session_id in pd.unique(np.array(spanning)):
+            start = int(np.searchsorted(session_ids, session_id, side='left'))
+            stop = int(np.searchsorted(session_ids, session_id, side='right'))
+            session = df.iloc[start:stop].reset_index(drop=True)
+            self._assign_session_features(session, df['time_since_last_play'].iloc[start], session_id,
+                                          self.broadcast_sessions)
+            pieces.extend([df.iloc[end:start], session])
+            end = stop
+        pieces.append(df.iloc[end:])
+        return concat_frames(pieces)
+    
     def get_transformation_summary(self) -> Dict:
         """
         Get summary of transformations applied.
@@ -263,9 +1053,11 @@ class SpotifyDataTransformer:
             return {"error": "No transformations applied"}
             
         summary = {
-            "original_records": len(self.df),
+            "original_records": self.original_stats["records"],
             "final_records": len(self.transformed_df),
-            "columns_added": list(set(self.transformed_df.columns) - set(self.df.columns)),
+            "columns_added": [
+                col for col in self.transformed_df.columns if col not in self.original_stats["columns"]
+            ],
             "date_range": None,
             "unique_artists": None,
             "unique_tracks": None
@@ -286,19 +1078,24 @@ class SpotifyDataTransformer:
         return summary
 
 
-def transform_data(df: pd.DataFrame, steps: Optional[List[str]] = None) -> pd.DataFrame:
+def transform_data(df: pd.DataFrame, steps: Optional[List[str]] = None,
+                   copy: bool = True, memo: Optional[TransformMemo] = None,
+                   workers: Optional[int] = None) -> pd.DataFrame:
     """
     Convenience function to transform Spotify data.
     
     Args:
         df: DataFrame containing Spotify data
         steps: List of transformation steps to apply
+        copy: Deep-copy ``df`` first (False shares its columns)
+        memo: Store of step results to reuse across calls
+        workers: Number of processes transforming partitions of the data
         
     Returns:
         Transformed DataFrame
     """
-    transformer = SpotifyDataTransformer(df)
-    return transformer.transform(steps)
+    transformer = SpotifyDataTransformer(df, copy=copy, memo=memo)
+    return transformer.transform(steps, workers=workers)
 
 
 # Backward compatibility
@@ -0,0 +1,126 @@
+"""
+Pluggable JSON decoders for loading Spotify data files.
+
+This module picks the fastest installed JSON decoder (orjson, simdjson)
+and falls back to the standard library, so loading works the same with
+or without the optional packages.
+"""
+
+import json
+from typing import Any, Callable, Dict, List, Optional, Union
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Preferred decoders, fastest first
+BACKEND_PREFERENCE = ('orjson', 'simdjson', 'stdlib')
+
+
+class JSONBackend:
+    """A named JSON decoder."""
+    
+    def __init__(self, name: str, loads: Callable[[bytes], Any]):
+        """
+        Initialize the backend.
+        
+        Args:
+            name: Backend name
+            loads: Function decoding a UTF-8 document into Python objects
+        """
+        self.name = name
+        self._loads = loads
+    
+    def loads(self, data: Union[bytes, str]) -> Any:
+        """
+        Decode a whole JSON document.
+        
+        Documents the fast decoders reject (for example NaN literals or
+        integers beyond 64 bits) are decoded again with the standard
+        library, so every backend returns the same records.
+        
+        Args:
+            data: JSON document
+        
+        Returns:
+            Decoded Python objects
+        """
+        if self.name == 'stdlib':
+            return _stdlib_loads(data)
+        try:
+            return self._loads(data)
+        except ValueError:
+            logger.debug(f"{self.name} rejected the document, retrying with the standard library")
+            return _stdlib_loads(data)
+    
+    def __repr__(self) -> str:
+        return f"JSONBackend({self.name!r})"
+
+
+def _stdlib_loads(data: Union[bytes, str]) -> Any:
+    return json.loads(data)
+
+
+def _import_orjson() -> Callable[[bytes], Any]:
+    import orjson
+    return orjson.loads
+
+
+def _import_simdjson() -> Callable[[bytes], Any]:
+    import simdjson
+    return simdjson.loads
+
+
+_IMPORTERS: Dict[str, Callable[[], Callable[[bytes], Any]]] = {
+    'orjson': _import_orjson,
+    'simdjson': _import_simdjson,
+    'stdlib': lambda: _stdlib_loads,
+}
+
+_resolved: Dict[str, Optional[JSONBackend]] = {}
+
+
+def _resolve(name: str) -> Optional[JSONBackend]:
+    """Import a backend once, remembering whether it is installed."""
+    if name not in _resolved:
+        try:
+            _resolved[name] = JSONBackend(name, _IMPORTERS[name]())
+        except ImportError:
+            _resolved[name] = None
+    return _resolved[name]
+
+
+def available_backends() -> List[str]:
+    """
+    List the installed JSON backends.
+    
+    Returns:
+        Backend names in order of preference
+    """
+    return [name for name in BACKEND_PREFERENCE if _resolve(name) is not None]
+
+
+def get_json_backend(name: Optional[str] = None) -> JSONBackend:
+    """
+    Get a JSON backend by name, or the fastest one installed.
+    
+    Args:
+        name: Backend name ('orjson', 'simdjson' or 'stdlib'); None picks
+            the first installed backend in BACKEND_PREFERENCE
+    
+    Returns:
+        The selected backend
+    
+    Raises:
+        ValueError: If the backend name is unknown
+        ImportError: If the named backend is not installed
+    """
+    if name is None:
+        return _resolve(available_backends()[0])
+    
+    if name not in _IMPORTERS:
+        raise ValueError(f"Unknown JSON backend: {name} (expected one of {list(BACKEND_PREFERENCE)})")
+    
+    backend = _resolve(name)
+    if backend is None:
+        raise ImportError(f"JSON backend '{name}' is not installed")
+    return backend
\ No newline at end of file
@@ -6,25 +6,99 @@ This module analyzes temporal patterns, sleep-related behaviors, and listening h
 
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Sequence, Tuple
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 
+from .aggregation_cube import CUBE_DIMENSIONS, AggregationCube
+from .data_transformer import build_session_table
+from .sketches import PlaySketches
+
 logger = logging.getLogger(__name__)
 
+# Analyses by result key, with the analyzer method computing each
+PATTERN_ANALYSES = {
+    "temporal": "analyze_temporal_patterns",
+    "artist": "analyze_artist_patterns",
+    "track": "analyze_track_patterns",
+    "session": "analyze_session_patterns",
+    "sleep": "analyze_sleep_patterns"
+}
+
+# Analyses answered from the aggregation cube
+_CUBE_ANALYSES = ("temporal", "artist", "track", "sleep")
+
+# Analyses answered from sketches in approximate mode
+_SKETCH_ANALYSES = ("artist", "track", "sleep")
+
+# Cube dimensions answered from sketches in approximate mode
+_SKETCHED_DIMENSIONS = ("artist", "track")
+
+# Data quality assessment, reported in the summary when requested
+DATA_QUALITY = "data_quality"
+
 
 class SpotifyPatternAnalyzer:
     """Analyzes patterns in Spotify streaming data."""
     
-    def __init__(self, df: pd.DataFrame):
+    def __init__(self, df: pd.DataFrame, copy: bool = True, preference_top_n: Optional[int] = None,
+                 sessions: Optional[pd.DataFrame] = None, approximate: bool = False,
+                 sketches: Optional[PlaySketches] = None):
         """
         Initialize the analyzer with data.
         
         Args:
             df: DataFrame containing processed Spotify data
+            copy: Work on a deep copy of ``df``. Analyses never modify the
+                frame, so False safely shares its columns
+            preference_top_n: Only report the preferred time period of the
+                N most played artists (all artists if None)
+            sessions: Session table of the plays, as produced by the
+                transformer (``SpotifyDataTransformer.sessions``); reduced
+                from the plays on first use if None
+            approximate: Answer artist and track counts, distinct counts and
+                the median completion from sketches instead of exact
+                per-value tables, reporting their error bounds under
+                "approximation" in each result
+            sketches: Sketches of the plays for approximate mode, e.g.
+                merged from the parts of an incremental store
+                (``IncrementalDataStore.sketches``); built from the plays on
+                first use if None
         """
-        self.df = df.copy()
+        if sketches is not None and sketches.records != len(df):
+            logger.warning(f"Sketches cover {sketches.records} plays but the data has {len(df)}")
+        self.df = df.copy(deep=copy)
+        self.preference_top_n = preference_top_n
+        self.approximate = approximate
         self.analysis_results = {}
+        self._cube: Optional[AggregationCube] = None
+        self._sessions = sessions
+        self._sketches = sketches
+    
+    @property
+    def cube(self) -> AggregationCube:
+        """Aggregation cube of the plays, built in one pass on first use."""
+        if self._cube is None:
+            dimensions = None
+            if self.approximate:
+                dimensions = [dim for dim in CUBE_DIMENSIONS if dim not in _SKETCHED_DIMENSIONS]
+            self._cube = AggregationCube.from_frame(self.df, dimensions)
+        return self._cube
+    
+    @property
+    def sketches(self) -> PlaySketches:
+        """Sketches of the plays, built on first use."""
+        if self._sketches is None:
+            self._sketches = PlaySketches.from_frame(self.df)
+        return self._sketches
+    
+    @property
+    def sessions(self) -> Optional[pd.DataFrame]:
+        """Session table of the plays, None if the plays have no sessions."""
+        if self._sessions is None and 'session_id' in self.df.columns:
+            self._sessions = build_session_table(self.df)
+        return self._sessions
         
     def analyze_temporal_patterns(self) -> Dict:
         """
@@ -46,7 +120,7 @@ class SpotifyPatternAnalyzer:
         
         # Hourly distribution
         if 'hour' in self.df.columns:
-            hourly_counts = self.df['hour'].value_counts().sort_index()
+            hourly_counts = self.cube.totals(['hour'])
             results["hourly_distribution"] = hourly_counts.to_dict()
             
             # Peak hours (top 3)
@@ -59,26 +133,27 @@ class SpotifyPatternAnalyzer:
         # Daily distribution
         if 'day_of_week' in self.df.columns:
             day_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-            daily_counts = self.df['day_of_week'].value_counts()
+            daily_counts = self.cube.totals(['day_of_week'])
             daily_counts = daily_counts.reindex(day_order, fill_value=0)
             results["daily_distribution"] = daily_counts.to_dict()
         
         # Monthly distribution
         if 'month' in self.df.columns:
-            monthly_counts = self.df['month'].value_counts().sort_index()
+            monthly_counts = self.cube.totals(['month'])
             results["monthly_distribution"] = monthly_counts.to_dict()
         
         # Sleep time analysis
         if 'is_sleep_time' in self.df.columns:
-            sleep_data = self.df[self.df['is_sleep_time']]
-            wake_data = self.df[~self.df['is_sleep_time']]
+            sleep_counts = self.cube.totals(['is_sleep_time'])
+            sleep_plays = int(sleep_counts.get(True, 0))
+            has_minutes = 'minutes_played' in self.df.columns
             
             results["sleep_time_analysis"] = {
-                "sleep_time_plays": len(sleep_data),
-                "wake_time_plays": len(wake_data),
-                "sleep_percentage": len(sleep_data) / len(self.df) * 100,
-                "avg_sleep_session_duration": sleep_data['minutes_played'].mean() if 'minutes_played' in sleep_data.columns else 0,
-                "avg_wake_session_duration": wake_data['minutes_played'].mean() if 'minutes_played' in wake_data.columns else 0
+                "sleep_time_plays": sleep_plays,
+                "wake_time_plays": int(sleep_counts.get(False, 0)),
+                "sleep_percentage": sleep_plays / len(self.df) * 100,
+                "avg_sleep_session_duration": self.cube.mean('minutes', {'is_sleep_time': True}) if has_minutes else 0,
+                "avg_wake_session_duration": self.cube.mean('minutes', {'is_sleep_time': False}) if has_minutes else 0
             }
         
         self.analysis_results["temporal"] = results
@@ -101,11 +176,20 @@ class SpotifyPatternAnalyzer:
         }
         
         # Top artists
-        artist_counts = self.df['master_metadata_album_artist_name'].value_counts()
-        results["top_artists"] = [
-            {"artist": artist, "plays": int(count)}
-            for artist, count in artist_counts.head(10).items()
-        ]
+        if self.approximate:
+            artist_top = self.sketches.top['artists'].top()
+            artist_counts = artist_top['count']
+            unique_artists = self.sketches.distinct['artists'].estimate()
+            results["approximation"] = {
+                "unique_artists": self.sketches.distinct['artists'].summary(),
+                "max_play_error": self.sketches.top['artists'].max_error
+            }
+        else:
+            artist_top = None
+            artist_counts = self.cube.totals(['artist']).sort_values(ascending=False, kind='stable')
+            artist_counts = artist_counts[artist_counts > 0]
+            unique_artists = len(artist_counts)
+        results["top_artists"] = self._top_entries("artist", artist_top, artist_counts, 10)
         
         # Artist loyalty analysis
         total_plays = len(self.df)
@@ -114,22 +198,20 @@ class SpotifyPatternAnalyzer:
             results["artist_loyalty"] = {
                 "top_artist_percentage": top_artist_plays / total_plays * 100,
                 "top_5_artists_percentage": artist_counts.head(5).sum() / total_plays * 100,
-                "diversity_score": len(artist_counts) / total_plays * 1000  # Artists per 1000 plays
+                "diversity_score": unique_artists / total_plays * 1000  # Artists per 1000 plays
             }
         
-        # Artist time preferences
+        # Artist time preferences, in order of artist plays
         if 'time_period' in self.df.columns:
-            artist_time = self.df.groupby(['master_metadata_album_artist_name', 'time_period']).size().reset_index(name='plays')
-            artist_time_pivot = artist_time.pivot(
-                index='master_metadata_album_artist_name', 
-                columns='time_period', 
-                values='plays'
-            ).fillna(0)
-            
-            # Find preferred time for each artist
-            for artist in artist_time_pivot.index:
-                preferred_time = artist_time_pivot.loc[artist].idxmax()
-                results["artist_time_preferences"][artist] = preferred_time
+            artists = artist_counts.index
+            if self.preference_top_n is not None:
+                artists = artists[:self.preference_top_n]
+            if self.approximate:
+                preferred_times = self.sketches.preferred_periods(artists)
+            else:
+                preferred_times = self.cube.top_values('artist', 'time_period')
+            preferred_times = preferred_times.reindex(artists[artists.isin(preferred_times.index)])
+            results["artist_time_preferences"] = preferred_times.to_dict()
         
         self.analysis_results["artist"] = results
         return results
@@ -151,31 +233,50 @@ class SpotifyPatternAnalyzer:
         }
         
         # Top tracks
-        track_counts = self.df['master_metadata_track_name'].value_counts()
-        results["top_tracks"] = [
-            {"track": track, "plays": int(count)}
-            for track, count in track_counts.head(10).items()
-        ]
-        
-        # Repeat listening analysis
+        if self.approximate:
+            track_top = self.sketches.top['tracks'].top()
+            track_counts = track_top['count']
+            unique_tracks = self.sketches.distinct['tracks'].estimate()
+            results["approximation"] = {
+                "unique_tracks": self.sketches.distinct['tracks'].summary(),
+                "max_play_error": self.sketches.top['tracks'].max_error
+            }
+        else:
+            track_top = None
+            track_counts = self.cube.totals(['track']).sort_values(ascending=False, kind='stable')
+            track_counts = track_counts[track_counts > 0]
+            unique_tracks = len(track_counts)
+        results["top_tracks"] = self._top_entries("track", track_top, track_counts, 10)
+        
+        # Repeat listening analysis; counts of rarely played tracks are not
+        # kept by the sketches, so approximate mode leaves them out
         total_plays = len(self.df)
-        unique_tracks = len(track_counts)
         results["repeat_listening"] = {
             "avg_plays_per_track": total_plays / unique_tracks if unique_tracks > 0 else 0,
             "most_repeated_track": track_counts.iloc[0] if len(track_counts) > 0 else 0,
-            "single_play_tracks": (track_counts == 1).sum(),
-            "repeat_percentage": (track_counts > 1).sum() / unique_tracks * 100 if unique_tracks > 0 else 0
+            "single_play_tracks": None if self.approximate else (track_counts == 1).sum(),
+            "repeat_percentage": (
+                None if self.approximate
+                else (track_counts > 1).sum() / unique_tracks * 100 if unique_tracks > 0 else 0
+            )
         }
         
         # Track completion analysis
         if 'completion_percentage' in self.df.columns:
-            completion_stats = self.df['completion_percentage'].describe()
+            completion_buckets = self.cube.totals(['completion_bucket'])
+            if self.approximate:
+                digest = self.sketches.quantiles['completion_percentage']
+                median_completion = digest.quantile(0.5)
+                results["approximation"]["median_completion_rank_error"] = digest.rank_error(0.5)
+            else:
+                # Quantiles do not add up over cells, so the median reads the column
+                median_completion = self.df['completion_percentage'].median()
             results["track_completion"] = {
-                "avg_completion": completion_stats['mean'],
-                "median_completion": completion_stats['50%'],
-                "complete_plays": (self.df['completion_percentage'] >= 90).sum(),
-                "partial_plays": ((self.df['completion_percentage'] >= 30) & (self.df['completion_percentage'] < 90)).sum(),
-                "skipped_plays": (self.df['completion_percentage'] < 30).sum()
+                "avg_completion": self.cube.mean('completion'),
+                "median_completion": median_completion,
+                "complete_plays": completion_buckets['complete'],
+                "partial_plays": completion_buckets['partial'],
+                "skipped_plays": completion_buckets['skipped']
             }
         
         self.analysis_results["track"] = results
@@ -188,7 +289,8 @@ class SpotifyPatternAnalyzer:
         Returns:
             Dictionary with session analysis results
         """
-        if 'session_id' not in self.df.columns:
+        session_stats = self.sessions
+        if session_stats is None:
             return {"error": "No session data available"}
             
         results = {
@@ -197,48 +299,36 @@ class SpotifyPatternAnalyzer:
             "session_time_patterns": {}
         }
         
-        # Session statistics
-        session_stats = self.df.groupby('session_id').agg({
-            'ts': ['min', 'max', 'count'],
-            'ms_played': 'sum',
-            'master_metadata_track_name': 'nunique'
-        }).reset_index()
-        
-        session_stats.columns = [
-            'session_id', 'start_time', 'end_time', 'plays', 
-            'total_duration_ms', 'unique_tracks'
-        ]
-        
-        session_stats['duration_minutes'] = session_stats['total_duration_ms'] / 1000 / 60
+        # Session statistics, one row per session
+        duration_minutes = session_stats['total_duration_ms'] / 1000 / 60
         
         results["session_statistics"] = {
             "total_sessions": len(session_stats),
-            "avg_session_duration": session_stats['duration_minutes'].mean(),
-            "avg_plays_per_session": session_stats['plays'].mean(),
+            "avg_session_duration": duration_minutes.mean(),
+            "avg_plays_per_session": session_stats['plays_in_session'].mean(),
             "avg_tracks_per_session": session_stats['unique_tracks'].mean(),
-            "longest_session": session_stats['duration_minutes'].max(),
-            "shortest_session": session_stats['duration_minutes'].min()
+            "longest_session": duration_minutes.max(),
+            "shortest_session": duration_minutes.min()
         }
         
         # Session duration patterns
         duration_bins = [0, 5, 15, 30, 60, float('inf')]
         duration_labels = ['0-5min', '5-15min', '15-30min', '30-60min', '60min+']
-        session_stats['duration_category'] = pd.cut(
-            session_stats['duration_minutes'], 
+        duration_category = pd.cut(
+            duration_minutes, 
             bins=duration_bins, 
             labels=duration_labels
         )
         
-        duration_dist = session_stats['duration_category'].value_counts()
+        duration_dist = duration_category.value_counts()
         results["session_duration_patterns"] = duration_dist.to_dict()
         
         # Session time patterns
-        if 'hour' in self.df.columns:
-            session_hour_dist = self.df.groupby('session_id')['hour'].agg(['min', 'max', 'mean']).reset_index()
+        if 'hour_mean' in session_stats.columns:
             results["session_time_patterns"] = {
-                "avg_session_start_hour": session_hour_dist['min'].mean(),
-                "avg_session_end_hour": session_hour_dist['max'].mean(),
-                "avg_session_hour": session_hour_dist['mean'].mean()
+                "avg_session_start_hour": session_stats['hour_min'].mean(),
+                "avg_session_end_hour": session_stats['hour_max'].mean(),
+                "avg_session_hour": session_stats['hour_mean'].mean()
             }
         
         self.analysis_results["session"] = results
@@ -260,74 +350,115 @@ class SpotifyPatternAnalyzer:
             "sleep_quality_indicators": {}
         }
         
-        sleep_data = self.df[self.df['is_sleep_time']]
-        wake_data = self.df[~self.df['is_sleep_time']]
+        cube = self.cube
+        sleep = {'is_sleep_time': True}
+        sleep_plays = int(cube.totals(['is_sleep_time']).get(True, 0))
         
         # Sleep time listening statistics
+        sleep_sessions_count = 0
+        if 'session_id' in self.df.columns:
+            sleep_sessions_count = self.df.loc[self.df['is_sleep_time'].to_numpy(dtype=bool), 'session_id'].nunique()
         results["sleep_time_listening"] = {
-            "total_sleep_plays": len(sleep_data),
-            "sleep_plays_percentage": len(sleep_data) / len(self.df) * 100,
-            "avg_sleep_session_length": sleep_data['minutes_played'].mean() if 'minutes_played' in sleep_data.columns else 0,
-            "sleep_sessions_count": sleep_data['session_id'].nunique() if 'session_id' in sleep_data.columns else 0
+            "total_sleep_plays": sleep_plays,
+            "sleep_plays_percentage": sleep_plays / len(self.df) * 100,
+            "avg_sleep_session_length": cube.mean('minutes', sleep) if 'minutes_played' in self.df.columns else 0,
+            "sleep_sessions_count": sleep_sessions_count
         }
         
         # Sleep time preferences
-        if 'master_metadata_album_artist_name' in sleep_data.columns:
-            sleep_artists = sleep_data['master_metadata_album_artist_name'].value_counts().head(5)
-            results["sleep_time_preferences"]["top_sleep_artists"] = [
-                {"artist": artist, "plays": int(count)}
-                for artist, count in sleep_artists.items()
-            ]
-        
-        if 'master_metadata_track_name' in sleep_data.columns:
-            sleep_tracks = sleep_data['master_metadata_track_name'].value_counts().head(5)
-            results["sleep_time_preferences"]["top_sleep_tracks"] = [
-                {"track": track, "plays": int(count)}
-                for track, count in sleep_tracks.items()
-            ]
+        for key, column in (("artist", 'master_metadata_album_artist_name'), ("track", 'master_metadata_track_name')):
+            if column not in self.df.columns:
+                continue
+            if self.approximate:
+                summary = self.sketches.top[f"sleep_{key}s"]
+                top, counts = summary.top(), summary.counts
+                results.setdefault("approximation", {})[f"max_sleep_{key}_play_error"] = summary.max_error
+            else:
+                top = None
+                counts = cube.totals([key], where=sleep).sort_values(ascending=False, kind='stable')
+                counts = counts[counts > 0]
+            results["sleep_time_preferences"][f"top_sleep_{key}s"] = self._top_entries(key, top, counts, 5)
         
         # Sleep quality indicators
-        if 'completion_percentage' in sleep_data.columns:
-            sleep_completion = sleep_data['completion_percentage'].mean()
-            wake_completion = wake_data['completion_percentage'].mean()
+        if 'completion_percentage' in self.df.columns:
+            sleep_completion = cube.mean('completion', sleep)
+            wake_completion = cube.mean('completion', {'is_sleep_time': False})
+            sleep_skips = cube.totals(['completion_bucket'], where=sleep)['skipped']
             
             results["sleep_quality_indicators"] = {
                 "sleep_completion_rate": sleep_completion,
                 "wake_completion_rate": wake_completion,
                 "completion_difference": sleep_completion - wake_completion,
-                "sleep_skip_rate": (sleep_data['completion_percentage'] < 30).sum() / len(sleep_data) * 100 if len(sleep_data) > 0 else 0
+                "sleep_skip_rate": sleep_skips / sleep_plays * 100 if sleep_plays > 0 else 0
             }
         
         self.analysis_results["sleep"] = results
         return results
     
-    def analyze_all_patterns(self) -> Dict:
+    def analyze_all_patterns(self, analyses: Optional[Sequence[str]] = None,
+                             workers: Optional[int] = None) -> Dict:
         """
-        Run all pattern analyses.
+        Run the requested pattern analyses.
+        
+        The analyses only read the data, so with several workers they run
+        concurrently on a thread pool over the shared frame. The aggregation
+        cube and session table are built up front so the threads never race
+        to build them.
+        
+        Args:
+            analyses: Analyses to run, from PATTERN_ANALYSES plus DATA_QUALITY
+                (all of them if None)
+            workers: Number of threads running analyses concurrently
+                (sequential if None or 1)
         
         Returns:
-            Dictionary with all analysis results
+            Dictionary with the results of the requested analyses and a summary
         """
-        logger.info("Starting comprehensive pattern analysis...")
-        
-        all_results = {
-            "temporal": self.analyze_temporal_patterns(),
-            "artist": self.analyze_artist_patterns(),
-            "track": self.analyze_track_patterns(),
-            "session": self.analyze_session_patterns(),
-            "sleep": self.analyze_sleep_patterns()
-        }
+        selected = list(PATTERN_ANALYSES) + [DATA_QUALITY] if analyses is None else list(dict.fromkeys(analyses))
+        unknown = [name for name in selected if name not in PATTERN_ANALYSES and name != DATA_QUALITY]
+        if unknown:
+            raise ValueError(f"Unknown analyses: {unknown}. Available: {list(PATTERN_ANALYSES) + [DATA_QUALITY]}")
+        
+        names = [name for name in selected if name in PATTERN_ANALYSES]
+        logger.info(f"Starting pattern analysis: {', '.join(selected)}")
+        
+        # Build the shared cube, session table and sketches before any thread reads them
+        if any(name in _CUBE_ANALYSES for name in names):
+            self.cube
+        if "session" in names:
+            self.sessions
+        if self.approximate and any(name in _SKETCH_ANALYSES for name in names):
+            self.sketches
+        methods = [getattr(self, PATTERN_ANALYSES[name]) for name in names]
+        if workers is not None and workers > 1 and len(methods) > 1:
+            with ThreadPoolExecutor(max_workers=min(workers, len(methods))) as pool:
+                futures = [pool.submit(method) for method in methods]
+                all_results = {name: future.result() for name, future in zip(names, futures)}
+        else:
+            all_results = {name: method() for name, method in zip(names, methods)}
         
         # Add summary statistics
         all_results["summary"] = {
             "total_records": len(self.df),
-            "analysis_timestamp": datetime.now().isoformat(),
-            "data_quality": self._assess_data_quality()
+            "analysis_timestamp": datetime.now().isoformat()
         }
+        if DATA_QUALITY in selected:
+            all_results["summary"]["data_quality"] = self._assess_data_quality()
         
         self.analysis_results = all_results
         return all_results
     
+    @staticmethod
+    def _top_entries(key: str, top: Optional[pd.DataFrame], counts: pd.Series, n: int) -> List[Dict]:
+        """Result entries of the ``n`` most played values, with count errors from a sketch's ``top``."""
+        entries = []
+        for value, count in counts.head(n).items():
+            entry = {key: value, "plays": int(count)}
+            if top is not None:
+                entry["play_error"] = int(top.at[value, 'error'])
+            entries.append(entry)
+        return entries
+    
     def _assess_data_quality(self) -> Dict:
         """Assess the quality of the data."""
         quality_metrics = {
@@ -369,15 +500,27 @@ class SpotifyPatternAnalyzer:
         return quality_metrics
 
 
-def analyze_patterns(df: pd.DataFrame) -> Dict:
+def analyze_patterns(df: pd.DataFrame, copy: bool = True, preference_top_n: Optional[int] = None,
+                     analyses: Optional[Sequence[str]] = None, workers: Optional[int] = None,
+                     sessions: Optional[pd.DataFrame] = None, approximate: bool = False,
+                     sketches: Optional[PlaySketches] = None) -> Dict:
     """
     Convenience function to analyze patterns in Spotify data.
     
     Args:
         df: DataFrame containing processed Spotify data
+        copy: Deep-copy ``df`` first (False shares its columns)
+        preference_top_n: Only report time preferences of the N most
+            played artists
+        analyses: Analyses to run (all of them if None)
+        workers: Number of threads running analyses concurrently
+        sessions: Session table produced by the transformer
+        approximate: Answer counts and the median completion from sketches
+        sketches: Sketches of the plays for approximate mode
         
     Returns:
         Dictionary with pattern analysis results
     """
-    analyzer = SpotifyPatternAnalyzer(df)
-    return analyzer.analyze_all_patterns() 
\ No newline at end of file
+    analyzer = SpotifyPatternAnalyzer(df, copy=copy, preference_top_n=preference_top_n, sessions=sessions,
+                                      approximate=approximate, sketches=sketches)
+    return analyzer.analyze_all_patterns(analyses=analyses, workers=workers) 
\ No newline at end of file
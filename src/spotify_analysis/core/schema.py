@@ -0,0 +1,200 @@
+"""
+Column schema for Spotify streaming history exports.
+
+This module declares compact dtypes for the endsong fields and applies
+them to loaded data.
+"""
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+from typing import Dict, List, Optional, Sequence
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Compact dtypes for the fields of the extended streaming history
+ENDSONG_SCHEMA = {
+    'ts': 'datetime64[ns, UTC]',
+    'username': 'category',
+    'platform': 'category',
+    'ms_played': 'int32',
+    'conn_country': 'category',
+    'ip_addr_decrypted': 'category',
+    'user_agent_decrypted': 'category',
+    'master_metadata_track_name': 'category',
+    'master_metadata_album_artist_name': 'category',
+    'master_metadata_album_album_name': 'category',
+    'spotify_track_uri': 'category',
+    'episode_name': 'category',
+    'episode_show_name': 'category',
+    'spotify_episode_uri': 'category',
+    'reason_start': 'category',
+    'reason_end': 'category',
+    'shuffle': 'bool',
+    'skipped': 'bool',
+    'offline': 'bool',
+    'incognito_mode': 'bool'
+}
+
+# Columns that identify a single play across overlapping exports
+NATURAL_KEY = ('ts', 'spotify_track_uri', 'ms_played')
+
+# Bumped whenever ``hash_rows`` hashes the same rows differently, so
+# persisted hashes are rebuilt
+HASH_FORMAT_VERSION = 2
+
+
+def apply_schema(df: pd.DataFrame, schema: Optional[Dict[str, str]] = None) -> pd.DataFrame:
+    """
+    Convert the columns of a frame to their declared dtypes.
+    
+    Columns are replaced one at a time, so only one column is ever held
+    twice. Integer and boolean columns with missing values use the pandas
+    nullable dtypes; columns that cannot be converted keep their dtype.
+    
+    Args:
+        df: DataFrame to convert in place
+        schema: Mapping of column name to dtype (defaults to ENDSONG_SCHEMA)
+    
+    Returns:
+        The converted DataFrame
+    """
+    if schema is None:
+        schema = ENDSONG_SCHEMA
+    
+    for col, dtype in schema.items():
+        if col not in df.columns or df[col].dtype == dtype:
+            continue
+        try:
+            df[col] = _convert_column(df[col], dtype)
+        except (TypeError, ValueError, OverflowError) as e:
+            logger.warning(f"Keeping {col} as {df[col].dtype}, could not convert to {dtype}: {e}")
+    
+    return df
+
+
+def _convert_column(series: pd.Series, dtype: str) -> pd.Series:
+    """Convert one column to a schema dtype."""
+    if dtype.startswith('datetime64'):
+        return pd.to_datetime(series, utc=True, format='ISO8601')
+    
+    if dtype == 'category':
+        return series.astype('category')
+    
+    has_nulls = series.isna().any()
+    if dtype == 'bool':
+        return series.astype('boolean' if has_nulls else 'bool')
+    
+    if dtype.startswith('int'):
+        # Nullable counterpart, e.g. int32 -> Int32
+        nullable = series.astype(dtype.capitalize())
+        return nullable if has_nulls else nullable.astype(dtype)
+    
+    return series.astype(dtype)
+
+
+def key_columns(df: pd.DataFrame, key: Sequence[str] = NATURAL_KEY) -> List[str]:
+    """
+    Return the natural key columns present in a frame.
+    
+    Args:
+        df: DataFrame to inspect
+        key: Preferred key columns
+    
+    Returns:
+        Key columns found in the frame, or all columns if none are present
+    """
+    columns = [col for col in key if col in df.columns]
+    return columns or list(df.columns)
+
+
+def hash_rows(df: pd.DataFrame, columns: Sequence[str]) -> np.ndarray:
+    """
+    Hash rows on a subset of columns.
+    
+    Key columns are normalized first, so a play hashes the same whatever
+    dtype its batch was loaded with: numbers are hashed as float64 (e.g.
+    ``int32`` and nullable ``Int32`` ms_played) and timestamps as int64
+    nanoseconds since the epoch in UTC.
+    
+    Args:
+        df: DataFrame to hash
+        columns: Columns that make up the row identity
+    
+    Returns:
+        uint64 array with one hash per row
+    """
+    key = pd.DataFrame({col: _normalize_key_column(df[col]) for col in columns}, index=df.index)
+    return pd.util.hash_pandas_object(key, index=False).to_numpy()
+
+
+def _normalize_key_column(series: pd.Series) -> pd.Series:
+    """Cast a key column to one dtype per kind of value."""
+    dtype = series.dtype
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        if getattr(dtype, 'tz', None) is not None:
+            series = series.dt.tz_convert('UTC').dt.tz_localize(None)
+        return pd.Series(series.to_numpy(dtype='datetime64[ns]').view(np.int64), index=series.index)
+    if pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype):
+        return pd.Series(series.to_numpy(dtype=np.float64, na_value=np.nan), index=series.index)
+    return series
+
+
+def null_column(dtype, length: int) -> pd.Series:
+    """
+    Build an all-missing column that concatenates cleanly with ``dtype``.
+    
+    Args:
+        dtype: Dtype of the columns it will be concatenated with
+        length: Number of rows
+    
+    Returns:
+        Series of missing values
+    """
+    if isinstance(dtype, pd.CategoricalDtype):
+        return pd.Series(pd.Categorical([None] * length))
+    if pd.api.types.is_bool_dtype(dtype):
+        dtype = 'boolean'
+    elif pd.api.types.is_integer_dtype(dtype) and not pd.api.types.is_extension_array_dtype(dtype):
+        dtype = dtype.name.capitalize()
+    return pd.Series(pd.array([None] * length, dtype=dtype))
+
+
+def concat_column(pieces: List[pd.Series]) -> pd.Series:
+    """
+    Concatenate the pieces of one column, preserving categorical dtypes.
+    
+    ``pd.concat`` falls back to object dtype when categoricals have different
+    categories, so categorical pieces are combined with union_categoricals.
+    
+    Args:
+        pieces: Series holding consecutive rows of the same column
+    
+    Returns:
+        Concatenated Series with a fresh RangeIndex
+    """
+    if len(pieces) > 1 and all(isinstance(piece.dtype, pd.CategoricalDtype) for piece in pieces):
+        return pd.Series(union_categoricals(pieces, ignore_order=True))
+    return pd.concat(pieces, ignore_index=True)
+
+
+def concat_frames(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Concatenate frames column by column, preserving schema dtypes.
+    
+    Args:
+        frames: DataFrames to stack, possibly with different columns
+    
+    Returns:
+        Single DataFrame with a fresh RangeIndex
+    """
+    columns = list(dict.fromkeys(col for frame in frames for col in frame.columns))
+    data = {}
+    for col in columns:
+        dtype = next(frame[col].dtype for frame in frames if col in frame.columns)
+        data[col] = concat_column([
+            frame[col] if col in frame.columns else null_column(dtype, len(frame))
+            for frame in frames
+        ])
+    return pd.DataFrame(data, copy=False)
\ No newline at end of file
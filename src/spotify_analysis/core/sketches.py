@@ -0,0 +1,703 @@
+"""
+Mergeable streaming sketches of Spotify plays.
+
+This module summarizes plays in bounded memory for approximate analytics:
+HyperLogLog sketches count distinct values, Space-Saving summaries keep the
+most played values with per-value error bounds, and t-digests estimate
+quantiles. Every sketch can be updated batch by batch and merged with a
+sketch of the same kind, so sketches built over separate files,
+partitions or incremental loads combine into a sketch of all the plays.
+Sketches are saved to and loaded from ``.npz`` files of plain arrays.
+"""
+
+import os
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Sequence, Union
+import logging
+
+from .data_transformer import SpotifyDataTransformer
+
+logger = logging.getLogger(__name__)
+
+# Value columns summarized by distinct counts and top values
+SKETCHED_COLUMNS = {
+    "artists": "master_metadata_album_artist_name",
+    "tracks": "master_metadata_track_name"
+}
+
+# Numeric columns summarized by quantiles
+QUANTILE_COLUMNS = ('ms_played', 'completion_percentage')
+
+# Loaded columns the sketches are derived from, and the per-row steps deriving
+# the sleep flag, time period and completion from them
+PLAY_COLUMNS = ('ts', 'ms_played', 'master_metadata_track_duration_ms') + tuple(SKETCHED_COLUMNS.values())
+_PLAY_STEPS = ('process_timestamps', 'process_duration')
+
+# Rows sketched per batch, bounding the temporary memory of an update
+_SKETCH_CHUNK_ROWS = 1_000_000
+
+# Bias-correction constant of the HyperLogLog estimate, 1 / (2 ln 2)
+_HLL_ALPHA = 1 / (2 * np.log(2))
+
+
+def _hash_values(values: pd.Series) -> np.ndarray:
+    """Hash non-missing values to uint64, equally for object and categorical columns."""
+    # Repeated values are hashed once; the factorization only spans the batch
+    return pd.util.hash_pandas_object(values.dropna(), index=False).to_numpy()
+
+
+def _bit_length(values: np.ndarray) -> np.ndarray:
+    """Number of significant bits of each uint64 value (0 for 0)."""
+    # Halves of 32 bits convert to float64 exactly, so frexp gives exact exponents
+    high = np.frexp((values >> np.uint64(32)).astype(np.float64))[1]
+    low = np.frexp((values & np.uint64(0xFFFFFFFF)).astype(np.float64))[1]
+    return np.where(high > 0, high + 32, low)
+
+
+class HyperLogLog:
+    """
+    HyperLogLog sketch counting distinct values.
+    
+    Each value is hashed to 64 bits; the leading ``precision`` bits pick a
+    register that keeps the longest run of leading zeros seen in the
+    remaining bits. Registers merge by their maximum. The count is
+    estimated with Ertl's improved estimator, which needs no empirical
+    bias tables, and has a relative standard error of about
+    1.04 / sqrt(2 ** precision).
+    """
+    
+    def __init__(self, precision: int = 14):
+        """
+        Initialize an empty sketch.
+        
+        Args:
+            precision: Number of hash bits selecting a register (4 to 18);
+                the sketch holds 2 ** precision one-byte registers
+        
+        Raises:
+            ValueError: If the precision is out of range
+        """
+        if not 4 <= precision <= 18:
+            raise ValueError(f"HyperLogLog precision must be between 4 and 18, got {precision}")
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+    
+    @property
+    def relative_error(self) -> float:
+        """Relative standard error of the estimate."""
+        return 1.04 / np.sqrt(len(self.registers))
+    
+    def update(self, values: pd.Series) -> 'HyperLogLog':
+        """
+        Add values in batches of bounded size; missing values are skipped.
+        
+        Args:
+            values: Values to count
+        
+        Returns:
+            The sketch itself
+        """
+        for start in range(0, len(values), _SKETCH_CHUNK_ROWS):
+            self._add_hashes(_hash_values(values.iloc[start:start + _SKETCH_CHUNK_ROWS]))
+        return self
+    
+    def _add_hashes(self, hashes: np.ndarray) -> None:
+        """Raise the registers to the ranks of a batch of hashes."""
+        if not len(hashes):
+            return
+        bits = 64 - self.precision
+        index = (hashes >> np.uint64(bits)).astype(np.int64)
+        rest = hashes & np.uint64((1 << bits) - 1)
+        rank = bits + 1 - _bit_length(rest)
+        
+        # Largest rank per register: ranks fit in 6 bits, so the sorted
+        # distinct (register, rank) keys end each register with its maximum
+        keys = np.unique(index * 64 + rank)
+        index, rank = keys >> 6, keys & 63
+        last = np.append(index[1:] != index[:-1], True)
+        index, rank = index[last], rank[last].astype(np.uint8)
+        self.registers[index] = np.maximum(self.registers[index], rank)
+    
+    def merge(self, other: 'HyperLogLog') -> 'HyperLogLog':
+        """
+        Merge another sketch into this one.
+        
+        Args:
+            other: Sketch with the same precision
+        
+        Returns:
+            The sketch itself
+        
+        Raises:
+            ValueError: If the precisions differ
+        """
+        if other.precision != self.precision:
+            raise ValueError(f"Cannot merge HyperLogLog sketches of precision {self.precision} and {other.precision}")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+    
+    def estimate(self) -> float:
+        """Estimated number of distinct values."""
+        registers = len(self.registers)
+        bits = 64 - self.precision
+        histogram = np.bincount(self.registers, minlength=bits + 2).astype(np.float64)
+        if histogram[0] == registers:
+            return 0.0
+        
+        z = registers * _tau(1 - histogram[bits + 1] / registers)
+        for rank in range(bits, 0, -1):
+            z = 0.5 * (z + histogram[rank])
+        z += registers * _sigma(histogram[0] / registers)
+        return _HLL_ALPHA * registers * registers / z
+    
+    def summary(self) -> Dict[str, float]:
+        """Estimate with its relative standard error."""
+        return {"estimate": int(round(self.estimate())), "relative_error": self.relative_error}
+    
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """State of the sketch as arrays."""
+        return {"registers": self.registers}
+    
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray]) -> 'HyperLogLog':
+        """Rebuild a sketch from the arrays of ``to_arrays``."""
+        registers = np.asarray(arrays["registers"], dtype=np.uint8)
+        sketch = cls(int(len(registers)).bit_length() - 1)
+        sketch.registers = registers.copy()
+        return sketch
+
+
+def _sigma(x: float) -> float:
+    """Sigma series of Ertl's estimator, correcting for empty registers."""
+    if x == 1:
+        return np.inf
+    y = 1.0
+    z = x
+    while True:
+        x *= x
+        previous = z
+        z += x * y
+        y += y
+        if z == previous:
+            return z
+
+
+def _tau(x: float) -> float:
+    """Tau series of Ertl's estimator, correcting for saturated registers."""
+    if x == 0 or x == 1:
+        return 0.0
+    y = 1.0
+    z = 1 - x
+    while True:
+        x = np.sqrt(x)
+        previous = z
+        y *= 0.5
+        z -= (1 - x) ** 2 * y
+        if z == previous:
+            return z / 3
+
+
+class SpaceSaving:
+    """
+    Space-Saving summary of the most frequent values.
+    
+    At most ``capacity`` values are tracked, each with an upper bound on
+    its count and the amount that bound may overcount; ``floor`` bounds the
+    count of any value that is not tracked. Each batch of values is
+    summarized exactly and merged in, and merging adds the counts of both summaries, using the
+    other summary's floor for values it does not track, before keeping the
+    largest. With at most ``capacity`` distinct values the counts are exact.
+    """
+    
+    def __init__(self, capacity: int = 1000):
+        """
+        Initialize an empty summary.
+        
+        Args:
+            capacity: Number of values tracked
+        """
+        self.capacity = capacity
+        self.counts = pd.Series(dtype=np.int64)
+        self.errors = pd.Series(dtype=np.int64)
+        self.floor = 0
+        self.total = 0
+    
+    @property
+    def max_error(self) -> int:
+        """Largest overcount of any reported or untracked value's count."""
+        return int(max(self.floor, self.errors.max() if len(self.errors) else 0))
+    
+    def update(self, values: pd.Series) -> 'SpaceSaving':
+        """
+        Add values in batches of bounded size; missing values are skipped.
+        
+        Args:
+            values: Values to count
+        
+        Returns:
+            The summary itself
+        """
+        for start in range(0, len(values), _SKETCH_CHUNK_ROWS):
+            counts = values.iloc[start:start + _SKETCH_CHUNK_ROWS].value_counts(dropna=True)
+            counts = counts[counts > 0].astype(np.int64)
+            counts.index = counts.index.astype(object)
+            batch = SpaceSaving(self.capacity)
+            batch.total = int(counts.sum())
+            batch.counts = counts.iloc[:self.capacity]
+            batch.errors = pd.Series(0, index=batch.counts.index, dtype=np.int64)
+            batch.floor = int(counts.iloc[self.capacity]) if len(counts) > self.capacity else 0
+            self.merge(batch)
+        return self
+    
+    def merge(self, other: 'SpaceSaving') -> 'SpaceSaving':
+        """
+        Merge another summary into this one.
+        
+        Args:
+            other: Summary of other plays
+        
+        Returns:
+            The summary itself
+        """
+        index = self.counts.index.union(other.counts.index, sort=False)
+        counts = (self.counts.reindex(index, fill_value=self.floor).to_numpy()
+                  + other.counts.reindex(index, fill_value=other.floor).to_numpy())
+        errors = (self.errors.reindex(index, fill_value=self.floor).to_numpy()
+                  + other.errors.reindex(index, fill_value=other.floor).to_numpy())
+        
+        order = np.argsort(-counts, kind='stable')
+        kept, dropped = order[:self.capacity], order[self.capacity:]
+        self.floor += other.floor
+        if len(dropped):
+            self.floor = max(self.floor, int(counts[dropped].max()))
+        self.counts = pd.Series(counts[kept], index=index[kept], dtype=np.int64)
+        self.errors = pd.Series(errors[kept], index=index[kept], dtype=np.int64)
+        self.total += other.total
+        return self
+    
+    def top(self, n: Optional[int] = None) -> pd.DataFrame:
+        """
+        Most frequent values.
+        
+        Args:
+            n: Number of values (all tracked values if None)
+        
+        Returns:
+            DataFrame indexed by value, in descending count order, with the
+            count upper bound and its possible overcount; the true count
+            lies in [count - error, count]
+        """
+        top = pd.DataFrame({"count": self.counts, "error": self.errors})
+        return top if n is None else top.head(n)
+    
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """State of the summary as arrays; tracked values are kept as strings."""
+        return {
+            "values": self.counts.index.to_numpy(dtype=str),
+            "counts": self.counts.to_numpy(),
+            "errors": self.errors.to_numpy(),
+            "scalars": np.array([self.capacity, self.floor, self.total], dtype=np.int64)
+        }
+    
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray]) -> 'SpaceSaving':
+        """Rebuild a summary from the arrays of ``to_arrays``."""
+        capacity, floor, total = (int(value) for value in arrays["scalars"])
+        summary = cls(capacity)
+        index = pd.Index(arrays["values"].tolist(), dtype=object)
+        summary.counts = pd.Series(arrays["counts"], index=index, dtype=np.int64)
+        summary.errors = pd.Series(arrays["errors"], index=index, dtype=np.int64)
+        summary.floor = floor
+        summary.total = total
+        return summary
+
+
+class TDigest:
+    """
+    Merging t-digest estimating quantiles.
+    
+    Values are kept as weighted centroids. When there are more centroids
+    than ``compression``, they are sorted and the ones in the same unit of
+    the arcsine scale function over their quantile are merged, in one
+    vectorized pass. The scale keeps centroids small near the extremes, so
+    tail quantiles are estimated more accurately than the median. Digests
+    merge by pooling their centroids.
+    """
+    
+    def __init__(self, compression: float = 200):
+        """
+        Initialize an empty digest.
+        
+        Args:
+            compression: Accuracy parameter; a compressed digest holds about
+                compression / 2 centroids
+        """
+        self.compression = compression
+        self.means = np.empty(0, dtype=np.float64)
+        self.weights = np.empty(0, dtype=np.float64)
+        self.min = np.inf
+        self.max = -np.inf
+    
+    @property
+    def total(self) -> float:
+        """Number of values in the digest."""
+        return float(self.weights.sum())
+    
+    def update(self, values: Union[pd.Series, np.ndarray]) -> 'TDigest':
+        """
+        Add values in batches of bounded size; missing values are skipped.
+        
+        Args:
+            values: Numeric values
+        
+        Returns:
+            The digest itself
+        """
+        values = pd.Series(values)
+        for start in range(0, len(values), _SKETCH_CHUNK_ROWS):
+            batch = values.iloc[start:start + _SKETCH_CHUNK_ROWS].to_numpy(dtype=np.float64, na_value=np.nan)
+            batch = batch[~np.isnan(batch)]
+            if not len(batch):
+                continue
+            self.min = min(self.min, float(batch.min()))
+            self.max = max(self.max, float(batch.max()))
+            self._add(batch, np.ones(len(batch)))
+        return self
+    
+    def merge(self, other: 'TDigest') -> 'TDigest':
+        """
+        Merge another digest into this one.
+        
+        Args:
+            other: Digest of other values
+        
+        Returns:
+            The digest itself
+        """
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self._add(other.means, other.weights)
+    
+    def _add(self, means: np.ndarray, weights: np.ndarray) -> 'TDigest':
+        """Pool centroids and compress them if there are too many."""
+        means = np.concatenate([self.means, means])
+        weights = np.concatenate([self.weights, weights])
+        order = np.argsort(means, kind='stable')
+        means, weights = means[order], weights[order]
+        
+        if len(means) > self.compression:
+            # Merge centroids whose midpoint quantiles share a unit of the
+            # k1 scale k(q) = compression / (2 pi) * asin(2q - 1)
+            cumulative = np.cumsum(weights)
+            quantiles = (cumulative - weights / 2) / cumulative[-1]
+            units = np.floor(self.compression / (2 * np.pi) * np.arcsin(2 * quantiles - 1))
+            starts = np.flatnonzero(np.diff(units, prepend=units[0] - 1))
+            merged = np.add.reduceat(weights, starts)
+            means = np.add.reduceat(means * weights, starts) / merged
+            weights = merged
+        
+        self.means, self.weights = means, weights
+        return self
+    
+    def _rank(self, q: float) -> float:
+        """Rank of quantile ``q`` among centroid centers, matching linear interpolation."""
+        return q * (self.total - 1) + 0.5
+    
+    def quantile(self, q: float) -> float:
+        """
+        Estimate a quantile, interpolating linearly between centroid centers.
+        
+        Args:
+            q: Quantile between 0 and 1
+        
+        Returns:
+            The estimated value, NaN for an empty digest
+        """
+        if not len(self.weights):
+            return np.nan
+        centers = np.cumsum(self.weights) - self.weights / 2
+        ranks = np.concatenate([[0], centers, [self.total]])
+        values = np.concatenate([[self.min], self.means, [self.max]])
+        return float(np.interp(self._rank(q), ranks, values))
+    
+    def rank_error(self, q: float) -> float:
+        """
+        Estimated rank error of a quantile estimate.
+        
+        The values merged into the centroid nearest the quantile's rank
+        could lie anywhere within it, so half its share of the values is
+        reported (0 while it holds a single value).
+        
+        Args:
+            q: Quantile between 0 and 1
+        
+        Returns:
+            Estimated error as a fraction of the values
+        """
+        if not len(self.weights):
+            return np.nan
+        centers = np.cumsum(self.weights) - self.weights / 2
+        nearest = int(np.argmin(np.abs(centers - self._rank(q))))
+        return float((self.weights[nearest] - 1) / (2 * self.total))
+    
+    def summary(self, quantiles: Sequence[float] = (0.5, 0.9, 0.99)) -> Dict[str, Dict[str, float]]:
+        """Estimates of several quantiles, keyed like 'p50', with their rank errors."""
+        return {
+            f"p{q * 100:g}": {"value": self.quantile(q), "rank_error": self.rank_error(q)}
+            for q in quantiles
+        }
+    
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """State of the digest as arrays."""
+        return {
+            "means": self.means,
+            "weights": self.weights,
+            "scalars": np.array([self.compression, self.min, self.max], dtype=np.float64)
+        }
+    
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray]) -> 'TDigest':
+        """Rebuild a digest from the arrays of ``to_arrays``."""
+        compression, low, high = (float(value) for value in arrays["scalars"])
+        digest = cls(compression)
+        digest.means = np.asarray(arrays["means"], dtype=np.float64).copy()
+        digest.weights = np.asarray(arrays["weights"], dtype=np.float64).copy()
+        digest.min, digest.max = low, high
+        return digest
+
+
+class PlaySketches:
+    """
+    Sketches of plays for approximate analytics.
+    
+    Holds a HyperLogLog sketch and a Space-Saving summary per column of
+    SKETCHED_COLUMNS (keyed 'artists' and 'tracks'), Space-Saving summaries
+    of the sleep-time plays (keyed 'sleep_artists' and 'sleep_tracks')
+    when plays have an is_sleep_time column, a Space-Saving summary of the
+    artists played in each time period when plays have a time_period
+    column, and a t-digest per column of QUANTILE_COLUMNS.
+    """
+    
+    def __init__(self, precision: int = 14, capacity: int = 1000, compression: float = 200):
+        """
+        Initialize empty sketches.
+        
+        Args:
+            precision: HyperLogLog precision
+            capacity: Values tracked by each Space-Saving summary
+            compression: t-digest compression
+        """
+        self.records = 0
+        self.capacity = capacity
+        self.distinct = {name: HyperLogLog(precision) for name in SKETCHED_COLUMNS}
+        self.top = {
+            key: SpaceSaving(capacity)
+            for name in SKETCHED_COLUMNS for key in (name, f"sleep_{name}")
+        }
+        self.quantiles = {column: TDigest(compression) for column in QUANTILE_COLUMNS}
+        self.period_artists: Dict[str, SpaceSaving] = {}
+    
+    @classmethod
+    def from_frames(cls, frames: Iterable[pd.DataFrame], **options) -> 'PlaySketches':
+        """
+        Sketch a sequence of frames, such as files or time-ordered chunks.
+        
+        Args:
+            frames: DataFrames of transformed plays, e.g. from
+                ``ChunkedTransformer.iter_parts``
+            **options: Sketch sizes passed to the constructor
+        
+        Returns:
+            Sketches of all the plays
+        """
+        sketches = cls(**options)
+        for frame in frames:
+            sketches.update(frame)
+        return sketches
+    
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, **options) -> 'PlaySketches':
+        """
+        Sketch a frame of plays.
+        
+        Args:
+            df: DataFrame of plays
+            **options: Sketch sizes passed to the constructor
+        
+        Returns:
+            Sketches of the plays
+        """
+        return cls(**options).update(df)
+    
+    @classmethod
+    def from_plays(cls, df: pd.DataFrame, **options) -> 'PlaySketches':
+        """
+        Sketch loaded, untransformed plays in batches of bounded size.
+        
+        The sleep flag, time period and completion of each batch are
+        derived with the default options of ``SpotifyDataTransformer``, so
+        the sketches describe the plays as transformed with those defaults.
+        
+        Args:
+            df: DataFrame of loaded plays; only PLAY_COLUMNS are read
+            **options: Sketch sizes passed to the constructor
+        
+        Returns:
+            Sketches of the plays
+        """
+        sketches = cls(**options)
+        plays = df[[col for col in PLAY_COLUMNS if col in df.columns]]
+        for start in range(0, len(plays), _SKETCH_CHUNK_ROWS):
+            transformer = SpotifyDataTransformer(plays.iloc[start:start + _SKETCH_CHUNK_ROWS], copy=False)
+            for step in _PLAY_STEPS:
+                transformer.df = getattr(transformer, step)()
+            sketches.update(transformer.df)
+        return sketches
+    
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> 'PlaySketches':
+        """
+        Load sketches saved with ``save``.
+        
+        Args:
+            path: Path of the ``.npz`` file
+        
+        Returns:
+            The loaded sketches
+        
+        Raises:
+            OSError: If the file cannot be read
+            KeyError: If the file does not hold saved sketches
+        """
+        states: Dict[str, Dict[str, Dict[str, np.ndarray]]] = {}
+        with np.load(path, allow_pickle=False) as arrays:
+            records = int(arrays["records"])
+            period_labels = arrays["period_labels"].tolist()
+            for name in arrays.files:
+                if name.count('.') == 2:
+                    group, key, field = name.split('.')
+                    states.setdefault(group, {}).setdefault(key, {})[field] = arrays[name]
+        
+        sketches = cls()
+        sketches.records = records
+        sketches.distinct = {name: HyperLogLog.from_arrays(state) for name, state in states["distinct"].items()}
+        sketches.top = {key: SpaceSaving.from_arrays(state) for key, state in states["top"].items()}
+        sketches.quantiles = {column: TDigest.from_arrays(state) for column, state in states["quantiles"].items()}
+        sketches.period_artists = {
+            label: SpaceSaving.from_arrays(states["periods"][str(position)])
+            for position, label in enumerate(period_labels)
+        }
+        sketches.capacity = next(iter(sketches.top.values())).capacity
+        return sketches
+    
+    def save(self, path: Union[str, Path]) -> None:
+        """
+        Save the sketches to an ``.npz`` file, replacing it atomically.
+        
+        Args:
+            path: Path of the file to write
+        """
+        groups = {
+            "distinct": self.distinct,
+            "top": self.top,
+            "quantiles": self.quantiles,
+            "periods": {str(position): summary for position, summary in enumerate(self.period_artists.values())}
+        }
+        arrays = {
+            "records": np.array(self.records, dtype=np.int64),
+            "period_labels": np.array(list(self.period_artists), dtype=str)
+        }
+        for group, sketches in groups.items():
+            for key, sketch in sketches.items():
+                for field, array in sketch.to_arrays().items():
+                    arrays[f"{group}.{key}.{field}"] = array
+        
+        path = Path(path)
+        tmp_path = path.with_name(f"{path.name}.tmp")
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, path)
+    
+    def preferred_periods(self, artists: pd.Index) -> pd.Series:
+        """
+        Time period with the most plays of each artist.
+        
+        Like ``AggregationCube.top_values``, only periods with plays are
+        candidates and ties go to the first period; an artist that a
+        period's summary does not track counts as not played in it.
+        
+        Args:
+            artists: Artists to look up
+        
+        Returns:
+            Preferred time period indexed by the artists played in any period
+        """
+        counts = pd.DataFrame(
+            {period: summary.counts.reindex(artists, fill_value=0) for period, summary in self.period_artists.items()},
+            index=artists
+        )
+        counts = counts[counts.sum(axis=1) > 0]
+        if counts.empty:
+            return pd.Series(index=counts.index, dtype=object, name='time_period')
+        return counts.idxmax(axis=1).rename('time_period')
+    
+    def update(self, df: pd.DataFrame) -> 'PlaySketches':
+        """
+        Add a batch of plays.
+        
+        Args:
+            df: DataFrame of plays
+        
+        Returns:
+            The sketches themselves
+        """
+        self.records += len(df)
+        sleep = df['is_sleep_time'].to_numpy(dtype=bool) if 'is_sleep_time' in df.columns else None
+        for name, column in SKETCHED_COLUMNS.items():
+            if column not in df.columns:
+                continue
+            self.distinct[name].update(df[column])
+            self.top[name].update(df[column])
+            if sleep is not None:
+                self.top[f"sleep_{name}"].update(df[column][sleep])
+        
+        artist_column = SKETCHED_COLUMNS["artists"]
+        if artist_column in df.columns and 'time_period' in df.columns:
+            periods = df['time_period']
+            if isinstance(periods.dtype, pd.CategoricalDtype):
+                labels = periods.cat.categories
+            else:
+                labels = periods.dropna().unique()
+            for label in labels:
+                played = (periods == label).to_numpy()
+                if played.any():
+                    summary = self.period_artists.setdefault(label, SpaceSaving(self.capacity))
+                    summary.update(df[artist_column][played])
+        
+        for column, digest in self.quantiles.items():
+            if column in df.columns:
+                digest.update(df[column])
+        return self
+    
+    def merge(self, other: 'PlaySketches') -> 'PlaySketches':
+        """
+        Merge sketches of other plays, e.g. of another file, partition or load.
+        
+        Args:
+            other: Sketches built with the same sizes
+        
+        Returns:
+            The sketches themselves
+        """
+        self.records += other.records
+        for name, sketch in self.distinct.items():
+            sketch.merge(other.distinct[name])
+        for key, summary in self.top.items():
+            summary.merge(other.top[key])
+        for column, digest in self.quantiles.items():
+            digest.merge(other.quantiles[column])
+        for period, summary in other.period_artists.items():
+            self.period_artists.setdefault(period, SpaceSaving(self.capacity)).merge(summary)
+        return self
\ No newline at end of file
@@ -0,0 +1,142 @@
+"""
+External merge sort of streaming history batches.
+
+This module spills time-sorted runs of plays to disk and merges them back
+into time-ordered chunks, so histories larger than memory can be
+processed in order.
+"""
+
+import pickle
+import pandas as pd
+from pathlib import Path
+from typing import Iterable, Iterator, List
+import logging
+
+from .schema import concat_frames
+
+logger = logging.getLogger(__name__)
+
+
+def spill_sorted_runs(batches: Iterable[pd.DataFrame], spill_dir: Path, block_rows: int,
+                      sort_column: str = 'ts') -> List[Path]:
+    """
+    Sort batches and write them to disk as sorted runs.
+    
+    Consecutive batches that continue in order are appended to the same
+    run, so an export that is already in time order becomes a single run.
+    Each run is stored as a sequence of pickled blocks of ``block_rows``
+    rows that can be read back one at a time.
+    
+    Args:
+        batches: DataFrames in arrival order
+        spill_dir: Directory for the run files
+        block_rows: Rows per stored block
+        sort_column: Column to order by
+    
+    Returns:
+        Paths of the run files
+    """
+    runs = []
+    handle = None
+    last_value = None
+    dropped_count = 0
+    
+    try:
+        for batch in batches:
+            missing = batch[sort_column].isna()
+            if missing.any():
+                dropped_count += int(missing.sum())
+                batch = batch[~missing]
+            if not len(batch):
+                continue
+            
+            batch = batch.sort_values(sort_column, kind='stable', ignore_index=True)
+            if handle is None or batch[sort_column].iloc[0] < last_value:
+                if handle is not None:
+                    handle.close()
+                path = spill_dir / f"run-{len(runs):05d}.pkl"
+                handle = open(path, 'wb')
+                runs.append(path)
+            
+            for start in range(0, len(batch), block_rows):
+                pickle.dump(batch.iloc[start:start + block_rows], handle, protocol=pickle.HIGHEST_PROTOCOL)
+            last_value = batch[sort_column].iloc[-1]
+    finally:
+        if handle is not None:
+            handle.close()
+    
+    if dropped_count:
+        logger.warning(f"Skipped {dropped_count} records without a {sort_column} value")
+    logger.info(f"Spilled {len(runs)} sorted runs to {spill_dir}")
+    return runs
+
+
+def _iter_run_blocks(path: Path) -> Iterator[pd.DataFrame]:
+    """Read the blocks of one run file in order."""
+    with open(path, 'rb') as f:
+        while True:
+            try:
+                yield pickle.load(f)
+            except EOFError:
+                return
+
+
+def merge_sorted_runs(runs: List[Path], chunk_rows: int, sort_column: str = 'ts') -> Iterator[pd.DataFrame]:
+    """
+    Merge sorted runs into ordered chunks of ``chunk_rows`` rows.
+    
+    Only one block per run is held in memory. Each round takes, from every
+    run, the rows up to the smallest last value among the current blocks;
+    no unread row can sort before that bound, so the rows taken can be
+    ordered and emitted immediately.
+    
+    Args:
+        runs: Run files written by ``spill_sorted_runs``
+        chunk_rows: Rows per emitted chunk (the last chunk may be smaller)
+        sort_column: Column the runs are ordered by
+    
+    Yields:
+        DataFrames in non-decreasing ``sort_column`` order
+    """
+    readers = [_iter_run_blocks(path) for path in runs]
+    heads = [[reader, next(reader, None)] for reader in readers]
+    heads = [head for head in heads if head[1] is not None]
+    pending: List[pd.DataFrame] = []
+    pending_rows = 0
+    
+    try:
+        while heads:
+            bound = min(block[sort_column].iloc[-1] for _, block in heads)
+            
+            pieces = []
+            for head in heads:
+                cut = head[1][sort_column].searchsorted(bound, side='right')
+                if cut:
+                    pieces.append(head[1].iloc[:cut])
+                    head[1] = head[1].iloc[cut:]
+            
+            for head in heads:
+                if not len(head[1]):
+                    head[1] = next(head[0], None)
+            heads = [head for head in heads if head[1] is not None]
+            
+            if len(pieces) == 1:
+                merged = pieces[0].reset_index(drop=True)
+            else:
+                merged = concat_frames(pieces).sort_values(sort_column, kind='stable', ignore_index=True)
+            pending.append(merged)
+            pending_rows += len(merged)
+            
+            while pending_rows >= chunk_rows:
+                buffer = concat_frames(pending) if len(pending) > 1 else pending[0]
+                yield buffer.iloc[:chunk_rows].reset_index(drop=True)
+                rest = buffer.iloc[chunk_rows:]
+                pending = [rest] if len(rest) else []
+                pending_rows = len(rest)
+        
+        if pending_rows:
+            buffer = concat_frames(pending) if len(pending) > 1 else pending[0]
+            yield buffer.reset_index(drop=True)
+    finally:
+        for reader in readers:
+            reader.close()
\ No newline at end of file
@@ -3,6 +3,7 @@ Tests for the data loader module.
 """
 
 import pytest
+import numpy as np
 import pandas as pd
 from pathlib import Path
 import tempfile
@@ -13,7 +14,8 @@ import os
 import sys
 sys.path.append(str(Path(__file__).parent.parent / "src"))
 
-from spotify_analysis.core.data_loader import SpotifyDataLoader
+from spotify_analysis.core import data_loader
+from spotify_analysis.core.data_loader import SpotifyDataLoader, iter_json_records
 
 
 class TestSpotifyDataLoader:
@@ -96,6 +98,435 @@ class TestSpotifyDataLoader:
         assert "ms_played" in info["columns"]
         assert info["unique_tracks"] == 2
         assert info["unique_artists"] == 2
+        
+        info = loader.get_data_info(test_data, approximate=True)
+        assert info["unique_tracks"] == 2
+        assert info["approximation"]["unique_artists"]["relative_error"] < 0.01
+        assert info["ms_played_quantiles"]["p50"]["value"] == 210000
+
+    
+    def test_profile_data(self):
+        """Test the single-pass profile, exact and sampled."""
+        from spotify_analysis.core.data_loader import profile_data
+        
+        df = pd.DataFrame({
+            'ts': pd.to_datetime(['2023-01-01T10:00:00Z', '2023-01-03T11:00:00Z', None, '2023-01-02T09:00:00Z'] * 250),
+            'ms_played': [1000, 5000, 3000, None] * 250,
+            'master_metadata_track_name': pd.Categorical(['A', 'B', None, 'A'] * 250)
+        })
+        
+        profile = profile_data(df)
+        assert profile["total_records"] == 1000
+        assert profile["sampled"] is False
+        assert profile["timestamps"]["valid"] is True
+        assert profile["timestamps"]["start"] == pd.Timestamp('2023-01-01T10:00:00Z')
+        assert profile["timestamps"]["end"] == pd.Timestamp('2023-01-03T11:00:00Z')
+        assert profile["columns"]["ms_played"]["nulls"] == 250
+        assert profile["columns"]["ms_played"]["min"] == 1000
+        assert profile["columns"]["ms_played"]["max"] == 5000
+        assert profile["columns"]["master_metadata_track_name"]["unique"] == 2
+        
+        sampled = profile_data(df, sample_rows=400)
+        assert sampled["sampled"] is True
+        assert sampled["profiled_records"] == 400
+        assert 0 < sampled["columns"]["ms_played"]["nulls"] < 1000
+        
+        strings = pd.DataFrame({'ts': ['2023-01-01T10:00:00Z', 'not a date', None]})
+        timestamps = profile_data(strings)["timestamps"]
+        assert timestamps["valid"] is False
+        assert timestamps["invalid"] == 1
+        assert SpotifyDataLoader().validate_data(strings)["data_types"]["timestamp"] == "invalid"
+    
+    def test_iter_json_records_across_chunk_boundaries(self):
+        """Test incremental decoding when records straddle read chunks."""
+        import io
+        
+        test_data = [
+            {"ts": "2023-01-01T10:00:00Z", "ms_played": 180000, "track": "Track, with [brackets]"},
+            {"ts": "2023-01-01T11:00:00Z", "ms_played": 240000, "track": None},
+            {"ts": "2023-01-01T12:00:00Z", "ms_played": 1, "shuffle": True}
+        ]
+        text = json.dumps(test_data, indent=2)
+        
+        for chunk_chars in (1, 7, 64, len(text) + 1):
+            records = list(iter_json_records(io.StringIO(text), chunk_chars=chunk_chars))
+            assert records == test_data
+        
+        assert list(iter_json_records(io.StringIO("[]"))) == []
+        assert list(iter_json_records(io.StringIO('{"ts": "x"}'))) == [{"ts": "x"}]
+    
+    def test_streaming_load_matches_eager_load(self):
+        """Test that streaming mode builds the same frame as eager loading."""
+        loader = SpotifyDataLoader()
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            for index in range(3):
+                records = [
+                    {"ts": f"2023-01-0{index + 1}T{hour:02d}:00:00Z", "ms_played": hour * 1000,
+                     "master_metadata_track_name": f"Track {hour}"}
+                    for hour in range(5)
+                ]
+                if index == 2:
+                    records[0]["skipped"] = True
+                with open(Path(temp_dir) / f"endsong_{index}.json", "w") as f:
+                    json.dump(records, f)
+            
+            files = sorted(Path(temp_dir).glob("*.json"))
+            eager = loader.load_from_files(files)
+            streamed = loader.load_from_files(files, streaming=True, batch_rows=2)
+            
+            batches = list(loader.iter_record_batches(files[0], batch_rows=2))
+        
+        assert [len(batch) for batch in batches] == [2, 2, 1]
+        pd.testing.assert_frame_equal(streamed, eager)
+
+    
+    def test_parallel_load_is_ordered_and_skips_bad_files(self):
+        """Test that worker pools keep file order and per-file error handling."""
+        loader = SpotifyDataLoader()
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            for index in range(4):
+                records = [{"ts": f"2023-01-0{index + 1}T00:00:00Z", "ms_played": index}]
+                with open(Path(temp_dir) / f"endsong_{index}.json", "w") as f:
+                    json.dump(records, f)
+            with open(Path(temp_dir) / "endsong_9.json", "w") as f:
+                f.write("[{not json")
+            
+            sequential = loader.load_from_directory(temp_dir)
+            threaded = loader.load_from_directory(temp_dir, workers=3, executor="thread")
+            processed = loader.load_from_directory(temp_dir, workers=2, streaming=True)
+        
+        assert list(sequential["ms_played"]) == [0, 1, 2, 3]
+        pd.testing.assert_frame_equal(threaded, sequential)
+        pd.testing.assert_frame_equal(processed, sequential)
+        
+        with pytest.raises(ValueError):
+            loader.load_from_files(["a.json", "b.json"], workers=2, executor="fiber")
+
+    
+    def test_cache_round_trip_and_invalidation(self):
+        """Test that warm loads come from the cache until a source changes."""
+        pytest.importorskip("pyarrow")
+        from unittest import mock
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            data_dir = Path(temp_dir) / "history"
+            data_dir.mkdir()
+            source = data_dir / "endsong_0.json"
+            with open(source, "w") as f:
+                json.dump([{"ts": "2023-01-01T10:00:00Z", "ms_played": 1000}], f)
+            
+            loader = SpotifyDataLoader(data_dir, cache_dir=Path(temp_dir) / "cache")
+            cold = loader.load_from_directory()
+            
+            with mock.patch("spotify_analysis.core.data_loader._read_file_frame") as parse:
+                warm = loader.load_from_directory()
+                parse.assert_not_called()
+            pd.testing.assert_frame_equal(warm, cold)
+            
+            # Other load options of the same files do not evict each other
+            windowed = SpotifyDataLoader(data_dir, cache_dir=Path(temp_dir) / "cache", since="2023-01-01")
+            windowed.load_from_directory()
+            with mock.patch("spotify_analysis.core.data_loader._read_file_frame") as parse:
+                loader.load_from_directory()
+                windowed.load_from_directory()
+                parse.assert_not_called()
+            assert len(list((Path(temp_dir) / "cache").glob("*.feather"))) == 2
+            
+            with open(source, "w") as f:
+                json.dump([{"ts": "2023-01-01T10:00:00Z", "ms_played": 2000}], f)
+            refreshed = loader.load_from_directory()
+            
+            assert list(refreshed["ms_played"]) == [2000]
+            assert len(list((Path(temp_dir) / "cache").glob("*.feather"))) == 1
+
+    
+    def test_incremental_load_parses_only_new_files(self):
+        """Test that incremental loads append deduplicated plays from new files."""
+        pytest.importorskip("pyarrow")
+        from unittest import mock
+        from spotify_analysis.core import data_loader
+        
+        def play(day, ms):
+            return {"ts": f"2023-01-{day:02d}T10:00:00Z", "spotify_track_uri": "spotify:track:a",
+                    "ms_played": ms}
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            data_dir = Path(temp_dir) / "history"
+            data_dir.mkdir()
+            with open(data_dir / "endsong_0.json", "w") as f:
+                json.dump([play(1, 100), play(2, 200), play(2, 200)], f)
+            
+            loader = SpotifyDataLoader(data_dir)
+            first = loader.load_incremental(Path(temp_dir) / "store")
+            assert len(first) == 2
+            
+            # A later export overlaps with the one already ingested
+            with open(data_dir / "endsong_1.json", "w") as f:
+                json.dump([play(2, 200), play(3, 300)], f)
+            
+            with mock.patch.object(data_loader, "_read_file_frame",
+                                   wraps=data_loader._read_file_frame) as parse:
+                second = loader.load_incremental(Path(temp_dir) / "store")
+                parsed = [Path(call.args[0]).name for call in parse.call_args_list]
+        
+        assert parsed == ["endsong_1.json"]
+        assert list(second["ms_played"]) == [100, 200, 300]
+    
+    def test_incremental_load_options_do_not_filter_the_store(self):
+        """Test that load options filter what is read back, not what is stored."""
+        pytest.importorskip("pyarrow")
+        records = [
+            {"ts": f"2023-01-{day:02d}T10:00:00Z", "spotify_track_uri": "spotify:track:a",
+             "ms_played": day * 100, "spotify_episode_uri": "spotify:episode:1" if day == 3 else None}
+            for day in range(1, 5)
+        ]
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with open(Path(temp_dir) / "endsong_0.json", "w") as f:
+                json.dump(records, f)
+            store_dir = Path(temp_dir) / "store"
+            
+            windowed = SpotifyDataLoader(
+                temp_dir, columns=["ms_played"], since="2023-01-02", exclude_podcasts=True
+            ).load_incremental(store_dir)
+            full = SpotifyDataLoader(temp_dir).load_incremental(store_dir)
+            direct = SpotifyDataLoader(temp_dir).load_from_directory()
+        
+        assert list(windowed.columns) == ["ms_played"]
+        assert list(windowed["ms_played"]) == [200, 400]
+        pd.testing.assert_frame_equal(full, direct)
+    
+    def test_store_sketches_are_saved_per_part_and_merged(self):
+        """Test that the store's per-part sketches merge into sketches of every play."""
+        pytest.importorskip("pyarrow")
+        from unittest import mock
+        from spotify_analysis.core import data_store
+        from spotify_analysis.core.sketches import PlaySketches
+        
+        def plays(days):
+            return [{"ts": f"2023-01-{day:02d}T{day % 24:02d}:00:00Z", "spotify_track_uri": f"spotify:track:{day % 3}",
+                     "master_metadata_track_name": f"Track {day % 3}", "master_metadata_album_artist_name": f"Artist {day % 2}",
+                     "master_metadata_track_duration_ms": 200000, "ms_played": day * 1000} for day in days]
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            data_dir = Path(temp_dir) / "history"
+            data_dir.mkdir()
+            store_dir = Path(temp_dir) / "store"
+            with open(data_dir / "endsong_0.json", "w") as f:
+                json.dump(plays(range(1, 11)), f)
+            loader = SpotifyDataLoader(data_dir)
+            loader.load_incremental(store_dir)
+            loader.load_store_sketches(store_dir)
+            
+            with open(data_dir / "endsong_1.json", "w") as f:
+                json.dump(plays(range(8, 21)), f)
+            data, sketches = data_loader.load_spotify_data(data_dir, store_dir=store_dir, with_sketches=True)
+            assert len(list(store_dir.glob("part-*.sketches.npz"))) == 2
+            
+            # Saved sketches are read back without reading the parts
+            with mock.patch.object(data_store.feather, "read_table", side_effect=AssertionError("part was read")):
+                reloaded = SpotifyDataLoader(data_dir).load_store_sketches(store_dir)
+            
+            windowed = SpotifyDataLoader(data_dir, since="2023-01-05").load_store_sketches(store_dir)
+            info = loader.get_data_info(data, approximate=True, sketches=sketches)
+        
+        expected = PlaySketches.from_plays(data)
+        assert len(data) == sketches.records == reloaded.records == 20
+        assert sketches.top['artists'].counts.to_dict() == expected.top['artists'].counts.to_dict()
+        assert reloaded.top['sleep_tracks'].counts.to_dict() == expected.top['sleep_tracks'].counts.to_dict()
+        assert sketches.preferred_periods(pd.Index(["Artist 0", "Artist 1"])).equals(
+            expected.preferred_periods(pd.Index(["Artist 0", "Artist 1"]))
+        )
+        assert windowed is None
+        assert info["unique_tracks"] == 3
+    
+    def test_store_key_hash_set(self):
+        """Test that the persisted key hashes reject duplicates without reading parts."""
+        pytest.importorskip("pyarrow")
+        from unittest import mock
+        from spotify_analysis.core.data_store import IncrementalDataStore
+        
+        def plays(days, platform):
+            return pd.DataFrame({
+                "ts": pd.to_datetime([f"2023-01-{day:02d}T10:00:00Z" for day in days]),
+                "spotify_track_uri": "spotify:track:a",
+                "ms_played": 1000,
+                "platform": platform
+            })
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            store = IncrementalDataStore(Path(temp_dir))
+            assert store.append(plays([1, 2], "ios")) == 2
+            assert (Path(temp_dir) / "key_hashes.npy").exists()
+            
+            # Same natural key from another platform is still a duplicate
+            with mock.patch.object(store, "read", side_effect=AssertionError("parts were read")):
+                assert store.append(plays([2, 3], "android")) == 1
+            
+            # A missing hash set is rebuilt from the parts
+            os.remove(Path(temp_dir) / "key_hashes.npy")
+            reopened = IncrementalDataStore(Path(temp_dir))
+            assert reopened.append(plays([1, 3, 4], "web")) == 1
+            assert list(reopened.read()["ts"].dt.day) == [1, 2, 3, 4]
+            
+            # Hashes of an older hash format are rebuilt, not trusted
+            manifest_path = Path(temp_dir) / "manifest.json"
+            manifest = json.loads(manifest_path.read_text())
+            del manifest["key"]["version"]
+            manifest_path.write_text(json.dumps(manifest))
+            np.save(Path(temp_dir) / "key_hashes.npy", np.arange(4, dtype=np.uint64))
+            outdated = IncrementalDataStore(Path(temp_dir))
+            assert outdated.append(plays([4, 5], "web")) == 1
+            assert list(outdated.read()["ts"].dt.day) == [1, 2, 3, 4, 5]
+            
+            # A batch with a missing ms_played loads it as nullable Int32
+            mixed = pd.concat([plays([5, 6], "web"), plays([7], "web")], ignore_index=True)
+            mixed["ms_played"] = pd.array([1000, 1000, None], dtype="Int32")
+            assert outdated.append(mixed) == 2
+            assert list(outdated.read()["ts"].dt.day) == [1, 2, 3, 4, 5, 6, 7]
+
+    
+    def test_schema_applied_while_loading(self):
+        """Test that loaded columns get the compact endsong dtypes."""
+        records = [
+            {"ts": "2023-01-01T10:00:00Z", "ms_played": 1000, "platform": "ios",
+             "master_metadata_album_artist_name": "Artist 1", "shuffle": True, "skipped": None},
+            {"ts": "2023-01-02T10:00:00Z", "ms_played": 2000, "platform": "ios",
+             "master_metadata_album_artist_name": "Artist 2", "shuffle": False, "skipped": True}
+        ]
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            for index, record in enumerate(records):
+                with open(Path(temp_dir) / f"endsong_{index}.json", "w") as f:
+                    json.dump([record], f)
+            
+            data = SpotifyDataLoader(temp_dir).load_from_directory(streaming=True)
+            raw = SpotifyDataLoader(temp_dir, schema=None).load_from_directory()
+        
+        assert str(data["ts"].dtype) == "datetime64[ns, UTC]"
+        assert data["ms_played"].dtype == "int32"
+        assert data["shuffle"].dtype == bool
+        assert data["skipped"].dtype == "boolean"
+        # Categories from different files are unioned, not degraded to object
+        assert isinstance(data["master_metadata_album_artist_name"].dtype, pd.CategoricalDtype)
+        assert list(data["master_metadata_album_artist_name"]) == ["Artist 1", "Artist 2"]
+        assert raw["ts"].dtype == object
+
+    
+    def test_projection_and_filters_applied_while_parsing(self):
+        """Test column projection, time window and podcast exclusion."""
+        records = [
+            {"ts": "2022-12-31T23:59:59Z", "ms_played": 1, "ip_addr_decrypted": "1.2.3.4",
+             "master_metadata_track_name": "Old", "spotify_episode_uri": None},
+            {"ts": "2023-01-01T00:00:00Z", "ms_played": 2, "ip_addr_decrypted": "1.2.3.4",
+             "master_metadata_track_name": "Kept", "spotify_episode_uri": None},
+            {"ts": "2023-01-01T05:00:00Z", "ms_played": 3, "ip_addr_decrypted": "1.2.3.4",
+             "master_metadata_track_name": None, "spotify_episode_uri": "spotify:episode:1"},
+            {"ts": "2023-02-01T00:00:00Z", "ms_played": 4, "ip_addr_decrypted": "1.2.3.4",
+             "master_metadata_track_name": "Too new", "spotify_episode_uri": None}
+        ]
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with open(Path(temp_dir) / "endsong_0.json", "w") as f:
+                json.dump(records, f)
+            
+            loader = SpotifyDataLoader(
+                temp_dir,
+                columns=["master_metadata_track_name", "ms_played"],
+                since="2023-01-01",
+                until="2023-02-01",
+                exclude_podcasts=True
+            )
+            data = loader.load_from_directory(streaming=True, batch_rows=2)
+        
+        assert list(data.columns) == ["master_metadata_track_name", "ms_played"]
+        assert list(data["master_metadata_track_name"]) == ["Kept"]
+        assert list(data["ms_played"]) == [2]
+
+    
+    def test_json_backends_decode_identical_records(self):
+        """Test that every installed JSON backend yields the same frame."""
+        from spotify_analysis.core.json_backends import available_backends, get_json_backend
+        
+        test_data = [
+            {"ts": "2023-01-01T10:00:00Z", "ms_played": 180000, "master_metadata_track_name": "Caf\u00e9 \"Live\"",
+             "skipped": None, "shuffle": True, "offline_timestamp": 1672567200123},
+            {"ts": "2023-01-01T11:00:00Z", "ms_played": 0, "master_metadata_track_name": "\U0001f3b5",
+             "skipped": False, "shuffle": False, "offline_timestamp": 0}
+        ]
+        
+        with pytest.raises(ValueError):
+            get_json_backend("yaml")
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            file_path = Path(temp_dir) / "endsong_0.json"
+            with open(file_path, "w", encoding="utf-8") as f:
+                json.dump(test_data, f)
+            
+            frames = {}
+            for name in available_backends():
+                loader = SpotifyDataLoader(json_backend=name)
+                assert loader._load_json_file(file_path) == test_data
+                frames[name] = loader.load_from_files([file_path])
+        
+        assert "stdlib" in frames
+        for frame in frames.values():
+            pd.testing.assert_frame_equal(frame, frames["stdlib"])
+    
+    def test_load_from_zip_without_extracting(self):
+        """Test reading history members straight out of the export archive."""
+        import zipfile
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            zip_path = Path(temp_dir) / "my_spotify_data.zip"
+            with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+                for index in range(2):
+                    records = [{"ts": f"2023-01-0{index + 1}T00:00:00Z", "ms_played": index}]
+                    archive.writestr(
+                        f"Spotify Extended Streaming History/Streaming_History_Audio_{index}.json",
+                        json.dumps(records)
+                    )
+                archive.writestr("Spotify Account Data/Userdata.json", json.dumps({"username": "x"}))
+            
+            sequential = SpotifyDataLoader(zip_path).load_from_directory()
+            parallel = SpotifyDataLoader().load_from_zip(zip_path, workers=2, executor="thread",
+                                                         streaming=True)
+            
+            assert list(Path(temp_dir).iterdir()) == [zip_path]
+        
+        assert list(sequential["ms_played"]) == [0, 1]
+        assert "username" not in sequential.columns
+        pd.testing.assert_frame_equal(parallel, sequential)
+
+    
+    def test_iter_chunks_is_time_ordered_across_files(self):
+        """Test that chunks are bounded and globally ordered by timestamp."""
+        import random
+        
+        rng = random.Random(7)
+        hours = list(range(48))
+        rng.shuffle(hours)
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            # Two overlapping, internally unsorted files
+            for index in range(2):
+                records = [
+                    {"ts": f"2023-01-{1 + hour // 24:02d}T{hour % 24:02d}:00:00Z", "ms_played": hour}
+                    for hour in hours[index::2]
+                ]
+                with open(Path(temp_dir) / f"endsong_{index}.json", "w") as f:
+                    json.dump(records, f)
+            
+            loader = SpotifyDataLoader(temp_dir)
+            chunks = list(loader.iter_chunks(chunk_rows=5))
+        
+        assert all(len(chunk) == 5 for chunk in chunks[:-1])
+        assert sum(len(chunk) for chunk in chunks) == 48
+        combined = pd.concat(chunks, ignore_index=True)
+        assert combined["ts"].is_monotonic_increasing
+        assert list(combined["ms_played"]) == list(range(48))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,322 @@
+"""
+Tests for the data transformer module.
+"""
+
+import pytest
+import pandas as pd
+import numpy as np
+from pathlib import Path
+
+# Add src to path for imports
+import sys
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from spotify_analysis.core import data_transformer
+from spotify_analysis.core.data_transformer import (
+    TRANSFORM_STEPS, SpotifyDataTransformer, TransformMemo, plan_steps, transform_data
+)
+
+
+def make_plays(hours):
+    """Build plays at the given hours of 2023-01-02 (a Monday)."""
+    return pd.DataFrame({
+        'ts': pd.to_datetime([f"2023-01-02T{hour:02d}:15:00Z" for hour in hours]),
+        'ms_played': [180000] * len(hours),
+        'master_metadata_track_name': [f"Track {hour}" for hour in hours],
+        'master_metadata_album_artist_name': [f"Artist {hour % 3}" for hour in hours]
+    })
+
+
+class TestSpotifyDataTransformer:
+    """Test cases for SpotifyDataTransformer."""
+    
+    def test_time_features_by_hour(self):
+        """Test the default time periods and sleep window for every hour."""
+        transformer = SpotifyDataTransformer(make_plays(range(24)))
+        df = transformer.process_timestamps()
+        
+        expected_periods = (
+            ["Night"] * 6 + ["Morning"] * 6 + ["Afternoon"] * 5 + ["Evening"] * 4 + ["Night"] * 3
+        )
+        assert isinstance(df['time_period'].dtype, pd.CategoricalDtype)
+        assert list(df['time_period'].cat.categories) == ["Morning", "Afternoon", "Evening", "Night"]
+        assert df['time_period'].tolist() == expected_periods
+        
+        assert df['is_sleep_time'].dtype == bool
+        assert df['is_sleep_time'].tolist() == [hour >= 22 or hour <= 6 for hour in range(24)]
+    
+    def test_custom_time_boundaries(self):
+        """Test configurable periods, uncovered hours and missing timestamps."""
+        plays = make_plays([0, 8, 13, 23])
+        plays.loc[3, 'ts'] = pd.NaT
+        
+        transformer = SpotifyDataTransformer(
+            plays,
+            time_periods={"Work": (9, 18), "Late": (18, 2)},
+            sleep_hours=(0, 8)
+        )
+        df = transformer.process_timestamps()
+        
+        periods = df['time_period']
+        assert periods.iloc[0] == "Late"
+        assert periods.iloc[2] == "Work"
+        assert periods.isna().tolist() == [False, True, False, True]
+        assert df['is_sleep_time'].tolist() == [True, False, False, False]
+        
+        with pytest.raises(ValueError):
+            SpotifyDataTransformer(plays, time_periods={"A": (0, 12), "B": (11, 24)})
+
+
+    def test_duration_features(self):
+        """Test float32 duration columns and completion categories."""
+        plays = make_plays(range(5))
+        plays['ms_played'] = [10000, 60000, 100000, 200000, 50000]
+        plays['master_metadata_track_duration_ms'] = [200000, 200000, 200000, 200000, None]
+        df = SpotifyDataTransformer(plays).process_duration()
+        
+        assert df['seconds_played'].dtype == np.float32
+        assert df['minutes_played'].dtype == np.float32
+        assert df['seconds_played'].tolist() == [10.0, 60.0, 100.0, 200.0, 50.0]
+        assert df['completion_percentage'].dtype == np.float32
+        assert np.allclose(df['completion_percentage'].iloc[:4], [5.0, 30.0, 50.0, 100.0])
+        assert isinstance(df['completion_category'].dtype, pd.CategoricalDtype)
+        assert df['completion_category'].tolist()[:4] == ["Skip", "Partial", "Partial", "Complete"]
+        assert pd.isna(df['completion_category'].iloc[4])
+        
+        transformer = SpotifyDataTransformer(plays, completion_thresholds={"Short": 0, "Long": 50})
+        categories = transformer.process_duration()['completion_category']
+        assert categories.tolist()[:4] == ["Short", "Short", "Long", "Long"]
+
+
+    def test_clean_duplicates_on_natural_key(self):
+        """Test that plays repeating the natural key are dropped whatever their other fields."""
+        plays = pd.DataFrame({
+            'ts': pd.to_datetime(["2023-01-02T08:00:00Z"] * 3 + ["2023-01-02T09:00:00Z"]),
+            'spotify_track_uri': ["spotify:track:1", "spotify:track:1", "spotify:track:2", "spotify:track:1"],
+            'ms_played': [1000, 1000, 1000, 1000],
+            'platform': ["ios", "android", "ios", "ios"]
+        })
+        df = SpotifyDataTransformer(plays).clean_duplicates()
+        assert df.index.tolist() == [0, 2, 3]
+        
+        df = SpotifyDataTransformer(plays, dedup_key=['ms_played', 'platform']).clean_duplicates()
+        assert df.index.tolist() == [0, 1]
+    
+    def test_session_features(self):
+        """Test per-session columns over unsorted plays with a missing timestamp."""
+        plays = pd.DataFrame({
+            'ts': pd.to_datetime([
+                "2023-01-01T10:40:00Z", "2023-01-01T10:00:00Z", None,
+                "2023-01-01T10:10:00Z", "2023-01-01T12:00:00Z"
+            ]),
+            'ms_played': [1000, 2000, 4000, 3000, 5000],
+            'master_metadata_track_name': ["A", "A", "C", None, "B"]
+        }, index=[10, 11, 12, 13, 14])
+        df = SpotifyDataTransformer(plays).add_session_features()
+        
+        assert df.index.equals(pd.RangeIndex(5))
+        assert df['session_id'].tolist() == [0, 0, 0, 1, 1]
+        assert df['plays_in_session'].tolist() == [3, 3, 3, 1, 1]
+        assert df['total_duration_ms'].tolist() == [6000, 6000, 6000, 9000, 9000]
+        assert df['unique_tracks'].tolist() == [1, 1, 1, 2, 2]
+        assert (df['session_start'].iloc[3:] == pd.Timestamp("2023-01-01T12:00:00Z")).all()
+        assert (df['session_end'].iloc[:3] == pd.Timestamp("2023-01-01T10:40:00Z")).all()
+    
+    def test_session_table(self):
+        """Test the session table and plays without broadcast session columns."""
+        plays = make_plays([8, 8, 9, 13, 13, 23])
+        plays['ts'] = pd.to_datetime([
+            "2023-01-02T08:15:00Z", "2023-01-02T08:40:00Z", "2023-01-02T09:05:00Z",
+            "2023-01-02T13:00:00Z", "2023-01-02T13:20:00Z", "2023-01-02T23:50:00Z"
+        ])
+        transformer = SpotifyDataTransformer(plays, broadcast_sessions=False)
+        df = transformer.transform(['add_session_features'])
+        sessions = transformer.sessions
+        
+        assert not set(data_transformer.SESSION_ROW_COLUMNS) & set(df.columns)
+        assert sessions['session_id'].tolist() == [0, 1, 2]
+        assert sessions['plays_in_session'].tolist() == [3, 2, 1]
+        assert sessions['hour_min'].tolist() == [8, 13, 23]
+        assert sessions['hour_max'].tolist() == [9, 13, 23]
+        assert sessions['hour_mean'].tolist() == pytest.approx([25 / 3, 13, 23])
+        
+        broadcast = transform_data(plays, steps=['add_session_features'])
+        pd.testing.assert_frame_equal(data_transformer.build_session_table(broadcast), sessions)
+        assert (broadcast['session_end'] == sessions['session_end'].take(broadcast['session_id']).to_numpy()).all()
+
+
+    def test_artist_and_track_counts(self):
+        """Test play counts keyed by artist and by track URI."""
+        plays = pd.DataFrame({
+            'master_metadata_album_artist_name': ["X", "Y", "X", None],
+            'master_metadata_track_name': ["Intro", "Intro", "Intro", "Song"],
+            'spotify_track_uri': ["spotify:track:1", "spotify:track:2", "spotify:track:1", "spotify:track:3"]
+        })
+        transformer = SpotifyDataTransformer(plays)
+        transformer.add_artist_features()
+        df = transformer.add_track_features()
+        
+        assert df['artist_play_count'].iloc[:3].tolist() == [2, 1, 2]
+        assert pd.isna(df['artist_play_count'].iloc[3])
+        assert (df['artist_loyalty'] == 0.5).all()
+        assert df['track_play_count'].tolist() == [2, 1, 2, 1]
+        assert df['track_play_count'].dtype == np.int64
+        assert df['track_popularity'].tolist() == [1.0, 0.5, 1.0, 0.5]
+
+
+    def test_copy_free_transform(self):
+        """Test that copy=False leaves the input intact and shares one frame."""
+        plays = make_plays([1, 9, 23])
+        plays['ts'] = plays['ts'].dt.strftime("%Y-%m-%dT%H:%M:%SZ")
+        original = plays.copy()
+        
+        transformer = SpotifyDataTransformer(plays, copy=False)
+        df = transformer.transform()
+        
+        pd.testing.assert_frame_equal(plays, original)
+        assert transformer.transformed_df is df
+        summary = transformer.get_transformation_summary()
+        assert summary["original_records"] == 3
+        assert summary["final_records"] == 3
+        assert 'session_id' in summary["columns_added"]
+        assert 'ts' not in summary["columns_added"]
+
+
+    def test_step_planning(self):
+        """Test dependency ordering, column selection and unknown steps."""
+        assert plan_steps(['add_session_features', 'clean_duplicates']) == [
+            'clean_duplicates', 'process_timestamps', 'add_session_features'
+        ]
+        assert plan_steps(['add_track_features'], columns=['is_sleep_time']) == [
+            'process_timestamps', 'add_track_features'
+        ]
+        assert plan_steps() == list(TRANSFORM_STEPS)
+        
+        with pytest.raises(ValueError):
+            plan_steps(['Process Timestamps'])
+        with pytest.raises(ValueError):
+            plan_steps(columns=['not_a_column'])
+    
+    def test_memoized_transform_runs_only_new_steps(self, monkeypatch):
+        """Test that extending a memoized chain only runs the added step."""
+        plays = make_plays([1, 9, 23])
+        memo = TransformMemo()
+        calls = []
+        
+        original_duration = SpotifyDataTransformer.process_duration
+        
+        def counting_duration(self):
+            calls.append('process_duration')
+            return original_duration(self)
+        
+        monkeypatch.setattr(SpotifyDataTransformer, 'process_duration', counting_duration)
+        
+        first = transform_data(plays, steps=['process_timestamps', 'process_duration'], memo=memo)
+        second = transform_data(plays, steps=['process_timestamps', 'process_duration', 'add_artist_features'],
+                                memo=memo)
+        assert calls == ['process_duration']
+        assert 'artist_play_count' in second.columns
+        assert 'artist_play_count' not in first.columns
+        
+        # Different data does not hit the memo
+        transform_data(make_plays([2, 3]), steps=['process_duration'], memo=memo)
+        assert calls == ['process_duration', 'process_duration']
+
+
+    def test_update_matches_full_recompute(self):
+        """Test that appending plays equals transforming the whole history."""
+        def plays(times, tracks):
+            return pd.DataFrame({
+                'ts': [f"2023-01-02T{time}:00Z" for time in times],
+                'ms_played': [60000 * (index + 1) for index in range(len(times))],
+                'master_metadata_track_name': [f"Track {track}" for track in tracks],
+                'master_metadata_album_artist_name': [f"Artist {track % 2}" for track in tracks],
+                'spotify_track_uri': [f"spotify:track:{track}" for track in tracks]
+            })
+        
+        history = plays(["08:00", "09:00", "09:10", "09:20"], [1, 2, 1, 3])
+        cases = [
+            # Continues the last session, repeats a known play and adds a new track
+            plays(["09:40", "09:20", "12:00", "12:05"], [4, 3, 1, 5]),
+            # Starts before the latest known play
+            plays(["08:30", "13:00"], [2, 6])
+        ]
+        
+        for new_plays in cases:
+            transformer = SpotifyDataTransformer(history)
+            transformer.transform()
+            updated = transformer.update(new_plays)
+            
+            expected = transform_data(pd.concat([history, new_plays], ignore_index=True))
+            pd.testing.assert_frame_equal(updated, expected)
+            assert transformer.transformed_df is not None
+            assert transformer.get_transformation_summary()["final_records"] == len(expected)
+        
+        # A known play is recognized in a batch where ms_played is nullable
+        mixed = plays(["09:20", "14:00"], [3, 7])
+        mixed['ms_played'] = pd.array([240000, None], dtype="Int32")
+        transformer = SpotifyDataTransformer(history)
+        transformer.transform()
+        assert len(transformer.update(mixed)) == len(history) + 1
+        
+        with pytest.raises(ValueError):
+            SpotifyDataTransformer(history).update(history)
+
+    
+    @pytest.mark.filterwarnings("error::FutureWarning")
+    def test_chunked_transform_matches_in_memory(self, tmp_path):
+        """Test that chunks split mid-session and mid-duplicate give the in-memory result."""
+        pytest.importorskip("pyarrow")
+        from spotify_analysis.core.chunked_transform import transform_chunks
+        
+        plays = pd.DataFrame({
+            'ts': pd.to_datetime([
+                "2023-01-02T08:00:00Z", "2023-01-02T08:10:00Z", "2023-01-02T08:10:00Z",
+                "2023-01-02T08:10:00Z", "2023-01-02T09:30:00Z", "2023-01-02T09:35:00Z"
+            ]),
+            'ms_played': [60000, 120000, 120000, 90000, 30000, 45000],
+            'master_metadata_track_name': ["A", "B", "B", "C", "A", "B"],
+            'master_metadata_album_artist_name': ["X", "Y", "Y", "X", None, "Y"],
+            'spotify_track_uri': ["spotify:track:1", "spotify:track:2", "spotify:track:2",
+                                  "spotify:track:3", "spotify:track:1", "spotify:track:2"]
+        })
+        # The first session and the duplicated play both span the chunk edges
+        chunks = [plays.iloc[:2], plays.iloc[2:3], plays.iloc[3:]]
+        
+        transformer = transform_chunks(chunks, tmp_path / "sink")
+        expected = transform_data(plays).reset_index(drop=True)
+        pd.testing.assert_frame_equal(transformer.read(), expected, check_categorical=False)
+        assert transformer.stats["records"] == 5
+        assert transformer.stats["sessions"] == 2
+        
+        # Plays without a timestamp are transformed last, here from unparsed strings
+        raw = plays.assign(ts=plays['ts'].dt.strftime('%Y-%m-%dT%H:%M:%SZ'))
+        raw.loc[[1, 4], 'ts'] = None
+        transformer = transform_chunks([raw.iloc[:3], raw.iloc[3:]], tmp_path / "missing")
+        expected = transform_data(raw).reset_index(drop=True)
+        pd.testing.assert_frame_equal(transformer.read(), expected, check_categorical=False)
+        
+        with pytest.raises(ValueError):
+            transform_chunks([plays.iloc[4:5], plays.iloc[:1]], tmp_path / "unordered")
+
+    
+    def test_parallel_transform_matches_serial(self, monkeypatch):
+        """Test partitioned transformation with sessions spanning partition edges."""
+        monkeypatch.setattr(data_transformer, '_MIN_PARTITION_ROWS', 1)
+        offsets = np.arange(0, 3 * 24 * 60, 7)
+        plays = pd.DataFrame({
+            'ts': pd.Timestamp("2023-01-31T23:00:00Z") + pd.to_timedelta(offsets * np.where(offsets % 5, 1, 9), unit='min'),
+            'ms_played': (offsets % 11) * 10000,
+            'master_metadata_track_name': [f"Track {offset % 13}" for offset in offsets],
+            'master_metadata_album_artist_name': [f"Artist {offset % 3}" for offset in offsets]
+        }).sample(frac=1, random_state=0)
+        plays.loc[plays.index[:3], 'ts'] = pd.NaT
+        plays = pd.concat([plays, plays.iloc[:20]])
+        
+        for steps in [None, ['clean_duplicates', 'add_artist_features']]:
+            expected = transform_data(plays, steps=steps)
+            pd.testing.assert_frame_equal(transform_data(plays, steps=steps, workers=2), expected)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
\ No newline at end of file
@@ -0,0 +1,154 @@
+"""
+Tests for the pattern analyzer module.
+"""
+
+import pytest
+import pandas as pd
+import numpy as np
+from pathlib import Path
+
+# Add src to path for imports
+import sys
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from spotify_analysis.core.aggregation_cube import AggregationCube
+from spotify_analysis.core.data_transformer import SpotifyDataTransformer, transform_data
+from spotify_analysis.core.pattern_analyzer import SpotifyPatternAnalyzer
+from spotify_analysis.core.sketches import PlaySketches
+
+
+def make_history(rows=500, seed=0):
+    """Build transformed plays with repeated artists and tracks."""
+    rng = np.random.default_rng(seed)
+    ts = pd.Timestamp("2023-01-01T00:00:00Z") + pd.to_timedelta(np.cumsum(rng.integers(60, 7200, rows)), unit='s')
+    tracks = rng.integers(0, 40, rows)
+    plays = pd.DataFrame({
+        'ts': ts,
+        'ms_played': rng.integers(0, 240000, rows),
+        'master_metadata_track_duration_ms': np.where(rng.random(rows) < 0.1, np.nan, 240000),
+        'master_metadata_track_name': [f"Track {track}" for track in tracks],
+        'master_metadata_album_artist_name': [None if track == 0 else f"Artist {track % 7}" for track in tracks],
+        'spotify_track_uri': [f"spotify:track:{track}" for track in tracks]
+    })
+    return transform_data(plays)
+
+
+class TestSpotifyPatternAnalyzer:
+    """Test cases for SpotifyPatternAnalyzer."""
+    
+    def test_cube_totals_match_value_counts(self):
+        """Test that cube totals equal direct counts over the plays."""
+        df = make_history()
+        cube = AggregationCube.from_frame(df)
+        
+        hourly = cube.totals(['hour'])
+        pd.testing.assert_series_equal(
+            hourly, df['hour'].value_counts().sort_index(), check_names=False, check_index_type=False
+        )
+        
+        sleep = df['is_sleep_time']
+        artists = cube.totals(['artist'], where={'is_sleep_time': True})
+        expected = df.loc[sleep, 'master_metadata_album_artist_name'].value_counts()
+        assert artists[artists > 0].sort_index().to_dict() == expected.sort_index().to_dict()
+        
+        pairs = cube.totals(['artist', 'time_period'])
+        expected = df.groupby(['master_metadata_album_artist_name', 'time_period'], observed=True).size()
+        assert pairs.to_dict() == expected.to_dict()
+        
+        assert cube.mean('minutes', {'is_sleep_time': False}) == pytest.approx(df.loc[~sleep, 'minutes_played'].mean())
+        buckets = cube.totals(['completion_bucket'])
+        assert buckets['complete'] == (df['completion_percentage'] >= 90).sum()
+        assert buckets.sum() == df['completion_percentage'].notna().sum()
+    
+    def test_analyses_answered_from_cube(self):
+        """Test analysis results against direct computations."""
+        df = make_history()
+        analyzer = SpotifyPatternAnalyzer(df)
+        
+        temporal = analyzer.analyze_temporal_patterns()
+        assert temporal["sleep_time_analysis"]["sleep_time_plays"] == df['is_sleep_time'].sum()
+        assert sum(temporal["daily_distribution"].values()) == len(df)
+        
+        artist = analyzer.analyze_artist_patterns()
+        top = df['master_metadata_album_artist_name'].value_counts()
+        assert artist["top_artists"][0]["plays"] == top.iloc[0]
+        
+        track = analyzer.analyze_track_patterns()
+        completion = df['completion_percentage']
+        assert track["track_completion"]["avg_completion"] == pytest.approx(completion.mean(), rel=1e-5)
+        assert track["track_completion"]["skipped_plays"] == (completion < 30).sum()
+        
+        sleep = analyzer.analyze_sleep_patterns()
+        sleep_completion = completion[df['is_sleep_time']]
+        assert sleep["sleep_quality_indicators"]["sleep_skip_rate"] == pytest.approx(
+            (sleep_completion < 30).sum() / len(sleep_completion) * 100
+        )
+    
+    def test_artist_time_preferences(self):
+        """Test vectorized preferences against idxmax over the pivot table."""
+        df = make_history()
+        pivot = df.groupby(['master_metadata_album_artist_name', 'time_period'], observed=True).size().unstack(fill_value=0)
+        expected = {artist: pivot.loc[artist].idxmax() for artist in pivot.index}
+        
+        preferences = SpotifyPatternAnalyzer(df).analyze_artist_patterns()["artist_time_preferences"]
+        assert preferences == expected
+        
+        results = SpotifyPatternAnalyzer(df, preference_top_n=2).analyze_artist_patterns()
+        top_artists = [entry["artist"] for entry in results["top_artists"][:2]]
+        assert list(results["artist_time_preferences"]) == top_artists
+        assert all(expected[artist] == results["artist_time_preferences"][artist] for artist in top_artists)
+    
+    def test_selected_analyses_in_parallel(self):
+        """Test that concurrent selected analyses match a sequential run."""
+        df = make_history()
+        sequential = SpotifyPatternAnalyzer(df).analyze_all_patterns()
+        
+        results = SpotifyPatternAnalyzer(df).analyze_all_patterns(analyses=["artist", "session", "sleep"], workers=3)
+        assert set(results) == {"artist", "session", "sleep", "summary"}
+        assert "data_quality" not in results["summary"]
+        for name in ("artist", "session", "sleep"):
+            assert results[name] == sequential[name]
+        
+        with pytest.raises(ValueError):
+            SpotifyPatternAnalyzer(df).analyze_all_patterns(analyses=["genre"])
+    
+    def test_session_patterns_from_session_table(self):
+        """Test session analysis from the transformer's session table."""
+        df = make_history()
+        transformer = SpotifyDataTransformer(df[['ts', 'ms_played', 'master_metadata_track_name']])
+        plays = transformer.transform(['add_session_features'])
+        
+        results = SpotifyPatternAnalyzer(plays, sessions=transformer.sessions).analyze_session_patterns()
+        session_stats = results["session_statistics"]
+        assert session_stats["total_sessions"] == plays['session_id'].nunique()
+        assert session_stats["avg_plays_per_session"] == pytest.approx(plays.groupby('session_id').size().mean())
+        hour_means = plays.groupby('session_id')['hour'].mean()
+        assert results["session_time_patterns"]["avg_session_hour"] == pytest.approx(hour_means.mean())
+        assert results == SpotifyPatternAnalyzer(plays).analyze_session_patterns()
+    
+    def test_approximate_analyses(self):
+        """Test sketch-backed results and error bounds against exact analyses."""
+        df = make_history(rows=2000)
+        exact = SpotifyPatternAnalyzer(df).analyze_all_patterns(analyses=["artist", "track", "sleep"])
+        sketches = PlaySketches.from_frame(df[:800]).merge(PlaySketches.from_frame(df[800:]))
+        approximate = SpotifyPatternAnalyzer(df, approximate=True, sketches=sketches).analyze_all_patterns(
+            analyses=["artist", "track", "sleep"]
+        )
+        
+        # Fewer distinct values than the sketch capacity, so counts are exact
+        artist = approximate["artist"]
+        assert artist["approximation"]["max_play_error"] == 0
+        assert [entry["plays"] for entry in artist["top_artists"]] == [entry["plays"] for entry in exact["artist"]["top_artists"]]
+        assert artist["artist_time_preferences"] == exact["artist"]["artist_time_preferences"]
+        
+        unique_tracks = approximate["track"]["approximation"]["unique_tracks"]
+        assert unique_tracks["estimate"] == df['master_metadata_track_name'].nunique()
+        median = approximate["track"]["track_completion"]["median_completion"]
+        assert (df['completion_percentage'].dropna() < median).mean() == pytest.approx(0.5, abs=0.02)
+        
+        sleep_tracks = approximate["sleep"]["sleep_time_preferences"]["top_sleep_tracks"]
+        assert sleep_tracks[0]["plays"] == exact["sleep"]["sleep_time_preferences"]["top_sleep_tracks"][0]["plays"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
\ No newline at end of file
@@ -0,0 +1,131 @@
+"""
+Tests for the sketches module.
+"""
+
+import pytest
+import pandas as pd
+import numpy as np
+from pathlib import Path
+
+# Add src to path for imports
+import sys
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from spotify_analysis.core.sketches import HyperLogLog, PlaySketches, SpaceSaving, TDigest
+
+
+class TestSketches:
+    """Test cases for the mergeable sketches."""
+    
+    def test_hyperloglog_estimate_and_merge(self):
+        """Test distinct count estimates and that merging equals sketching the union."""
+        rng = np.random.default_rng(0)
+        values = pd.Series([f"Track {value}" for value in rng.integers(0, 10 ** 9, 50000)])
+        sketch = HyperLogLog().update(values)
+        
+        true_count = values.nunique()
+        assert abs(sketch.estimate() - true_count) <= 4 * sketch.relative_error * true_count
+        assert HyperLogLog().update(values[:10]).estimate() == pytest.approx(values[:10].nunique(), abs=0.5)
+        assert HyperLogLog().update(pd.Series([None, None])).estimate() == 0
+        
+        merged = HyperLogLog().update(values[:20000]).merge(HyperLogLog().update(values[20000:]))
+        assert (merged.registers == sketch.registers).all()
+        categorical = HyperLogLog().update(values.astype('category'))
+        assert (categorical.registers == sketch.registers).all()
+        
+        with pytest.raises(ValueError):
+            sketch.merge(HyperLogLog(precision=10))
+    
+    def test_space_saving_bounds(self):
+        """Test that Space-Saving counts bound the true counts."""
+        rng = np.random.default_rng(1)
+        values = pd.Series(rng.zipf(1.5, 20000).astype(str))
+        exact = values.value_counts()
+        
+        summary = SpaceSaving(capacity=50)
+        for start in range(0, len(values), 3000):
+            summary.update(values[start:start + 3000])
+        top = summary.top()
+        
+        assert summary.total == len(values)
+        assert len(top) == 50
+        true_counts = exact.reindex(top.index)
+        assert (top['count'] >= true_counts).all()
+        assert (top['count'] - top['error'] <= true_counts).all()
+        assert exact.drop(top.index).max() <= summary.floor <= summary.max_error
+        assert list(top.index[:3]) == list(exact.index[:3])
+        
+        # Exact while there are no more values than the capacity
+        few = pd.Series(rng.integers(0, 40, 500).astype(str))
+        small = SpaceSaving(capacity=50).update(few[:200]).merge(SpaceSaving(capacity=50).update(few[200:]))
+        assert small.max_error == 0
+        assert small.top()['count'].to_dict() == few.value_counts().to_dict()
+    
+    def test_tdigest_quantiles_and_merge(self):
+        """Test quantile estimates of single and merged digests."""
+        rng = np.random.default_rng(2)
+        values = pd.Series(rng.lognormal(0, 1, 50000))
+        digest = TDigest().update(values)
+        merged = TDigest().update(values[:25000]).merge(TDigest().update(values[25000:]))
+        
+        assert len(digest.means) < 200
+        for q in (0.01, 0.5, 0.9, 0.99):
+            for sketch in (digest, merged):
+                rank = (values < sketch.quantile(q)).mean()
+                assert abs(rank - q) <= 0.005
+                assert 0 <= sketch.rank_error(q) < 0.02
+        
+        # Uncompressed digests interpolate like pandas
+        small = pd.Series([4.0, 1.0, None, 3.0, 2.0])
+        assert TDigest().update(small).quantile(0.25) == small.quantile(0.25)
+        assert np.isnan(TDigest().quantile(0.5))
+    
+    def test_play_sketches_merge(self):
+        """Test that sketches of parts merge into sketches of all plays."""
+        rng = np.random.default_rng(3)
+        plays = pd.DataFrame({
+            'ms_played': rng.integers(0, 240000, 3000),
+            'master_metadata_track_name': [f"Track {value}" for value in rng.integers(0, 80, 3000)],
+            'master_metadata_album_artist_name': [f"Artist {value}" for value in rng.integers(0, 9, 3000)],
+            'is_sleep_time': rng.random(3000) < 0.3
+        })
+        whole = PlaySketches.from_frame(plays)
+        merged = PlaySketches.from_frame(plays[:1000]).merge(PlaySketches.from_frames([plays[1000:2000], plays[2000:]]))
+        
+        assert merged.records == whole.records == 3000
+        assert (merged.distinct['tracks'].registers == whole.distinct['tracks'].registers).all()
+        assert merged.top['sleep_artists'].counts.to_dict() == (
+            plays.loc[plays['is_sleep_time'], 'master_metadata_album_artist_name'].value_counts().to_dict()
+        )
+        assert merged.quantiles['ms_played'].total == whole.quantiles['ms_played'].total == 3000
+    
+    def test_play_sketches_from_plays_save_and_load(self, tmp_path):
+        """Test sketching loaded plays and a save/load round trip."""
+        rng = np.random.default_rng(4)
+        artists = rng.integers(0, 9, 3000)
+        plays = pd.DataFrame({
+            'ts': pd.Timestamp("2023-01-01T00:00:00Z") + pd.to_timedelta(rng.integers(0, 10 ** 7, 3000), unit='s'),
+            'ms_played': rng.integers(0, 240000, 3000),
+            'master_metadata_track_duration_ms': 240000,
+            'master_metadata_track_name': [f"Track {value}" for value in rng.integers(0, 80, 3000)],
+            'master_metadata_album_artist_name': [f"Artist {value}" for value in artists]
+        })
+        sketches = PlaySketches.from_plays(plays)
+        sketches.save(tmp_path / "plays.sketches.npz")
+        loaded = PlaySketches.load(tmp_path / "plays.sketches.npz")
+        
+        assert loaded.records == 3000
+        assert (loaded.distinct['artists'].registers == sketches.distinct['artists'].registers).all()
+        assert loaded.top['sleep_tracks'].counts.to_dict() == sketches.top['sleep_tracks'].counts.to_dict()
+        assert loaded.quantiles['completion_percentage'].quantile(0.5) == sketches.quantiles['completion_percentage'].quantile(0.5)
+        assert list(loaded.period_artists) == list(sketches.period_artists)
+        
+        hours = plays['ts'].dt.hour
+        assert sketches.top['sleep_artists'].total == ((hours >= 22) | (hours < 7)).sum()
+        preferred = loaded.preferred_periods(pd.Index(sorted(set(plays['master_metadata_album_artist_name']))))
+        assert preferred.equals(sketches.preferred_periods(preferred.index))
+        assert len(preferred) == 9
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
\ No newline at end of file